@@ -0,0 +1,220 @@
+import logging
+import os
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from multiprocessing import Pool, cpu_count
+
+from browser_pool import process_tree_rss_mb
+
+log = logging.getLogger(__name__)
+
+
+class AimdController:
+    """
+    AIMD limit on jobs in flight, plus pacing between submissions:
+    - every `window` completions it checks the block/error rate, median latency,
+      RSS of this process tree (workers and browsers included) and host load
+    - block signals (errors, timeouts, empty results) above error_threshold: limit *= decrease_factor
+      and the pacing delay doubles (starting at min_delay or 1 s)
+    - resource pressure (latency over latency_target, RSS over max_rss_mb, load over max_load_per_cpu):
+      limit *= decrease_factor
+    - otherwise: limit += increase and the pacing delay halves
+    The limit always stays within [min_limit, max_limit]. Thread-safe.
+    """
+
+    def __init__(self, name, min_limit, max_limit, initial=None, window=10, increase=1, decrease_factor=0.5,
+                 error_threshold=0.2, latency_target=None, max_rss_mb=None, max_load_per_cpu=None,
+                 min_delay=0.0, max_delay=30.0):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial or self.min_limit))
+        self.window = window
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.error_threshold = error_threshold
+        self.latency_target = latency_target
+        self.max_rss_mb = max_rss_mb
+        self.max_load_per_cpu = max_load_per_cpu
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min_delay
+        self.next_slot = 0.0
+        self.samples = []
+        self.lock = threading.Lock()
+        self.stats = {"completed": 0, "failed": 0, "increases": 0, "decreases": 0}
+
+    @classmethod
+    def from_config(cls, name, params, default_limit):
+        """Controller for one phase (params[name] holds min/max/initial/latency_target); pinned to default_limit when disabled."""
+        params = params or {}
+        if not params.get("enabled"):
+            return cls(name, default_limit, default_limit)
+        phase = params.get(name, {})
+        return cls(
+            name,
+            min_limit=phase.get("min", 1),
+            max_limit=phase.get("max", default_limit),
+            initial=phase.get("initial"),
+            window=params.get("window", 10),
+            increase=params.get("increase", 1),
+            decrease_factor=params.get("decrease_factor", 0.5),
+            error_threshold=params.get("error_threshold", 0.2),
+            latency_target=phase.get("latency_target"),
+            max_rss_mb=params.get("max_rss_mb"),
+            max_load_per_cpu=params.get("max_load_per_cpu"),
+            min_delay=phase.get("min_delay", 0.0),
+            max_delay=phase.get("max_delay", 30.0),
+        )
+
+    @property
+    def fixed(self):
+        return self.min_limit == self.max_limit
+
+    def next_delay(self):
+        """Seconds the caller should wait before its next submission (spaces submissions `delay` apart)."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.delay
+            return slot - now
+
+    def pace(self):
+        delay = self.next_delay()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, latency, ok=True):
+        with self.lock:
+            self.stats["completed"] += 1
+            self.stats["failed"] += not ok
+            if self.fixed and not self.delay:
+                return
+            self.samples.append((latency, ok))
+            if len(self.samples) >= self.window:
+                self._adjust()
+                self.samples = []
+
+    def _pressure(self, latencies):
+        if self.latency_target and statistics.median(latencies) > self.latency_target:
+            return f"median latency {statistics.median(latencies):.1f}s"
+        if self.max_rss_mb:
+            rss = process_tree_rss_mb()
+            if rss > self.max_rss_mb:
+                return f"RSS {rss:.0f} MB"
+        if self.max_load_per_cpu and hasattr(os, "getloadavg"):
+            load = os.getloadavg()[0] / cpu_count()
+            if load > self.max_load_per_cpu:
+                return f"load {load:.2f}/CPU"
+        return None
+
+    def _adjust(self):
+        error_rate = sum(not ok for _, ok in self.samples) / len(self.samples)
+        before = (self.limit, self.delay)
+        if error_rate > self.error_threshold:
+            reason, direction = f"{error_rate:.0%} blocked/failed", "decreases"
+            self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+            self.delay = min(self.max_delay, max(self.delay * 2, self.min_delay, 1.0))
+        elif (reason := self._pressure([latency for latency, _ in self.samples])) is not None:
+            direction = "decreases"
+            self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        else:
+            reason, direction = "healthy", "increases"
+            self.limit = min(self.max_limit, self.limit + self.increase)
+            self.delay = max(self.min_delay, self.delay / 2 if self.delay > 0.05 else 0.0)
+
+        if (self.limit, self.delay) != before:
+            self.stats[direction] += 1
+            log.info(f"🎚️ {self.name}: {reason} → {self.limit} in flight, {self.delay:.1f}s between submissions "
+                     f"(was {before[0]}, {before[1]:.1f}s)")
+
+    def summary(self):
+        return (f"{self.name}: limit {self.limit} [{self.min_limit}-{self.max_limit}], delay {self.delay:.1f}s, "
+                f"{self.stats['completed']} completed, {self.stats['failed']} failed, "
+                f"{self.stats['increases']} increases, {self.stats['decreases']} decreases")
+
+
+class AdaptivePool:
+    """
+    multiprocessing Pool with controller.max_limit processes whose jobs in flight follow controller.limit:
+    a dispatcher thread paces submissions, and every completion reports (latency, is_ok(result)) back.
+    The Pool is forked in start(); the dispatcher thread only starts on the first submit.
+    """
+
+    def __init__(self, controller, is_ok=bool):
+        self.controller = controller
+        self.is_ok = is_ok
+        self.pool = None
+        self.backlog = deque()
+        self.in_flight = 0
+        self.cond = threading.Condition()
+        self.dispatcher = None
+        self.closing = False
+
+    def start(self):
+        self.pool = Pool(processes=self.controller.max_limit)
+        return self
+
+    def submit(self, fn, arg, callback, error_result=None):
+        """Run fn(arg) in the pool; callback gets the result (or error_result if fn raised)."""
+        with self.cond:
+            if self.dispatcher is None:
+                self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+                self.dispatcher.start()
+            self.backlog.append((fn, arg, callback, error_result))
+            self.cond.notify_all()
+
+    def _dispatch(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.closing or (self.backlog and self.in_flight < self.controller.limit))
+                if not self.backlog:
+                    return
+                fn, arg, callback, error_result = self.backlog.popleft()
+                self.in_flight += 1
+            self.controller.pace()
+            started = time.monotonic()
+            self.pool.apply_async(
+                fn, (arg,),
+                callback=lambda result, cb=callback, t=started: self._done(cb, result, t, True),
+                error_callback=lambda e, cb=callback, r=error_result, t=started: self._done(cb, r, t, False),
+            )
+
+    def _done(self, callback, result, started, succeeded):
+        self.controller.record(time.monotonic() - started, succeeded and self.is_ok(result))
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+        callback(result)
+
+    def imap_unordered(self, fn, items, error_result=None, window=None):
+        """
+        Results of fn over items as they complete (a job that raised yields error_result).
+        With a window, at most that many jobs are submitted but not yet consumed: a consumer that stops
+        pulling results stops new submissions, instead of finished results piling up.
+        """
+        results = queue.SimpleQueue()
+        pending = 0
+        for item in items:
+            if window and pending >= window:
+                yield results.get()
+                pending -= 1
+            self.submit(fn, item, results.put, error_result)
+            pending += 1
+        for _ in range(pending):
+            yield results.get()
+
+    def close(self):
+        """Finish everything submitted, then shut the pool down."""
+        with self.cond:
+            self.cond.wait_for(lambda: not self.backlog and self.in_flight == 0)
+            self.closing = True
+            self.cond.notify_all()
+        if self.dispatcher is not None:
+            self.dispatcher.join()
+        self.pool.close()
+        self.pool.join()  # let workers shut their browsers down cleanly
+        log.info(f"🎚️ {self.controller.summary()}")
@@ -0,0 +1,68 @@
+import argparse
+import glob
+import logging
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GOOGLE_MAPS_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, GOOGLE_MAPS_DIR)
+
+from feed_extract import card_to_record, extract_cards_from_html, load_selectors
+from instrumentation import setup_logging
+from maps_xhr import compare_records, decode_payload, records_from_payloads
+
+log = logging.getLogger("check_xhr")
+
+# Real recordings only: make_fixtures.py writes its search pages in the PLACE_FIELDS layout, so they cannot catch
+# a stale index table. Record with phase1_parameter.extraction: xhr and xhr_record_dir set, then copy the
+# <query>-<id>/ folders here.
+RECORDED_DIR = os.path.join(BENCH_DIR, "fixtures", "maps", "recorded")
+QUERY_TUPLE = ("check", None, None, None)
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def check_recording(path, selectors):
+    """(DOM records, payload records, mismatches) for one recorded query: search-*.txt plus feed*.html."""
+    payloads = [decode_payload(read(p)) for p in sorted(glob.glob(os.path.join(path, "*.txt")))]
+    feeds = [read(p) for p in sorted(glob.glob(os.path.join(path, "*.html")))]
+    cards = [card for text in feeds for card in extract_cards_from_html(text, selectors)]
+    dom_records = [card_to_record(card, QUERY_TUPLE) for card in cards if card.get("href")]
+    xhr_records = records_from_payloads(payloads, QUERY_TUPLE)
+    problems = compare_records(dom_records, xhr_records)
+    if not dom_records:
+        problems.append("no feed cards in the recording")
+    return dom_records, xhr_records, problems
+
+
+if __name__ == "__main__":
+    # Run from google_maps/:
+    #   python bench/check_xhr.py                         # every recording under bench/fixtures/maps/recorded/
+    #   python bench/check_xhr.py data/xhr/hotel-near-*   # fresh recordings
+    parser = argparse.ArgumentParser(description="Check maps_xhr.PLACE_FIELDS against recorded search responses")
+    parser.add_argument("recordings", nargs="*", help=f"recording folders (default {RECORDED_DIR}/*)")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    setup_logging(args.log_level)
+    recordings = args.recordings or sorted(glob.glob(os.path.join(RECORDED_DIR, "*", "")))
+    if not recordings:
+        log.error(f"❌ No recordings found in {RECORDED_DIR}; record some with phase1_parameter.xhr_record_dir")
+        sys.exit(2)
+
+    selectors = load_selectors(os.path.join(GOOGLE_MAPS_DIR, "feed_selectors.yaml"))
+    failed = 0
+    for path in recordings:
+        dom_records, xhr_records, problems = check_recording(path, selectors)
+        if problems:
+            failed += 1
+            log.error(f"❌ {path}: {len(problems)} mismatch(es) over {len(dom_records)} cards")
+            for problem in problems:
+                log.error(f"   {problem}")
+        else:
+            log.info(f"✅ {path}: {len(dom_records)} cards agree with {len(xhr_records)} decoded places")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,48 @@
+import logging
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from feed_extract import parse_card_fields
+from instrumentation import setup_logging
+
+log = logging.getLogger("checks")
+
+# Assertion checks for parsing rules the timing benchmarks would not notice breaking.
+# Run from google_maps/: python bench/checks.py
+
+
+def check_card_phones():
+    """Malaysian numbers are high confidence with or without the +60 country code, spaced or not."""
+    for phone, digits in [
+        ("03-2123 4567", "0321234567"),
+        ("+60 3-2123 4567", "+60321234567"),
+        ("+603-2123 4567", "+60321234567"),
+        ("+60 12-345 6789", "+60123456789"),
+        ("012-345 6789", "0123456789"),
+    ]:
+        fields = parse_card_fields(["Hotel · 12, Jalan Ipoh", f"Open now · {phone}"])
+        assert fields["card_phone"] == digits, (phone, fields)
+        assert fields["phone_confidence"] == "high", (phone, fields)
+        assert fields["open_status"] == "Open now", (phone, fields)
+
+    fields = parse_card_fields(["Hotel · 12, Jalan Ipoh", "Open now · +1 (415) 555-0100"])
+    assert fields["card_phone"] == "+14155550100" and fields["phone_confidence"] == "low", fields
+
+
+CHECKS = [check_card_phones]
+
+
+if __name__ == "__main__":
+    setup_logging("INFO")
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+            log.info(f"✅ {check.__name__}")
+        except AssertionError as e:
+            failed += 1
+            log.error(f"❌ {check.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,216 @@
+import argparse
+import html
+import json
+import os
+import random
+import re
+import shutil
+import sys
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from maps_xhr import PLACE_INDEX, XSSI_PREFIX
+from place_key import add_place_key
+from spatial_index import build_centroids
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+# Postcodes from the sample state_district_postcode_location.json with a rough centre each;
+# every place gets the nearest one so addresses, coordinates and centroids agree.
+POSTCODE_ANCHORS = [
+    ("80000", "johor", "johor bahru", "bandar johor bahru", 1.4600, 103.7630),
+    ("80200", "johor", "johor bahru", "taman sentosa", 1.4700, 103.7800),
+    ("80250", "johor", "johor bahru", "taman century", 1.4870, 103.7610),
+    ("81100", "johor", "johor bahru", "taman johor jaya", 1.4990, 103.7900),
+    ("81200", "johor", "johor bahru", "tampoi", 1.4950, 103.7300),
+    ("81300", "johor", "johor bahru", "skudai", 1.5350, 103.6600),
+    ("81750", "johor", "johor bahru", "masai", 1.5000, 103.8800),
+    ("79100", "johor", "johor bahru", "iskandar puteri", 1.4250, 103.6300),
+    ("68100", "selangor", "gombak", "batu caves", 3.2380, 101.6840),
+    ("53100", "selangor", "gombak", "taman melawati", 3.2100, 101.7450),
+    ("48000", "selangor", "gombak", "rawang", 3.3200, 101.5760),
+    ("68000", "selangor", "hulu langat", "ampang", 3.1500, 101.7600),
+    ("53300", "wilayah persekutuan", "kuala lumpur", "setapak", 3.1900, 101.7100),
+    ("50450", "wilayah persekutuan", "kuala lumpur", "bukit bintang", 3.1480, 101.7110),
+    ("62000", "wilayah persekutuan", "putrajaya", "presint 1", 2.9260, 101.6960),
+    ("62250", "wilayah persekutuan", "putrajaya", "presint 9", 2.9400, 101.6750),
+    ("62300", "wilayah persekutuan", "putrajaya", "presint 15", 2.9000, 101.6800),
+]
+STREETS = [
+    "Jalan Tun Abdul Razak", "Jalan Dato Sulaiman", "Jalan Ibrahim Sultan", "Jalan Sultan Iskandar",
+    "Persiaran Perdana", "Jalan Sri Gombak", "Jalan Ipoh", "Lebuh Wawasan", "Jalan Harmonium", "Jalan Pahlawan",
+]
+AREA_CODES = {"johor": "07", "selangor": "03", "wilayah persekutuan": "03"}
+
+END_OF_LIST_HTML = (
+    '<div class="m6QErb"><div class="PbZDve"><p class="fontBodyMedium"><span>'
+    '<span class="HlvSq">You\'ve reached the end of the list.</span></span></p></div></div>\n'
+)
+
+
+def slugify(query):
+    """Same slug the replay search page derives from the typed query."""
+    return re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")
+
+
+def nearest_anchor(latitude, longitude):
+    return min(POSTCODE_ANCHORS, key=lambda a: (a[4] - latitude) ** 2 + (a[5] - longitude) ** 2)
+
+
+def make_places(phase1_results, places_per_query, seed=42):
+    """First places_per_query places of every query, with a synthetic address and phone number."""
+    rng = random.Random(seed)
+    df = add_place_key(phase1_results.copy())
+    df = df.dropna(subset=["href", "latitude", "longitude"]).drop_duplicates("place_key")
+    df = df.groupby("searched_query", sort=False).head(places_per_query).reset_index(drop=True)
+
+    rows = []
+    for i, row in df.iterrows():
+        postcode, state, district, area, _, _ = nearest_anchor(row["latitude"], row["longitude"])
+        street = f"{rng.randint(1, 250)}, {rng.choice(STREETS)}"
+        place = f"{area.title()}, {postcode} {district.title()}, {state.title()}"
+        if i % 6 == 5:
+            place = f"{area.title()}, {district.title()}, {state.title()}"  # no postcode: fuzzy matching path
+            postcode = None
+        phone = None
+        if i % 5 != 4:
+            phone = f"{AREA_CODES[state]}-{rng.randint(200, 999)} {rng.randint(1000, 9999)}"
+        rows.append({
+            "searched_query": row["searched_query"],
+            "searched_channel": row["searched_channel"],
+            "searched_district": row["searched_district"],
+            "searched_state": row["searched_state"],
+            "place_key": row["place_key"],
+            "name": row["name"],
+            "href": row["href"].replace("https://www.google.com", "{{BASE_URL}}"),
+            "rating": row["rating"],
+            "category": row["category"],
+            "latitude": row["latitude"],
+            "longitude": row["longitude"],
+            "street": street,
+            "full_address": f"{street}, {place}",
+            "phone_number": phone,
+            "postcode": postcode,
+            "state": state,
+            "district": district,
+            "area": area,
+        })
+    return pd.DataFrame(rows)
+
+
+def card_html(place, i):
+    """One feed card in the markup feed_selectors.yaml expects; every third card shows address and phone."""
+    name = html.escape(place["name"])
+    rating = place["rating"] if pd.notna(place["rating"]) else None
+    rating_html = (
+        f'<span class="e4rVHe fontBodyMedium"><span role="img" aria-label="{rating} stars">'
+        f'<span class="MW4etd">{rating}</span><span class="UY7F9">({100 + i * 37:,})</span></span></span>'
+        if rating else '<span class="e4rVHe fontBodyMedium">No reviews</span>'
+    )
+    first_row = [html.escape(str(place["category"]))]
+    second_row = ["Open 24 hours"]
+    if i % 3 == 0:
+        first_row.append(html.escape(place["full_address"]))
+        if isinstance(place["phone_number"], str):
+            second_row.append(place["phone_number"])
+    elif i % 3 == 1:
+        first_row.append(html.escape(place["street"]))
+
+    def row(parts):
+        spans = [f"<span><span>{parts[0]}</span></span>"] + [
+            f'<span> <span aria-hidden="true">·</span> <span>{part}</span></span>' for part in parts[1:]
+        ]
+        return f'<div class="W4Efsd">{"".join(spans)}</div>'
+
+    return (
+        '<div class="Nv2PK THOPZb CpccDe">'
+        f'<a class="hfpxzc" aria-label="{name}" href="{html.escape(place["href"])}"></a>'
+        '<div class="UaQhfb fontBodyMedium">'
+        f'<div class="NrDZNb"><div class="qBF1Pd fontHeadlineSmall">{name}</div></div>'
+        f'<div class="W4Efsd"><div class="AJB7ye">{rating_html}</div></div>'
+        f'<div class="W4Efsd">{row(first_row)}{row(second_row)}</div>'
+        '</div></div>\n'
+    )
+
+
+def xhr_place(place):
+    """Place entry laid out as maps_xhr.PLACE_FIELDS reads it."""
+    entry = [None] * 179
+    entry[4] = [None] * 7 + [float(place["rating"]) if pd.notna(place["rating"]) else None]
+    entry[9] = [None, None, float(place["latitude"]), float(place["longitude"])]
+    entry[10] = re.search(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", place["href"]).group(1)
+    entry[11] = place["name"]
+    entry[13] = [place["category"]]
+    entry[39] = place["full_address"]
+    entry[178] = [[place["phone_number"]]] if isinstance(place["phone_number"], str) else None
+    return [None] * PLACE_INDEX + [entry]
+
+
+def place_page_html(place):
+    name = html.escape(place["name"])
+    address = html.escape(place["full_address"])
+    phone_html = ""
+    if isinstance(place["phone_number"], str):
+        digits = re.sub(r"\D", "", place["phone_number"])
+        phone_html = (
+            f'<div class="RcCsl"><button class="CsEnBe" data-item-id="phone:tel:{digits}" '
+            f'data-tooltip="Copy phone number" aria-label="Phone: {place["phone_number"]}">'
+            f'<div class="Io6YTe">{place["phone_number"]}</div></button></div>\n'
+        )
+    return (
+        '<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="utf-8">'
+        f'<title>{name} - Google Maps</title></head>\n<body>\n'
+        f'<div role="main" aria-label="{name}">\n'
+        f'<h1 class="DUwDvf lfPIob">{name}</h1>\n'
+        f'<button class="DkEaL">{html.escape(str(place["category"]))}</button>\n'
+        f'<div class="RcCsl"><button class="CsEnBe" data-item-id="address" aria-label="Address: {address}">'
+        f'<div class="Io6YTe">{address}</div></button></div>\n'
+        f'{phone_html}'
+        '</div>\n</body>\n</html>\n'
+    )
+
+
+def write_fixtures(places, cards_per_page, fixtures_dir=FIXTURES_DIR):
+    maps_dir = os.path.join(fixtures_dir, "maps")
+    for sub in ("feed", "search", "place"):
+        shutil.rmtree(os.path.join(maps_dir, sub), ignore_errors=True)
+        os.makedirs(os.path.join(maps_dir, sub))
+
+    for query, group in places.groupby("searched_query", sort=False):
+        slug = slugify(query)
+        os.makedirs(os.path.join(maps_dir, "feed", slug))
+        os.makedirs(os.path.join(maps_dir, "search", slug))
+        records = group.to_dict("records")
+        pages = [records[i:i + cards_per_page] for i in range(0, len(records), cards_per_page)]
+        for n, page in enumerate(pages):
+            with open(os.path.join(maps_dir, "feed", slug, f"page-{n}.html"), "w", encoding="utf-8") as f:
+                f.writelines(card_html(place, n * cards_per_page + i) for i, place in enumerate(page))
+                if n == len(pages) - 1:
+                    f.write(END_OF_LIST_HTML)
+            with open(os.path.join(maps_dir, "search", slug, f"page-{n}.txt"), "w", encoding="utf-8") as f:
+                f.write(XSSI_PREFIX + "\n" + json.dumps([[None, [xhr_place(place) for place in page]]]))
+
+    for place in places.to_dict("records"):
+        cell, feature = place["place_key"].split(":")
+        with open(os.path.join(maps_dir, "place", f"{cell}_{feature}.html"), "w", encoding="utf-8") as f:
+            f.write(place_page_html(place))
+
+    places.to_csv(os.path.join(maps_dir, "places.csv"), index=False)
+    build_centroids(places).to_csv(os.path.join(fixtures_dir, "postcode_centroids.csv"), index=False)
+
+
+if __name__ == "__main__":
+    # Regenerate after changing feed_selectors.yaml or maps_xhr.PLACE_FIELDS (run from google_maps/):
+    # python bench/make_fixtures.py
+    parser = argparse.ArgumentParser(description="Build replay fixtures from data/phase1_results.csv")
+    parser.add_argument("--phase1-results", default="data/phase1_results.csv")
+    parser.add_argument("--places-per-query", type=int, default=40)
+    parser.add_argument("--cards-per-page", type=int, default=10)
+    args = parser.parse_args()
+
+    places = make_places(pd.read_csv(args.phase1_results), args.places_per_query)
+    write_fixtures(places, args.cards_per_page)
+    print(f"✅ {len(places)} places, {places['searched_query'].nunique()} queries → {FIXTURES_DIR}")
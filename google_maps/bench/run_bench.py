@@ -0,0 +1,412 @@
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from multiprocessing import cpu_count
+
+import numpy as np
+import pandas as pd
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GOOGLE_MAPS_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, GOOGLE_MAPS_DIR)
+
+from adaptive import AdaptivePool, AimdController
+from feed_extract import card_to_record, extract_cards_from_html, load_selectors
+from instrumentation import setup_logging, tracer
+from location_index import LocationIndex, extract_info_from_address, resolve_locations
+from make_fixtures import make_places
+from maps_xhr import decode_payload, records_from_payloads
+from place_details import found_details
+from place_key import add_place_key, dedup_listings, unique_places
+from replay_server import ReplayServer
+from spatial_index import SpatialIndex
+
+log = logging.getLogger("bench")
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+LOCATION_DATA_PATH = os.path.join(FIXTURES_DIR, "state_district_postcode_location.json")
+CENTROIDS_PATH = os.path.join(FIXTURES_DIR, "postcode_centroids.csv")
+BENCHMARKS = ["parse", "dedup", "phase3", "phase1", "phase2", "pipeline"]
+
+# Metric suffixes that --compare checks; anything else is informational
+HIGHER_IS_BETTER = ("_per_s", "_per_minute")
+LOWER_IS_BETTER = ("_s",)
+
+
+def best_of(fn, repeat):
+    """(fastest wall time over `repeat` calls, result of the last call)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def read_fixtures(pattern):
+    texts = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, pattern))):
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append(f.read())
+    return texts
+
+
+def fixture_places(base_url=None):
+    places = pd.read_csv(os.path.join(FIXTURES_DIR, "maps", "places.csv"), dtype={"postcode": str})
+    if base_url:
+        places["href"] = places["href"].str.replace("{{BASE_URL}}", base_url, regex=False)
+    return places
+
+
+# ---------- Offline benchmarks (no browser) ----------
+def bench_parse(passes, repeat):
+    """Phase 1 parsing without a browser: saved feed HTML (lxml) and recorded search responses (xhr), `passes` times over."""
+    selectors = load_selectors(os.path.join(GOOGLE_MAPS_DIR, "feed_selectors.yaml"))
+    feed_pages = read_fixtures("maps/feed/*/page-*.html") * passes
+    search_pages = read_fixtures("maps/search/*/page-*.txt") * passes
+    query_tuple = ("bench", "hotel", None, None)
+
+    def parse_feed():
+        return [card_to_record(card, query_tuple) for text in feed_pages for card in extract_cards_from_html(text, selectors)]
+
+    def parse_xhr():
+        return [r for text in search_pages for r in records_from_payloads([decode_payload(text)], query_tuple)]
+
+    feed_s, cards = best_of(parse_feed, repeat)
+    xhr_s, places = best_of(parse_xhr, repeat)
+    return {
+        "parse.feed_html": {
+            "pages": len(feed_pages), "cards": len(cards), "elapsed_s": feed_s,
+            "pages_per_s": len(feed_pages) / feed_s, "cards_per_s": len(cards) / feed_s,
+        },
+        "parse.xhr": {
+            "responses": len(search_pages), "places": len(places), "elapsed_s": xhr_s,
+            "responses_per_s": len(search_pages) / xhr_s, "places_per_s": len(places) / xhr_s,
+        },
+    }
+
+
+def bench_dedup(phase1_results, copies, repeat):
+    """place_key + listing dedup + unique places over phase1_results repeated `copies` times with fresh rclk noise."""
+    frames = []
+    for n in range(copies):
+        df = phase1_results.copy()
+        df["href"] = df["href"].str.replace("rclk=1", f"rclk={n}", regex=False)
+        frames.append(df)
+    listings = pd.concat(frames, ignore_index=True)
+
+    def dedup():
+        deduped = dedup_listings(add_place_key(listings.copy()))
+        return deduped, unique_places(deduped)[0]
+
+    seconds, (deduped, places) = best_of(dedup, repeat)
+    return {
+        "dedup": {
+            "rows": len(listings), "listings": len(deduped), "places": len(places),
+            "elapsed_s": seconds, "rows_per_s": len(listings) / seconds,
+        }
+    }
+
+
+def bench_phase3(phase1_results, rows, repeat, per_row_rows=2000):
+    """
+    Phase 3 over phase1_results places with synthetic addresses (make_fixtures.make_places), resampled to `rows`:
+    address matching only, coordinates first (KD-tree), and the old per-row extract_info_from_address loop.
+    """
+    places = make_places(phase1_results, places_per_query=len(phase1_results))
+    df = places.iloc[np.arange(rows) % len(places)].reset_index(drop=True)
+    index = LocationIndex.from_json(LOCATION_DATA_PATH)
+    spatial_index = SpatialIndex.from_csv(CENTROIDS_PATH)
+
+    results = {}
+    for name, spatial in (("phase3.address", None), ("phase3.coordinates", spatial_index)):
+        seconds, out = best_of(lambda: resolve_locations(df, index, spatial), repeat)
+        results[name] = {
+            "rows": len(df), "resolved": int(out["state"].notna().sum()),
+            "elapsed_s": seconds, "addresses_per_s": len(df) / seconds,
+        }
+
+    sample = df["full_address"].head(per_row_rows)
+    seconds, out = best_of(lambda: [extract_info_from_address(a, index.location_data) for a in sample], 1)
+    results["phase3.per_row"] = {
+        "rows": len(sample), "resolved": sum(r["state"] is not None for r in out),
+        "elapsed_s": seconds, "addresses_per_s": len(sample) / seconds,
+    }
+    return results
+
+
+# ---------- Browser benchmarks (replay server) ----------
+def write_bench_config(work_dir, base_url, places, headless, log_level, pipeline_mode="streaming"):
+    """Copy of google_maps_config.yaml pointed at the replay server, the fixture queries and a scratch data dir."""
+    with open(os.path.join(GOOGLE_MAPS_DIR, "google_maps_config.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+
+    queries = places.drop_duplicates("searched_query")
+    config["google_maps_parameter"]["url"] = f"{base_url}/maps/@1.5054379,103.7636757,15z?hl=en"
+    config["channel_parameter"] = [{"channel": channel} for channel in queries["searched_channel"].unique()]
+    config["place_parameter"] = [
+        {"state": state, "districts": [{"district": district} for district in group["searched_district"]]}
+        for state, group in queries.groupby("searched_state", sort=False)
+    ]
+    config["pipeline_parameter"] = dict(config.get("pipeline_parameter", {}), mode=pipeline_mode)
+    config["browser_parameter"] = dict(config.get("browser_parameter", {}), headless=headless)
+    config["tiling_parameter"] = dict(config.get("tiling_parameter", {}), enabled=False)
+    config["phase1_parameter"] = dict(config.get("phase1_parameter", {}), xhr_record_dir=None)
+    config["cache_parameter"] = dict(config.get("cache_parameter", {}), enabled=False)  # every run visits every place
+    config["storage_parameter"] = dict(
+        config.get("storage_parameter", {}), root=work_dir,
+        export_csv=os.path.join(work_dir, "gm_with_extracted_location.csv"),
+    )
+    config["queue_parameter"] = dict(config.get("queue_parameter", {}), path=os.path.join(work_dir, "work_queue.sqlite"))
+    config["location_parameter"] = dict(
+        config.get("location_parameter", {}), location_data_path=LOCATION_DATA_PATH, centroids_path=CENTROIDS_PATH,
+    )
+    config["instrumentation_parameter"] = {
+        "log_level": log_level,
+        "trace_path": os.path.join(work_dir, "trace.jsonl"),
+        "metrics_path": os.path.join(work_dir, "metrics.prom"),
+    }
+
+    path = os.path.join(work_dir, f"bench_config_{pipeline_mode}.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False, allow_unicode=True)
+    return path
+
+
+def check_browser(headless):
+    """Launch Chromium once, so a missing browser fails here instead of stalling the adaptive pools."""
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        p.chromium.launch(headless=headless).close()
+
+
+def import_scraper(config_path):
+    """main.py reads its config at import time, so point it at the bench config first."""
+    os.environ["GOOGLE_MAPS_CONFIG"] = config_path
+    import main
+    return main
+
+
+def counter_delta(before, after):
+    return {name: value - before.get(name, 0) for name, value in after.items()}
+
+
+def bench_phase1(scraper, extraction_modes):
+    """Phase 1 through the same AdaptivePool as run_batch, once per extraction mode."""
+    jobs = scraper.build_query_jobs()
+    results, records = {}, []
+    for mode in extraction_modes:
+        scraper.phase1_parameter["extraction"] = mode
+        before = tracer.summary()["counters"]
+        started = time.perf_counter()
+        controller = AimdController.from_config("phase1", scraper.adaptive_parameter, min(cpu_count(), 2))
+        pool = AdaptivePool(controller).start()
+        records = [r for batch in pool.imap_unordered(scraper.run_phase1_job, jobs, error_result=[]) for r in batch]
+        pool.close()
+        elapsed = time.perf_counter() - started
+
+        counters = counter_delta(before, tracer.summary()["counters"])
+        pages = counters.get("pages_loaded", 0) + counters.get("scroll_iterations", 0)
+        results[f"phase1.{mode}"] = {
+            "queries": len(jobs), "cards": len(records), "pages": pages, "elapsed_s": elapsed,
+            "pages_per_minute": pages / elapsed * 60, "cards_per_s": len(records) / elapsed,
+        }
+        log.info(f"⏱️ phase1.{mode}: {len(records)} cards from {len(jobs)} queries in {elapsed:.1f}s")
+    return results
+
+
+def bench_phase2(scraper, hrefs):
+    """Phase 2 over every fixture place page, in process mode (AdaptivePool) and async mode."""
+    results = {}
+
+    started = time.perf_counter()
+    controller = AimdController.from_config("phase2", scraper.adaptive_parameter, min(cpu_count(), 8))
+    pool = AdaptivePool(controller, is_ok=found_details).start()
+    details = [d for d in pool.imap_unordered(scraper.extract_location_from_url, hrefs) if d is not None]
+    pool.close()
+    results["phase2.process"] = phase2_metrics(details, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    details = asyncio.run(scraper.run_phase2_async(hrefs, **scraper.async_engine_kwargs()))
+    results["phase2.async"] = phase2_metrics(details, time.perf_counter() - started)
+
+    for name, metrics in results.items():
+        log.info(f"⏱️ {name}: {metrics['pages']} places in {metrics['elapsed_s']:.1f}s")
+    return results
+
+
+def phase2_metrics(details, elapsed):
+    return {
+        "pages": len(details), "found": sum(found_details(d) for d in details), "elapsed_s": elapsed,
+        "pages_per_minute": len(details) / elapsed * 60,
+    }
+
+
+def bench_pipeline(work_dir, base_url, places, headless, log_level, modes):
+    """End to end: `python main.py` against the replay server, once per pipeline mode."""
+    results = {}
+    for mode in modes:
+        mode_dir = os.path.join(work_dir, f"pipeline-{mode}")
+        os.makedirs(mode_dir)
+        config_path = write_bench_config(mode_dir, base_url, places, headless, log_level, mode)
+        env = dict(os.environ, GOOGLE_MAPS_CONFIG=config_path, SCRAPER_RUN_ID=f"bench-{mode}-{uuid.uuid4().hex[:6]}")
+
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, "main.py"], cwd=GOOGLE_MAPS_DIR, env=env)
+        elapsed = time.perf_counter() - started
+
+        output = os.path.join(mode_dir, "gm_with_extracted_location.csv")
+        rows = len(pd.read_csv(output)) if os.path.exists(output) else 0
+        results[f"pipeline.{mode}"] = {
+            "exit_code": completed.returncode, "rows": rows, "elapsed_s": elapsed, "rows_per_s": rows / elapsed,
+        }
+        log.info(f"⏱️ pipeline.{mode}: {rows} rows in {elapsed:.1f}s (exit {completed.returncode})")
+    return results
+
+
+# ---------- Results ----------
+def run_metadata(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=GOOGLE_MAPS_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": cpu_count(),
+        "latency_s": args.latency,
+        "jitter_s": args.jitter,
+        "repeat": args.repeat,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Log every metric against the baseline; returns the regressions beyond tolerance."""
+    regressions = []
+    for name, metrics in results["benchmarks"].items():
+        old_metrics = baseline.get("benchmarks", {}).get(name, {})
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            if metric.endswith(HIGHER_IS_BETTER):
+                regressed = change < -tolerance
+            elif metric.endswith(LOWER_IS_BETTER):
+                regressed = change > tolerance
+            else:
+                continue
+            marker = "❌" if regressed else "✅"
+            log.info(f"{marker} {name}.{metric}: {old:.4g} → {value:.4g} ({change:+.1%})")
+            if regressed:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+
+def run(args):
+    selected = args.only.split(",") if args.only else BENCHMARKS
+    work_dir = tempfile.mkdtemp(prefix="gm-bench-")
+    tracer.configure("google_maps_bench", trace_path=os.path.join(work_dir, "trace.jsonl"))
+    phase1_results = pd.read_csv(args.phase1_results)
+    benchmarks = {}
+
+    def attempt(name, fn):
+        if name not in selected:
+            return
+        log.info(f"🏁 {name}")
+        try:
+            benchmarks.update(fn())
+        except Exception as e:
+            log.error(f"❌ {name} failed: {e}")
+            benchmarks[name] = {"error": repr(e)[:500]}
+
+    attempt("parse", lambda: bench_parse(args.parse_passes, args.repeat))
+    attempt("dedup", lambda: bench_dedup(phase1_results, args.dedup_copies, args.repeat))
+    attempt("phase3", lambda: bench_phase3(phase1_results, args.phase3_rows, args.repeat))
+
+    browser_benchmarks = [name for name in ("phase1", "phase2", "pipeline") if name in selected]
+    if browser_benchmarks:
+        try:
+            check_browser(not args.headed)
+        except Exception as e:
+            log.error(f"❌ No usable Chromium, skipping {', '.join(browser_benchmarks)}: {str(e).splitlines()[0]}")
+            benchmarks.update({name: {"error": "browser unavailable"} for name in browser_benchmarks})
+            browser_benchmarks = []
+
+    if browser_benchmarks:
+        with ReplayServer(FIXTURES_DIR, args.latency, args.jitter) as server:
+            places = fixture_places()
+            config_path = write_bench_config(work_dir, server.base_url, places, not args.headed, args.log_level)
+            if {"phase1", "phase2"} & set(selected):
+                scraper = import_scraper(config_path)
+                attempt("phase1", lambda: bench_phase1(scraper, args.extraction.split(",")))
+                attempt("phase2", lambda: bench_phase2(scraper, fixture_places(server.base_url)["href"].tolist()))
+            attempt("pipeline", lambda: bench_pipeline(
+                work_dir, server.base_url, places, not args.headed, args.log_level, args.pipeline_modes.split(",")
+            ))
+            log.info(f"🔁 Replay server: {server.stats}")
+
+    results = {"meta": run_metadata(args), "benchmarks": benchmarks, "stages": tracer.summary()["stages"]}
+    if args.keep_work:
+        log.info(f"📂 Work dir kept at {work_dir}")
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    # Run from google_maps/:
+    #   python bench/run_bench.py                                   # everything (browser benches need Chromium)
+    #   python bench/run_bench.py --only parse,dedup,phase3         # offline only
+    #   python bench/run_bench.py --compare bench/results/baseline.json
+    parser = argparse.ArgumentParser(description="Offline Google Maps scraper benchmarks against recorded fixtures")
+    parser.add_argument("--only", help=f"comma-separated subset of {','.join(BENCHMARKS)}")
+    parser.add_argument("--latency", type=float, default=0.1, help="replay server delay per response (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="extra random replay delay, up to this (s)")
+    parser.add_argument("--repeat", type=int, default=5, help="offline benchmarks keep the fastest of this many runs")
+    parser.add_argument("--phase1-results", default=os.path.join(GOOGLE_MAPS_DIR, "data", "phase1_results.csv"))
+    parser.add_argument("--parse-passes", type=int, default=20, help="times every fixture page is parsed per run")
+    parser.add_argument("--dedup-copies", type=int, default=200, help="times phase1_results is repeated for dedup")
+    parser.add_argument("--phase3-rows", type=int, default=20000, help="rows resolved by the Phase 3 benchmark")
+    parser.add_argument("--extraction", default="evaluate,html,xhr", help="Phase 1 extraction modes to time")
+    parser.add_argument("--pipeline-modes", default="streaming,batch", help="main.py pipeline modes to time end to end")
+    parser.add_argument("--headed", action="store_true", help="show the browsers")
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--output", help="results JSON (default bench/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="relative change treated as a regression")
+    parser.add_argument("--keep-work", action="store_true", help="keep the scratch data dir")
+    args = parser.parse_args()
+
+    setup_logging(args.log_level)
+    os.chdir(GOOGLE_MAPS_DIR)  # main.py and feed_selectors.yaml use paths relative to google_maps/
+    results = run(args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+    log.info(f"✅ Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            log.error(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
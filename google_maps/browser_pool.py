@@ -0,0 +1,97 @@
+import logging
+import psutil
+
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+
+log = logging.getLogger(__name__)
+
+
+def process_tree_rss_mb():
+    """Resident memory (MB) of this worker plus its Playwright driver and browser children."""
+    proc = psutil.Process()
+    total = 0
+    for p in [proc] + proc.children(recursive=True):
+        try:
+            total += p.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """
+    Keeps one long-lived browser per worker process:
+    - hands out a fresh context + page per job
+    - recycles the browser after max_jobs jobs or when RSS passes max_rss_mb
+    - replaces the browser if it crashed or disconnected
+    """
+
+    def __init__(self, setup_fn, max_jobs=50, max_rss_mb=1500):
+        self.setup_fn = setup_fn
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.playwright = None
+        self.browser = None
+        self.jobs = 0
+
+    def start(self):
+        if self.playwright is None:
+            self.playwright = sync_playwright().start()
+        return self
+
+    def _launch(self):
+        self.start()
+        browser, context, page = self.setup_fn(self.playwright)
+        page.close()
+        context.close()
+        self.browser = browser
+        self.jobs = 0
+        log.info("🚀 Browser launched")
+
+    def _close_browser(self):
+        if self.browser is not None:
+            try:
+                self.browser.close()
+            except Exception as e:
+                log.warning(f"⚠️ Error closing browser: {e}")
+        self.browser = None
+
+    def _needs_recycle(self):
+        if self.browser is None or not self.browser.is_connected():
+            return True
+        if self.max_jobs and self.jobs >= self.max_jobs:
+            log.info(f"♻️ Recycling browser after {self.jobs} jobs")
+            return True
+        if self.max_rss_mb:
+            rss = process_tree_rss_mb()
+            if rss > self.max_rss_mb:
+                log.info(f"♻️ Recycling browser at {rss:.0f} MB RSS")
+                return True
+        return False
+
+    @contextmanager
+    def page(self):
+        """Yield a fresh page in its own context; the context is closed afterwards."""
+        if self._needs_recycle():
+            self._close_browser()
+            self._launch()
+
+        _, context, page = self.setup_fn(self.playwright, self.browser)
+        try:
+            yield page
+        finally:
+            self.jobs += 1
+            try:
+                context.close()
+            except Exception as e:
+                log.warning(f"⚠️ Error closing context: {e}")
+            if not self.browser.is_connected():
+                log.error("💥 Browser crashed — will relaunch on next job")
+                self.browser = None
+
+    def close(self):
+        self._close_browser()
+        if self.playwright is not None:
+            self.playwright.stop()
+            self.playwright = None
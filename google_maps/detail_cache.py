@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import time
+
+MISSING = (None, "-")
+
+
+class DetailCache:
+    """
+    On-disk cache of Phase 2 results keyed by place_key:
+    - address and phone each expire after their own TTL
+    - lookups that found neither are cached negatively with a shorter TTL
+    - a refresh that misses one field keeps the previously known value (and its timestamp)
+    - beyond max_entries the least recently used entries are evicted
+    """
+
+    def __init__(self, path, address_ttl_days=90, phone_ttl_days=30, negative_ttl_hours=12, max_entries=500_000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS place_details (
+                place_key TEXT PRIMARY KEY,
+                href TEXT,
+                full_address TEXT,
+                address_fetched_at REAL,
+                phone_number TEXT,
+                phone_fetched_at REAL,
+                failed_at REAL,
+                last_access REAL
+            )
+        """)
+        self.conn.commit()
+        self.address_ttl = address_ttl_days * 86400
+        self.phone_ttl = phone_ttl_days * 86400
+        self.negative_ttl = negative_ttl_hours * 3600
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "negative_hits": 0, "stale": 0, "misses": 0, "writes": 0, "evicted": 0}
+
+    @classmethod
+    def from_config(cls, params):
+        return cls(
+            params.get("path", "data/place_details_cache.sqlite"),
+            address_ttl_days=params.get("address_ttl_days", 90),
+            phone_ttl_days=params.get("phone_ttl_days", 30),
+            negative_ttl_hours=params.get("negative_ttl_hours", 12),
+            max_entries=params.get("max_entries", 500_000),
+        )
+
+    def get(self, key):
+        """(full_address, phone_number) if every known field is fresh, else None (miss or stale)."""
+        row = self.conn.execute(
+            "SELECT full_address, address_fetched_at, phone_number, phone_fetched_at, failed_at "
+            "FROM place_details WHERE place_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+
+        address, address_at, phone_number, phone_at, failed_at = row
+        now = time.time()
+        if failed_at is not None:
+            fresh = now - failed_at < self.negative_ttl
+        else:
+            fresh = (address_at is None or now - address_at < self.address_ttl) and \
+                    (phone_at is None or now - phone_at < self.phone_ttl)
+        if not fresh:
+            self.stats["stale"] += 1
+            return None
+
+        self.stats["negative_hits" if failed_at is not None else "hits"] += 1
+        self.conn.execute("UPDATE place_details SET last_access = ? WHERE place_key = ?", (now, key))
+        # A failed refresh still serves whatever was known before it
+        return (address or "-", phone_number or "-")
+
+    def put(self, key, href, full_address, phone_number):
+        now = time.time()
+        found_address = full_address not in MISSING
+        found_phone = phone_number not in MISSING
+        if not found_address and not found_phone:
+            # Negative entry; keep any previously known values for when it expires
+            self.conn.execute("""
+                INSERT INTO place_details (place_key, href, failed_at, last_access) VALUES (?, ?, ?, ?)
+                ON CONFLICT(place_key) DO UPDATE SET href = excluded.href, failed_at = excluded.failed_at,
+                    last_access = excluded.last_access
+            """, (key, href, now, now))
+        else:
+            self.conn.execute("""
+                INSERT INTO place_details
+                    (place_key, href, full_address, address_fetched_at, phone_number, phone_fetched_at, failed_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, NULL, ?)
+                ON CONFLICT(place_key) DO UPDATE SET
+                    href = excluded.href,
+                    full_address = COALESCE(excluded.full_address, full_address),
+                    address_fetched_at = COALESCE(excluded.address_fetched_at, address_fetched_at),
+                    phone_number = COALESCE(excluded.phone_number, phone_number),
+                    phone_fetched_at = COALESCE(excluded.phone_fetched_at, phone_fetched_at),
+                    failed_at = NULL,
+                    last_access = excluded.last_access
+            """, (
+                key, href,
+                full_address if found_address else None, now if found_address else None,
+                phone_number if found_phone else None, now if found_phone else None,
+                now,
+            ))
+        self.conn.commit()
+        self.stats["writes"] += 1
+
+    def evict(self):
+        """Drop least recently used entries beyond max_entries."""
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM place_details").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute("""
+                DELETE FROM place_details WHERE place_key IN (
+                    SELECT place_key FROM place_details ORDER BY last_access ASC LIMIT ?
+                )
+            """, (excess,))
+            self.stats["evicted"] += excess
+        self.conn.commit()
+
+    def summary(self):
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["stale"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] + self.stats["negative_hits"]) / lookups if lookups else 0.0
+        return (f"{self.stats['hits']} hits, {self.stats['negative_hits']} negative hits, "
+                f"{self.stats['stale']} stale, {self.stats['misses']} misses ({hit_rate:.0%} hit rate), "
+                f"{self.stats['writes']} writes, {self.stats['evicted']} evicted")
+
+    def close(self):
+        self.evict()
+        self.conn.close()
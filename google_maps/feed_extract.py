@@ -0,0 +1,205 @@
+import json
+import logging
+import re
+import sys
+
+import numpy as np
+import yaml
+from cssselect import GenericTranslator
+from lxml import etree
+from lxml import html as lxml_html
+
+from place_key import place_key
+
+log = logging.getLogger(__name__)
+
+# One round-trip: every card in the feed comes back as a compact dict.
+# info_spans mirrors the old BeautifulSoup walk: spans of the first info_row nested in the second info_row.
+# info_rows is the text of every innermost info_row ("Hotel · 12, Jalan ...", "Open 24 hours · 07-222 2222").
+FEED_EXTRACT_JS = """
+(sel) => Array.from(document.querySelectorAll(sel.card)).map(card => {
+    const text = el => el ? el.textContent.trim() : null;
+    const link = card.querySelector(sel.link);
+    let info_spans = null;
+    const info = card.querySelector(sel.info);
+    if (info) {
+        const rows = info.querySelectorAll(sel.info_row);
+        if (rows.length > 1) {
+            const inner = rows[1].querySelectorAll(sel.info_row);
+            if (inner.length) {
+                info_spans = Array.from(inner[0].querySelectorAll('span')).map(s => s.textContent.trim());
+            }
+        }
+    }
+    const info_rows = info
+        ? Array.from(info.querySelectorAll(sel.info_row)).filter(r => !r.querySelector(sel.info_row)).map(text)
+        : [];
+    return {
+        href: link ? link.getAttribute('href') : null,
+        name: text(card.querySelector(sel.name)),
+        rating: text(card.querySelector(sel.rating)),
+        info_spans: info_spans,
+        info_rows: info_rows,
+    };
+})
+"""
+
+
+# Card info-row parts, see parse_card_fields
+RATING_ROW_RE = re.compile(r"^(\d[.,]\d\s*\(|no reviews)", re.IGNORECASE)
+OPEN_STATUS_RE = re.compile(r"^(open|opens|closed|closes|temporarily closed|permanently closed)\b", re.IGNORECASE)
+PHONE_LIKE_RE = re.compile(r"^\+?[\d\s()-]+$")
+MY_PHONE_RE = re.compile(r"^(\+?60[-\s]?|0)\d{1,2}[-\s]?\d{3,4}[-\s]?\d{3,4}$")
+ADDRESS_HINT_RE = re.compile(
+    r"\d|\b(jalan|jln|lorong|lrg|persiaran|lebuh|lebuhraya|taman|tmn|kampung|kg|bandar|lot|no)\b", re.IGNORECASE
+)
+POSTCODE_RE = re.compile(r"\b\d{5}\b")
+
+
+def load_selectors(path="feed_selectors.yaml", version=None):
+    """Selector dict for `version` (defaults to the table's active_version)."""
+    with open(path, "r") as f:
+        table = yaml.safe_load(f)
+    version = version or table["active_version"]
+    selectors = dict(table["versions"][version])
+    selectors["version"] = version
+    return selectors
+
+
+def extract_coords_from_url(url):
+    try:
+        match = re.search(r'!3d([-.\d]+)!4d([-.\d]+)', url)
+        if match:
+            lat = float(match.group(1))
+            lon = float(match.group(2))
+            return lat, lon
+        else:
+            log.warning(f"⚠️ Coordinates not found in URL: {url}")
+            return None, None
+    except Exception as e:
+        log.error(f"❌ Error parsing coordinates: {e}")
+        return None, None
+
+
+def parse_rating(text):
+    text = (text or "").strip()
+    return float(text) if text.replace(".", "", 1).isdigit() else np.nan
+
+
+def parse_card_fields(info_rows):
+    """
+    Address fragment, phone and open status from a card's info rows, each with a confidence:
+    - "high": usable as is (phone in a Malaysian format, address with a postcode)
+    - "low": looks like the field but may be partial (street fragment, odd phone format)
+    - None: not on the card
+    The first part of the first row that is not the rating row is the category, so it is skipped.
+    """
+    fields = {
+        "card_address": None, "address_confidence": None,
+        "card_phone": None, "phone_confidence": None,
+        "open_status": None,
+    }
+    category_skipped = False
+    for row in info_rows or []:
+        parts = [p.strip() for p in (row or "").split("·") if p.strip()]
+        if not parts or RATING_ROW_RE.match(parts[0]):
+            continue
+        if not category_skipped:
+            parts = parts[1:]
+            category_skipped = True
+        for part in parts:
+            digits = re.sub(r"\D", "", part)
+            if fields["open_status"] is None and OPEN_STATUS_RE.match(part):
+                fields["open_status"] = part
+            elif fields["card_phone"] is None and PHONE_LIKE_RE.match(part) and len(digits) >= 7:
+                fields["card_phone"] = re.sub(r"[^+\d]", "", part)
+                fields["phone_confidence"] = "high" if MY_PHONE_RE.match(part) else "low"
+            elif fields["card_address"] is None and ADDRESS_HINT_RE.search(part):
+                fields["card_address"] = part
+                fields["address_confidence"] = "high" if POSTCODE_RE.search(part) else "low"
+    return fields
+
+
+def extract_cards_from_page(page, selectors):
+    """Raw card dicts straight from the live DOM via a single page.evaluate."""
+    return page.evaluate(FEED_EXTRACT_JS, selectors)
+
+
+def _compile_css(css):
+    # descendant:: (not lxml's default descendant-or-self::) so a card/row never matches itself,
+    # same as querySelectorAll in the browser
+    return etree.XPath(GenericTranslator().css_to_xpath(css, prefix="descendant::"))
+
+
+def extract_cards_from_html(html_text, selectors):
+    """Offline equivalent of extract_cards_from_page for saved HTML (lxml, compiled XPath)."""
+    tree = lxml_html.fromstring(html_text)
+    select = {key: _compile_css(selectors[key]) for key in ("card", "link", "name", "rating", "info", "info_row")}
+    select_spans = _compile_css("span")
+    cards = []
+
+    def text(elements):
+        return elements[0].text_content().strip() if elements else None
+
+    for card in select["card"](tree):
+        link = select["link"](card)
+        info_spans = None
+        info_rows = []
+        info = select["info"](card)
+        if info:
+            rows = select["info_row"](info[0])
+            if len(rows) > 1:
+                inner = select["info_row"](rows[1])
+                if inner:
+                    info_spans = [s.text_content().strip() for s in select_spans(inner[0])]
+            info_rows = [text([row]) for row in rows if not select["info_row"](row)]
+        cards.append({
+            "href": link[0].get("href") if link else None,
+            "name": text(select["name"](card)),
+            "rating": text(select["rating"](card)),
+            "info_spans": info_spans,
+            "info_rows": info_rows,
+        })
+    return cards
+
+
+def card_to_record(card, query_tuple):
+    """Turn a raw card dict into the Phase 1 record schema."""
+    query, channel, district, state = query_tuple
+    href = card.get("href") or np.nan
+    name = card.get("name") or np.nan
+
+    filtered_spans = [s for s in (card.get("info_spans") or []) if s and "·" not in s]
+    category = filtered_spans[0] if filtered_spans else np.nan
+
+    latitude, longitude = None, None
+    if isinstance(href, str):
+        latitude, longitude = extract_coords_from_url(href)
+
+    fields = parse_card_fields(card.get("info_rows"))
+
+    return {
+        "searched_query": query,
+        "searched_channel": channel,
+        "searched_district": district,
+        "searched_state": state,
+        "name": name,
+        "href": href,
+        "rating": parse_rating(card.get("rating")),
+        "category": category,
+        "latitude": latitude,
+        "longitude": longitude,
+        "place_key": place_key(href, name, latitude, longitude),
+        # Whatever contact details the card shows; Phase 2 fills in what is missing or low-confidence
+        "full_address": fields["card_address"],
+        "address_confidence": fields["address_confidence"],
+        "phone_number": fields["card_phone"],
+        "phone_confidence": fields["phone_confidence"],
+        "open_status": fields["open_status"],
+    }
+
+
+if __name__ == "__main__":
+    # Offline parse of a saved results page: python feed_extract.py saved_feed.html
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        print(json.dumps(extract_cards_from_html(f.read(), load_selectors()), ensure_ascii=False, indent=2))
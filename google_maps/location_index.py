@@ -0,0 +1,263 @@
+import json
+import re
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import process, fuzz
+
+from instrumentation import tracer
+
+LOCATION_COLUMNS = ["postcode", "state", "district", "area"]
+TIOMAN = {"postcode": "86800", "state": "pahang", "district": "rompin", "area": "pulau tioman"}
+
+POSTCODE_RE = re.compile(r"\d{5}")
+
+
+def clean_address(address):
+    if not isinstance(address, str):
+        return address
+    address = address.lower()
+    address = re.sub(r',+', ',', address)
+    address = re.sub(r'\s+', ' ', address)
+    return address.strip()
+
+
+def detect_postcode(address):
+    """Last 5-digit group in a cleaned address, or None."""
+    matches = POSTCODE_RE.findall(address)
+    return matches[-1] if matches else None
+
+
+def is_tioman(address):
+    return any(x in address for x in ["pulau tioman", "tioman island"]) or (
+        "pahang" in address and "mersing" in address
+    )
+
+
+def fuzzy_find(text, choices, threshold=85):
+    """Helper function for fuzzy matching."""
+    if not choices:
+        return None
+    result = process.extractOne(text, choices, scorer=fuzz.partial_ratio)
+    if result:
+        match, score, _ = result
+        return match if score >= threshold else None
+    return None
+
+
+def extract_info_from_address(address, location_data, threshold=85):
+    if not isinstance(address, str):
+        return {"postcode": None, "state": None, "district": None, "area": None}
+
+    address = clean_address(address)
+    detected_postcode = detect_postcode(address)
+
+    # Special case: Tioman
+    if is_tioman(address):
+        return dict(TIOMAN)
+
+    # Direct postcode lookup
+    if detected_postcode:
+        for state, districts in location_data.items():
+            for district, postcodes in districts.items():
+                if detected_postcode in postcodes:
+                    area = fuzzy_find(address, postcodes[detected_postcode]["locations"].get("area", []), threshold)
+                    return {"postcode": detected_postcode, "state": state, "district": district, "area": area}
+
+    # State → District → Postcode
+    state = fuzzy_find(address, location_data.keys(), threshold)
+    if state:
+        district = fuzzy_find(address, location_data[state].keys(), threshold)
+        if district:
+            for pc, entry in location_data[state][district].items():
+                area = fuzzy_find(address, entry["locations"].get("area", []), threshold)
+                if (detected_postcode and detected_postcode == pc) or area:
+                    return {"postcode": detected_postcode or pc, "state": state, "district": district, "area": area}
+            return {"postcode": detected_postcode, "state": state, "district": district, "area": None}
+        return {"postcode": detected_postcode, "state": state, "district": None, "area": None}
+
+    # District → State → Postcode
+    all_districts = {district: state for state, districts in location_data.items() for district in districts}
+    district = fuzzy_find(address, all_districts.keys(), threshold)
+    if district:
+        state = all_districts[district]
+        for pc, entry in location_data[state][district].items():
+            area = fuzzy_find(address, entry["locations"].get("area", []), threshold)
+            if (detected_postcode and detected_postcode == pc) or area:
+                return {"postcode": detected_postcode or pc, "state": state, "district": district, "area": area}
+        return {"postcode": detected_postcode, "state": state, "district": district, "area": None}
+
+    # 4️⃣ No match at all
+    return {"postcode": detected_postcode, "state": None, "district": None, "area": None}
+
+
+class LocationIndex:
+    """
+    Lookup tables built once from state_district_postcode_location.json:
+    - postcodes: postcode -> (state, district, areas), first occurrence wins as in the nested scan
+    - states / districts_by_state / all_districts: choice arrays for fuzzy matching
+    - postcodes_by_district: (state, district) -> [(postcode, areas), ...] in file order
+    """
+
+    def __init__(self, location_data):
+        self.location_data = location_data
+        self.postcodes = {}
+        self.postcodes_by_district = {}
+        self.districts_by_state = {}
+
+        for state, districts in location_data.items():
+            self.districts_by_state[state] = np.array(list(districts.keys()), dtype=object)
+            for district, postcodes in districts.items():
+                entries = []
+                for pc, entry in postcodes.items():
+                    areas = np.array(entry["locations"].get("area", []), dtype=object)
+                    self.postcodes.setdefault(pc, (state, district, areas))
+                    entries.append((pc, areas))
+                self.postcodes_by_district[(state, district)] = entries
+
+        self.states = np.array(list(location_data.keys()), dtype=object)
+        # Same overwrite semantics as the per-row dict: a district name shared by states maps to the last one
+        self.all_districts = {district: state for state, districts in location_data.items() for district in districts}
+        self.district_names = np.array(list(self.all_districts.keys()), dtype=object)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+
+def match_many(texts, choices, threshold=85, workers=-1):
+    """
+    Vectorised fuzzy_find: best partial_ratio choice per text via one rapidfuzz cdist call.
+    argmax keeps the first best choice, matching extractOne's tie-breaking.
+    """
+    if len(choices) == 0 or len(texts) == 0:
+        return np.full(len(texts), None, dtype=object)
+    if len(texts) * len(choices) < 10_000:
+        workers = 1  # thread start-up costs more than it saves on tiny matrices
+    scores = process.cdist(texts, choices, scorer=fuzz.partial_ratio, dtype=np.float64, workers=workers)
+    best = scores.argmax(axis=1)
+    best_score = scores[np.arange(len(texts)), best]
+    return np.where(best_score >= threshold, choices[best], None)
+
+
+def _group_positions(keys):
+    groups = {}
+    for pos, key in enumerate(keys):
+        groups.setdefault(key, []).append(pos)
+    return groups.items()
+
+
+def resolve_addresses(addresses, index, threshold=85, workers=-1):
+    """
+    Batch version of extract_info_from_address over a whole column.
+    Returns a DataFrame with postcode/state/district/area aligned to the input index,
+    identical to applying extract_info_from_address row by row.
+    """
+    addresses = pd.Series(addresses)
+    n = len(addresses)
+    out = {col: np.full(n, None, dtype=object) for col in LOCATION_COLUMNS}
+
+    raw = addresses.to_numpy(dtype=object)
+    rows = np.array([i for i in range(n) if isinstance(raw[i], str)], dtype=np.int64)
+    texts = np.array([clean_address(raw[i]) for i in rows], dtype=object)
+    detected = np.array([detect_postcode(t) for t in texts], dtype=object)
+
+    def assign(positions, **values):
+        for col, value in values.items():
+            out[col][rows[positions]] = value
+
+    def resolve_in_district(positions, state, district):
+        remaining = np.asarray(positions)
+        for pc, areas in index.postcodes_by_district[(state, district)]:
+            if len(remaining) == 0:
+                break
+            area = match_many(texts[remaining], areas, threshold, workers)
+            hit = (area != None) | (detected[remaining] == pc)  # noqa: E711
+            hit_pos = remaining[hit]
+            assign(hit_pos, state=state, district=district, area=area[hit])
+            out["postcode"][rows[hit_pos]] = [d or pc for d in detected[hit_pos]]
+            remaining = remaining[~hit]
+        assign(remaining, postcode=detected[remaining], state=state, district=district)
+
+    # Special case: Tioman
+    tioman = np.array([is_tioman(t) for t in texts], dtype=bool)
+    tioman_pos = np.flatnonzero(tioman)
+    assign(tioman_pos, **TIOMAN)
+
+    # Direct postcode lookup, one cdist per postcode group
+    known = np.array([not tioman[i] and detected[i] in index.postcodes for i in range(len(rows))], dtype=bool)
+    for pc, positions in _group_positions(detected[known]):
+        positions = np.flatnonzero(known)[positions]
+        state, district, areas = index.postcodes[pc]
+        assign(positions, postcode=pc, state=state, district=district,
+               area=match_many(texts[positions], areas, threshold, workers))
+
+    # State → District → Postcode
+    rest = np.flatnonzero(~tioman & ~known)
+    states = match_many(texts[rest], index.states, threshold, workers)
+    for state, positions in _group_positions(states):
+        positions = rest[positions]
+        if state is None:
+            continue
+        districts = match_many(texts[positions], index.districts_by_state[state], threshold, workers)
+        for district, sub in _group_positions(districts):
+            sub = positions[sub]
+            if district is None:
+                assign(sub, postcode=detected[sub], state=state)
+            else:
+                resolve_in_district(sub, state, district)
+
+    # District → State → Postcode
+    rest = rest[states == None]  # noqa: E711
+    districts = match_many(texts[rest], index.district_names, threshold, workers)
+    for district, positions in _group_positions(districts):
+        positions = rest[positions]
+        if district is None:
+            # No match at all
+            assign(positions, postcode=detected[positions])
+        else:
+            resolve_in_district(positions, index.all_districts[district], district)
+
+    return pd.DataFrame(out, index=addresses.index, columns=LOCATION_COLUMNS)
+
+
+def resolve_locations(df, index, spatial_index=None, threshold=85, workers=-1):
+    """
+    Phase 3 for a frame with full_address/latitude/longitude, aligned to df's index:
+    - with a spatial_index, rows whose coordinates are near a centroid take its location,
+      unless the address names a different postcode
+    - rows without coordinates, too far from any centroid or in disagreement go through resolve_addresses
+      (and keep the spatial answer if the text finds nothing)
+    location_source records which method answered ("coordinates" / "address").
+    """
+    with tracer.span("phase3.resolve", rows=len(df)) as span:
+        out = _resolve_locations(df, index, spatial_index, threshold, workers)
+        span["from_coordinates"] = int((out["location_source"] == "coordinates").sum())
+    tracer.count("addresses_resolved", len(df))
+    return out
+
+
+def _resolve_locations(df, index, spatial_index, threshold, workers):
+    if spatial_index is None:
+        out = resolve_addresses(df["full_address"], index, threshold, workers)
+        out["location_source"] = np.where(out["state"].notna(), "address", None)
+        return out
+
+    spatial = spatial_index.lookup(df["latitude"], df["longitude"]).set_index(df.index)
+    detected = [detect_postcode(clean_address(a)) if isinstance(a, str) else None for a in df["full_address"]]
+    agree = spatial["postcode"].notna() & np.array(
+        [d is None or d == pc for d, pc in zip(detected, spatial["postcode"])], dtype=bool
+    )
+
+    out = spatial[LOCATION_COLUMNS].copy()
+    out["location_source"] = np.where(agree, "coordinates", None)
+    rest = ~agree
+    if rest.any():
+        text = resolve_addresses(df.loc[rest, "full_address"], index, threshold, workers)
+        found = text["state"].notna()
+        use_text = text.index[found | spatial.loc[rest, "state"].isna()]
+        out.loc[use_text, LOCATION_COLUMNS] = text.loc[use_text, LOCATION_COLUMNS]
+        out.loc[text.index[found], "location_source"] = "address"
+        out.loc[text.index[~found & spatial.loc[rest, "state"].notna()], "location_source"] = "coordinates"
+    return out
@@ -1,36 +1,92 @@
 import pandas as pd
-import numpy as np
 import yaml
 import time
-import re
+import os
 import json
+import socket
+import asyncio
+import logging
 
 
-from rapidfuzz import process, fuzz
-from bs4 import BeautifulSoup as bs
 from multiprocessing import Pool, cpu_count
-from playwright.sync_api import sync_playwright
+from multiprocessing.util import Finalize
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
-from functools import partial
-import sqlalchemy as sa
+
+from adaptive import AdaptivePool, AimdController
+from browser_pool import BrowserPool
+from detail_cache import DetailCache
+from instrumentation import setup_logging, tracer
+from feed_extract import card_to_record, extract_cards_from_html, extract_cards_from_page, load_selectors
+from place_details import (
+    ADDRESS_BUTTON_SELECTOR, PHONE_BUTTON_SELECTOR, PLACE_DETAILS_SELECTOR, found_details, known_details, merge_details,
+    parse_address_label, parse_phone_label
+)
+from phase2_async import run_phase2_async
+from place_key import add_place_key, dedup_listings, unique_places
+from pipeline import AsyncDetailExecutor, ProcessDetailExecutor, run_streaming_pipeline
+from location_index import LocationIndex, resolve_locations
+from maps_xhr import SearchResponseCapture
+from network_policy import NetworkPolicy
+from readiness import poll_until, wait_for_any, wait_for_selector, wait_for_network_idle
+from spatial_index import SpatialIndex
+from storage import store_from_config
+from tiling import Tile, grid, subdivide, tile_url
+from warehouse import BulkLoader
+from work_queue import WorkQueue
+
+log = logging.getLogger(__name__)
 
 # ---------- Load Config ----------
-with open("google_maps_config.yaml", "r") as file:
+# GOOGLE_MAPS_CONFIG points at an alternative config, e.g. the one bench/run_bench.py writes for the replay server
+with open(os.environ.get("GOOGLE_MAPS_CONFIG", "google_maps_config.yaml"), "r") as file:
     config = yaml.safe_load(file)
 
 place_parameter = config["place_parameter"]
 channel_parameter = config["channel_parameter"]
 google_maps_parameter = config["google_maps_parameter"]
+browser_parameter = config.get("browser_parameter", {})
+phase2_parameter = config.get("phase2_parameter", {})
+readiness_parameter = config.get("readiness_parameter", {})
+network_parameter = config.get("network_parameter", {})
+phase1_parameter = config.get("phase1_parameter", {})
+pipeline_parameter = config.get("pipeline_parameter", {})
+cache_parameter = config.get("cache_parameter", {})
+warehouse_parameter = config.get("warehouse_parameter", {})
+storage_parameter = config.get("storage_parameter", {})
+tiling_parameter = config.get("tiling_parameter", {})
+location_parameter = config.get("location_parameter", {})
+queue_parameter = config.get("queue_parameter", {})
+adaptive_parameter = config.get("adaptive_parameter", {})
+instrumentation_parameter = config.get("instrumentation_parameter", {})
+
+setup_logging(instrumentation_parameter.get("log_level", "INFO"))
+tracer.configure(
+    "google_maps",
+    trace_path=instrumentation_parameter.get("trace_path"),
+    metrics_path=instrumentation_parameter.get("metrics_path"),
+)
+
+feed_selectors = load_selectors("feed_selectors.yaml", phase1_parameter.get("selector_version"))
 
 
 # ---------- Set Variable ----------
 google_maps_url = google_maps_parameter["url"]
 
+FEED_SELECTOR = feed_selectors["feed"]
+
+network_policy = NetworkPolicy.from_config(network_parameter)
+store = store_from_config(storage_parameter)
+
+search_results_timeout = readiness_parameter.get("search_results_timeout", 10)
+scroll_step_timeout = readiness_parameter.get("scroll_step_timeout", 4)
+scroll_max_stalls = readiness_parameter.get("scroll_max_stalls", 1)
+place_timeout = readiness_parameter.get("place_timeout", 10)
+network_idle_timeout = readiness_parameter.get("network_idle_timeout", 3)
+
 
 # ---------- Set Browser ----------
-def set_playwright_browser(p):
-    browser = p.chromium.launch(
-    headless=False,
+BROWSER_LAUNCH_OPTIONS = dict(
+    headless=browser_parameter.get("headless", False),
     args=[
         "--disable-blink-features=AutomationControlled",
         "--no-sandbox",
@@ -42,324 +98,331 @@ def set_playwright_browser(p):
         "--disable-save-password-bubble"
     ])
 
-    context = browser.new_context(
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/120.0.0.0 Safari/537.36",
-        viewport={"width": 1920, "height": 1080},
-        java_script_enabled=True,
-        ignore_https_errors=True,
-    )
+BROWSER_CONTEXT_OPTIONS = dict(
+    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                "AppleWebKit/537.36 (KHTML, like Gecko) "
+                "Chrome/120.0.0.0 Safari/537.36",
+    viewport={"width": 1920, "height": 1080},
+    java_script_enabled=True,
+    ignore_https_errors=True,
+)
+
+
+def count_response_bytes(response):
+    # Content-Length is absent for chunked responses, so this slightly undercounts
+    tracer.count("bytes_received", int(response.headers.get("content-length") or 0))
+
+
+def set_playwright_browser(p, browser=None):
+    if browser is None:
+        browser = p.chromium.launch(**BROWSER_LAUNCH_OPTIONS)
+
+    context = browser.new_context(**BROWSER_CONTEXT_OPTIONS)
+    network_policy.attach(context)
     page = context.new_page()
+    page.on("response", count_response_bytes)
+
+    return browser, context, page
+
+
+async def set_async_playwright_browser(p, browser=None):
+    """async_playwright counterpart of set_playwright_browser (used by the async Phase 2 engine)."""
+    if browser is None:
+        browser = await p.chromium.launch(**BROWSER_LAUNCH_OPTIONS)
+
+    context = await browser.new_context(**BROWSER_CONTEXT_OPTIONS)
+    await network_policy.attach_async(context)
+    page = await context.new_page()
+    page.on("response", count_response_bytes)
 
     return browser, context, page
 
-# ---------- PHASE 1: Search and Extract Listings ----------
-def extract_coords_from_url(url):
-    try:
-        match = re.search(r'!3d([-.\d]+)!4d([-.\d]+)', url)
-        if match:
-            lat = float(match.group(1))
-            lon = float(match.group(2))
-            return lat, lon
-        else:
-            print(f"⚠️ Coordinates not found in URL: {url}", flush=True)
-            return None, None
-    except Exception as e:
-        print(f"❌ Error parsing coordinates: {e}", flush=True)
-        return None, None
 
+# ---------- Browser Pool (one per worker process) ----------
+_browser_pool = None
 
+
+def get_browser_pool():
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(
+            set_playwright_browser,
+            max_jobs=browser_parameter.get("max_jobs_per_browser", 50),
+            max_rss_mb=browser_parameter.get("max_rss_mb", 1500),
+        ).start()
+        # Pool workers skip atexit, so register with multiprocessing's finalizers
+        Finalize(_browser_pool, _browser_pool.close, exitpriority=10)
+    return _browser_pool
+
+# ---------- PHASE 1: Search and Extract Listings ----------
 def search_and_extract(query_tuple):
     query, channel, district, state = query_tuple
-    data = []
 
-    with sync_playwright() as p:
-        browser, context, page = set_playwright_browser(p)
-        
+    with get_browser_pool().page() as page:
+        capture = search_capture(page)
         max_retries = 3
         search_success = False
 
-        for attempt in range(max_retries):
-            page.goto(google_maps_url, timeout=60000)
-            time.sleep(2)
-            try:
-                search_box = page.wait_for_selector('xpath=//*[@id="searchboxinput"]', timeout=15000)
-                print("search box found", flush=True)
-                search_box.fill(query)
-                search_box.press("Enter")
-                page.wait_for_timeout(8000)
-                print(f"entered {query} as query", flush=True)
-                search_success = True
-                break  # stop retrying
-            except PlaywrightTimeoutError:
-                print(f"⚠️ Attempt {attempt+1}: Search box not found, retrying...", flush=True)
-                time.sleep(5)
-
-        if not search_success:
-            print("❌ Failed to enter query after retries — skipping.", flush=True)
-            page.close()
-            context.close()
-            browser.close()
-            return []
+        with tracer.span("phase1.navigate") as navigate:
+            for attempt in range(max_retries):
+                navigate["retries"] = attempt
+                page.goto(google_maps_url, timeout=60000)
+                tracer.count("pages_loaded")
+                try:
+                    search_box = page.wait_for_selector('xpath=//*[@id="searchboxinput"]', timeout=15000)
+                    log.debug("search box found")
+                    search_box.fill(query)
+                    search_box.press("Enter")
+                    # Results feed (or a single place panel) instead of a fixed 8 s wait
+                    if not wait_for_any(page, [FEED_SELECTOR, ADDRESS_BUTTON_SELECTOR], search_results_timeout):
+                        wait_for_network_idle(page, network_idle_timeout)
+                    log.debug(f"entered {query} as query")
+                    search_success = True
+                    break  # stop retrying
+                except PlaywrightTimeoutError:
+                    log.warning(f"⚠️ Attempt {attempt+1}: Search box not found, retrying...")
+                    tracer.count("retries")
+                    time.sleep(5)
+            navigate["ok"] = search_success
 
         try:
-            scroll_container = page.wait_for_selector('//div[@role="feed"]', timeout=10000)
-            
+            if not search_success:
+                log.error("❌ Failed to enter query after retries — skipping.")
+                return []
+
+            return scroll_and_extract(page, query_tuple, capture)
+        finally:
+            if capture:
+                capture.detach()
+
+
+def search_capture(page):
+    """Start capturing the feed's search responses when Phase 1 extraction is "xhr"."""
+    if phase1_parameter.get("extraction", "evaluate") != "xhr":
+        return None
+    return SearchResponseCapture(phase1_parameter.get("xhr_record_dir")).attach(page)
+
+
+def scroll_and_extract(page, query_tuple, capture=None):
+    """
+    Scroll the results feed until it stops growing, then extract every card as a Phase 1 record.
+    With a capture, records are decoded from the captured search responses instead; the DOM is
+    parsed only when they cover fewer places than the feed rendered.
+    """
+    data = []
+    count = 0
+
+    with tracer.span("phase1.scroll", scrolls=0) as scroll:
+        try:
+            scroll_container = page.wait_for_selector(FEED_SELECTOR, timeout=10000)
+
             if scroll_container:
                 max_scrolls = 30
                 scroll_count = 0
+                stalls = 0
+                elements = page.locator(feed_selectors["card"])
+                count = elements.count()
 
                 while scroll_count < max_scrolls:
                     scroll_container.evaluate("el => el.scrollTop = el.scrollHeight")
-                    print("scrolling...", flush=True)
-                    time.sleep(2)
+                    log.debug("scrolling...")
                     scroll_count += 1
-                    elements = page.locator('div[class*="Nv2PK"][class*="THOPZb"]')
+                    scroll["scrolls"] = scroll_count
+                    tracer.count("scroll_iterations")
+                    previous_count = count
+
+                    # Wait only until new cards render or the end-of-list marker appears
+                    poll_until(
+                        lambda: elements.count() > previous_count or page.query_selector(feed_selectors["end_of_list"]),
+                        scroll_step_timeout,
+                    )
                     count = elements.count()
 
-                    print(f"📦 Found {count} matching elements.", flush=True)
+                    log.debug(f"📦 Found {count} matching elements.")
 
-                    try:
-                        # Check if end-of-list indicator is visible
-                        no_more_container = page.wait_for_selector(".HlvSq", timeout=3000)
-                        if no_more_container:
-                            print("✅ End reached: Element with class 'HlvSq' found.", flush=True)
-                            break
-                    except PlaywrightTimeoutError:
-                        pass  # Element not found yet, keep scrolling
+                    if page.query_selector(feed_selectors["end_of_list"]):
+                        log.info("✅ End reached: end-of-list marker found.")
+                        break
+
+                    stalls = stalls + 1 if count <= previous_count else 0
+                    if stalls >= scroll_max_stalls:
+                        log.info(f"✅ Feed stopped growing at {count} elements — stopping.")
+                        break
 
                 if scroll_count >= max_scrolls:
-                    print(f"⚠️ Reached max scrolls ({max_scrolls}) — stopping.", flush=True)
-                    
-                    
+                    log.warning(f"⚠️ Reached max scrolls ({max_scrolls}) — stopping.")
+
         except Exception as e:
-            print(f"❌ Error: {e}", flush=True)
+            log.error(f"❌ Error: {e}")
+            scroll["ok"] = False
+
+    with tracer.span("phase1.parse", source="dom") as parse:
+        xhr_records = {}
+        if capture:
+            feed_html = page.content() if capture.record_dir else None
+            xhr_records = {r["place_key"]: r for r in capture.records(query_tuple, feed_html)}
+            if xhr_records and len(xhr_records) >= count:
+                log.info(f"📡 {len(xhr_records)} places decoded from {len(capture.responses)} search responses")
+                parse.update(source="xhr", items=len(xhr_records))
+                tracer.count("items_extracted", len(xhr_records))
+                return list(xhr_records.values())
+            log.warning(f"⚠️ Search responses cover {len(xhr_records)} of {count} cards — falling back to the DOM")
 
         try:
-            print("Trying to scrape container one by one...", flush=True)
-            soup = bs(page.content(), 'html.parser')
-            channel_container = soup.find_all("div", class_=lambda x: x and x.startswith("Nv2PK") and "THOPZb" in x)
-            print(f'📦 Channel found: {len(channel_container)}', flush=True)
+            log.debug("Extracting feed cards...")
+            if phase1_parameter.get("extraction", "evaluate") in ("evaluate", "xhr"):
+                try:
+                    cards = extract_cards_from_page(page, feed_selectors)
+                except Exception as e:
+                    log.warning(f"⚠️ In-page extraction failed ({e}) — falling back to HTML parse")
+                    cards = extract_cards_from_html(page.content(), feed_selectors)
+            else:
+                cards = extract_cards_from_html(page.content(), feed_selectors)
+            log.info(f'📦 Channel found: {len(cards)}')
 
-            for i, element in enumerate(channel_container):
+            for i, card in enumerate(cards):
                 try:
-                    a_tag = element.find("a", class_="hfpxzc")
-                    href = a_tag.get("href") if a_tag else np.nan
-
-                    name_tag = element.find("div", class_="qBF1Pd fontHeadlineSmall")
-                    name = name_tag.text.strip() if name_tag else np.nan
-
-                    rating_span = element.find("span", class_="MW4etd")
-                    rating_text = rating_span.text.strip() if rating_span else ""
-                    rating = float(rating_text) if rating_text.replace(".", "", 1).isdigit() else np.nan
-
-                    # ✅ Fix category and address extraction
-                    info_container = element.find("div", class_="UaQhfb fontBodyMedium")
-                    if info_container:
-                        info_container_2 = info_container.findAll("div", class_="W4Efsd")
-                        if len(info_container_2) > 1:
-                            info_container_3 = info_container_2[1].findAll("div", class_="W4Efsd")
-                            if info_container_3:
-                                spans = info_container_3[0].findAll("span")
-                                filtered_spans = [s.text.strip() for s in spans if s.text.strip() and "·" not in s.text.strip()]
-                                category = filtered_spans[0] if len(filtered_spans) >= 1 else np.nan
-                                print(f'category: {category}')
-                            else:
-                                category= np.nan
-                        else:
-                            category = np.nan
-                    else:
-                        category = np.nan
-
-                    latitude, longitude = None, None
-                    if href:
-                        latitude, longitude = extract_coords_from_url(href)
-
-                    data.append({
-                        "searched_query": query,
-                        "searched_channel": channel,
-                        "searched_district": district,
-                        "searched_state": state,
-                        "name": name,
-                        "href": href,
-                        "rating": rating,
-                        "category": category,
-                        "latitude": latitude, 
-                        "longitude": longitude
-                    })
-
-                    print(f"✅ [{i+1}] Scraped: {name} | {href}", flush=True)
-
-                    page.wait_for_timeout(2000) 
+                    record = card_to_record(card, query_tuple)
+                    if record["place_key"] in xhr_records:
+                        xhr_record = xhr_records[record["place_key"]]
+                        for field, confidence in (("full_address", "address_confidence"), ("phone_number", "phone_confidence")):
+                            if xhr_record[field]:
+                                record.update({field: xhr_record[field], confidence: xhr_record[confidence]})
+                    data.append(record)
+                    log.debug(f"✅ [{i+1}] Scraped: {record['name']} | {record['href']}")
 
                 except Exception as inner_e:
-                    print(f"⚠️ Error scraping one item: {inner_e}", flush=True)
+                    log.warning(f"⚠️ Error scraping one item: {inner_e}")
 
         except Exception as e:
-            print(f"❌ Error getting element: {e}", flush=True)
-        finally:
-            page.close()
-            context.close()
-            browser.close()
+            log.error(f"❌ Error getting element: {e}")
+        parse["items"] = len(data)
+        tracer.count("items_extracted", len(data))
 
     return data
 
 
+def search_tile(tile_job):
+    """
+    Phase 1 for one map tile: search the channel inside the tile's viewport and, while the feed
+    comes back saturated, recurse into the tile's quadrants (up to max_depth).
+    Records from overlapping tiles are deduplicated by place_key.
+    """
+    channel, district, state, tile = tile_job
+    viewport = (BROWSER_CONTEXT_OPTIONS["viewport"]["width"], BROWSER_CONTEXT_OPTIONS["viewport"]["height"])
+    records = {}
+    pending = [tile]
+
+    while pending:
+        tile = pending.pop()
+        url = tile_url(channel, tile, viewport)
+        query = f"{channel} near {district}, {state} {url.split('/')[-1].split('?')[0]}"
+
+        with get_browser_pool().page() as page:
+            capture = search_capture(page)
+            try:
+                with tracer.span("phase1.navigate"):
+                    page.goto(url, timeout=60000)
+                    tracer.count("pages_loaded")
+                    if not wait_for_selector(page, FEED_SELECTOR, search_results_timeout):
+                        wait_for_network_idle(page, network_idle_timeout)
+                data = scroll_and_extract(page, (query, channel, district, state), capture)
+            finally:
+                if capture:
+                    capture.detach()
+
+        new = 0
+        for record in data:
+            key = record["place_key"] or id(record)
+            if key not in records:
+                records[key] = record
+                new += 1
+        log.info(f"🧩 Tile {query}: {len(data)} results, {new} new")
+
+        if len(data) >= tiling_parameter.get("saturation_count", 100) and tile.depth < tiling_parameter.get("max_depth", 2):
+            log.info(f"🔍 Tile saturated — subdividing to depth {tile.depth + 1}")
+            pending.extend(subdivide(tile))
+
+    return list(records.values())
+
+
+def run_phase1_job(job):
+    """Phase 1 entry point for both job kinds: ("query", query_tuple) or ("tile", tile_job)."""
+    kind, payload = job
+    with tracer.span(f"phase1.{kind}") as span:
+        records = search_tile(payload) if kind == "tile" else search_and_extract(payload)
+        span.update(items=len(records), ok=bool(records))
+    return records
+
+
 # ---------- PHASE 2: Extract Location Details ----------
 def extract_location_from_url(url):
+    with tracer.span("phase2.visit") as span:
+        result = visit_place(url, span)
+        span["ok"] = found_details(result)
+    return result
+
+
+def visit_place(url, span):
     max_attempts = 3
     attempts = 0
 
     try:
-        with sync_playwright() as p:
-            
-            browser, context, page = set_playwright_browser(p)
-
+        with get_browser_pool().page() as page:
             phone_number = "-"
             address = "-"
 
             while attempts < max_attempts:
                 try:
+                    span["attempts"] = attempts + 1
                     page.goto(url, timeout=60000)
-                    print(f"🔍 Visiting: {url}", flush=True)
-                    time.sleep(10)  # allow page load, adjust as needed
+                    tracer.count("pages_loaded")
+                    log.debug(f"🔍 Visiting: {url}")
+                    # Wait for the address/phone buttons rather than a fixed 10 s sleep
+                    wait_for_selector(page, PLACE_DETAILS_SELECTOR, place_timeout)
 
                     # Address extraction
                     try:
-                        address_button = page.query_selector('//button[@data-item-id="address"]')
+                        address_button = page.query_selector(ADDRESS_BUTTON_SELECTOR)
                         if address_button:
-                            address_aria_label = address_button.get_attribute("aria-label") or "-"
-                            if address_aria_label and "Address:" in address_aria_label:
-                                    address = address_aria_label.replace("Address:", "").strip()
-                            print(f"📫 Address found: {address}", flush=True)
+                            address = parse_address_label(address_button.get_attribute("aria-label")) or address
+                            log.debug(f"📫 Address found: {address}")
                         else:
-                            print(f"⚠️ Address button not found on attempt {attempts + 1}", flush=True)
+                            log.warning(f"⚠️ Address button not found on attempt {attempts + 1}")
                     except Exception as e:
-                        print(f'⚠️ Address extraction error on attempt {attempts + 1}: {e}', flush=True)
+                        log.warning(f'⚠️ Address extraction error on attempt {attempts + 1}: {e}')
 
                     # Phone number extraction
                     try:
-                        buttons = page.query_selector_all('//button[@data-tooltip="Copy phone number"]')
+                        buttons = page.query_selector_all(PHONE_BUTTON_SELECTOR)
                         for i, button in enumerate(buttons):
                             if button:
-                                aria_label = button.get_attribute("aria-label")
-                                if aria_label and "Phone:" in aria_label:
-                                    phone_number = aria_label.replace("Phone:", "").strip()
-                                    phone_number = str(phone_number).strip()
-                                    phone_number = re.sub(r"[^+\d]", "", phone_number)
-
-                                    print(f"📞 Phone number: {phone_number}", flush=True)
+                                phone = parse_phone_label(button.get_attribute("aria-label"))
+                                if phone is not None:
+                                    phone_number = phone
+                                    log.debug(f"📞 Phone number: {phone_number}")
                                     break
                         if phone_number == "-":
-                            print(f"⚠️ Phone number not found on attempt {attempts + 1}", flush=True)
+                            log.warning(f"⚠️ Phone number not found on attempt {attempts + 1}")
                     except Exception as e:
-                        print(f"⚠️ Phone number extraction error on attempt {attempts + 1}: {e}", flush=True)
+                        log.warning(f"⚠️ Phone number extraction error on attempt {attempts + 1}: {e}")
 
                     # If address or phone found, we can break early
                     if address != "-" or phone_number != "-":
                         break
 
                 except Exception as e:
-                    print(f"[ERROR - Attempt {attempts + 1}] Failed scraping {url}: {e}", flush=True)
+                    log.error(f"[ERROR - Attempt {attempts + 1}] Failed scraping {url}: {e}")
 
                 attempts += 1
+                tracer.count("retries")
 
-            page.close()
-            context.close()
-            browser.close()
             return (url, address, phone_number)
 
     except Exception as e:
-        print(f"❌ Error extracting from {url}: {e}", flush=True)
+        log.error(f"❌ Error extracting from {url}: {e}")
         return (url, None, None)
     
-def clean_address(address):
-    if not isinstance(address, str):
-        return address
-    address = address.lower()
-    address = re.sub(r',+', ',', address)
-    address = re.sub(r'\s+', ' ', address)
-    return address.strip()
-
-
-def fuzzy_find(text, choices, threshold=85):
-    """Helper function for fuzzy matching."""
-    if not choices:
-        return None
-    result = process.extractOne(text, choices, scorer=fuzz.partial_ratio)
-    if result:
-        match, score, _ = result
-        return match if score >= threshold else None
-    return None
-
-
-def extract_info_from_address(address, location_data, threshold=85):
-    if not isinstance(address, str):
-        return {"postcode": None, "state": None, "district": None, "area": None}
-
-    address = clean_address(address)
-    detected_postcode = re.findall(r"\d{5}", address)
-    detected_postcode = detected_postcode[-1] if detected_postcode else None
-
-    # Special case: Tioman
-    if any(x in address for x in ["pulau tioman", "tioman island"]) or (
-        "pahang" in address and "mersing" in address
-    ):
-        return {"postcode": "86800", "state": "pahang", "district": "rompin", "area": "pulau tioman"}
-
-    # Direct postcode lookup
-    if detected_postcode:
-        for state, districts in location_data.items():
-            for district, postcodes in districts.items():
-                if detected_postcode in postcodes:
-                    area = fuzzy_find(address, postcodes[detected_postcode]["locations"].get("area", []), threshold)
-                    return {"postcode": detected_postcode, "state": state, "district": district, "area": area}
-
-    # State → District → Postcode
-    state = fuzzy_find(address, location_data.keys(), threshold)
-    if state:
-        district = fuzzy_find(address, location_data[state].keys(), threshold)
-        if district:
-            for pc, entry in location_data[state][district].items():
-                area = fuzzy_find(address, entry["locations"].get("area", []), threshold)
-                if (detected_postcode and detected_postcode == pc) or area:
-                    return {"postcode": detected_postcode or pc, "state": state, "district": district, "area": area}
-            return {"postcode": detected_postcode, "state": state, "district": district, "area": None}
-        return {"postcode": detected_postcode, "state": state, "district": None, "area": None}
-
-    # District → State → Postcode
-    all_districts = {district: state for state, districts in location_data.items() for district in districts}
-    district = fuzzy_find(address, all_districts.keys(), threshold)
-    if district:
-        state = all_districts[district]
-        for pc, entry in location_data[state][district].items():
-            area = fuzzy_find(address, entry["locations"].get("area", []), threshold)
-            if (detected_postcode and detected_postcode == pc) or area:
-                return {"postcode": detected_postcode or pc, "state": state, "district": district, "area": area}
-        return {"postcode": detected_postcode, "state": state, "district": district, "area": None}
-
-    # 4️⃣ No match at all
-    return {"postcode": detected_postcode, "state": None, "district": None, "area": None}
-
-
-def set_data_type(df):
-    """
-    Adjusts df to match Google Maps Redshift table:
-    - Converts data types to match Redshift schema
-    """
-    column_types = {}
-    for col_name in df.columns:
-        if df[col_name].dtype == 'object':
-            column_types[col_name] = sa.types.NVARCHAR(length=65535)
-        elif df[col_name].dtype == 'datetime64[ns, UTC]':
-            column_types[col_name] = sa.TIMESTAMP(timezone=True)
-        elif df[col_name].dtype == 'float':
-            column_types[col_name] = sa.FLOAT()
-        elif col_name == 'extract_date':
-            column_types[col_name] = sa.DATE()
-    return column_types
-
 def load_to_redshift(
         df,
         table_schema,
@@ -368,24 +431,19 @@ def load_to_redshift(
     ):
     """
     Load dataframe to redshift
+    - gzip CSV chunks + a single COPY per call (see warehouse.BulkLoader)
+    - right-sized column types, idempotent upsert on place_key through a staging table
     """
-
-    column_types = set_data_type(df)
-
-    df.to_sql(
-        table_name,
-        rs_conn,
-        index=False,
-        dtype=column_types,
-        if_exists='append',
-        method='multi',
-        schema=table_schema
-    )
+    with tracer.span("warehouse.load", table=f"{table_schema}.{table_name}", rows=len(df)):
+        return BulkLoader.from_config(warehouse_parameter).load(df, table_schema, table_name, rs_conn)
 
 
-# # ---------- MAIN ENTRY ----------
-if __name__ == "__main__":
-    # # Phase 1 parallel
+def build_query_jobs():
+    """
+    One ("query", ...) job per channel x district, or, with tiling enabled and a bbox
+    configured for the district, one ("tile", ...) job per grid cell of its bounding box.
+    """
+    rows, cols = tiling_parameter.get("grid", [3, 3])
     query_jobs = []
     for channel_obj in channel_parameter:
         channel = channel_obj["channel"]
@@ -393,54 +451,289 @@ if __name__ == "__main__":
             state = place["state"]
             for dist in place["districts"]:
                 district = dist["district"]
-                query = f"{channel} near {district}, {state}"
-                query_jobs.append((query, channel, district, state))
+                if tiling_parameter.get("enabled") and dist.get("bbox"):
+                    for tile in grid(dist["bbox"], rows, cols):
+                        query_jobs.append(("tile", (channel, district, state, tile)))
+                else:
+                    query = f"{channel} near {district}, {state}"
+                    query_jobs.append(("query", (query, channel, district, state)))
+    return query_jobs
+
+
+def async_engine_kwargs():
+    return dict(
+        setup_fn=set_async_playwright_browser,
+        browsers=phase2_parameter.get("browsers", 2),
+        concurrency=phase2_parameter.get("concurrency", 32),
+        url_timeout=phase2_parameter.get("url_timeout", 120),
+        place_timeout=place_timeout,
+        controller=AimdController.from_config("phase2", adaptive_parameter, phase2_parameter.get("concurrency", 32)),
+    )
+
+
+def run_streaming(query_jobs):
+    if phase2_parameter.get("mode", "process") == "async":
+        detail_executor = AsyncDetailExecutor(async_engine_kwargs())
+    else:
+        detail_executor = ProcessDetailExecutor(
+            extract_location_from_url, AimdController.from_config("phase2", adaptive_parameter, min(cpu_count(), 8))
+        )
+
+    run_streaming_pipeline(
+        query_jobs,
+        run_phase1_job,
+        detail_executor,
+        load_location_index(),
+        phase1_out=store.appender("phase1_results"),
+        final_out=store.appender("gm_with_extracted_location"),
+        phase1_controller=AimdController.from_config("phase1", adaptive_parameter, min(cpu_count(), 2)),
+        max_pending=pipeline_parameter.get("max_pending_hrefs", 64),
+        listing_queue_size=pipeline_parameter.get("listing_queue_size", 4),
+        batch_size=pipeline_parameter.get("output_batch_size", 100),
+        detail_cache=DetailCache.from_config(cache_parameter) if cache_parameter.get("enabled") else None,
+        spatial_index=load_spatial_index(),
+    )
+    export_final_csv()
 
-    print(f"Running Phase 1 with {len(query_jobs)} queries using {cpu_count()} CPUs...")
 
-    with Pool(processes=min(cpu_count(), 2)) as pool:
-        results = pool.map(search_and_extract, query_jobs)
+def run_batch(query_jobs):
+    pool = AdaptivePool(AimdController.from_config("phase1", adaptive_parameter, min(cpu_count(), 2))).start()
+    results = list(pool.imap_unordered(run_phase1_job, query_jobs, error_result=[]))
+    pool.close()
 
     # # Flatten results
     flat_data = [item for sublist in results for item in sublist]
-    df_places = pd.DataFrame(flat_data)
-    output_path = "data/phase1_results.csv"
-    df_places.to_csv(output_path, index=False)
-    print(f"✅ Saved to {output_path}")
+    df_places = dedup_listings(pd.DataFrame(flat_data))
+    store.write("phase1_results", df_places)
+    log.info(f"✅ Saved phase1_results ({len(df_places)} rows)")
+
+    # # Phase 2 parallel — only the columns it needs
+    df_places = read_phase1_results(columns=[
+        "href", "place_key", "full_address", "phone_number", "address_confidence", "phone_confidence"
+    ])
+    places, unique_hrefs, visits_avoided = unique_places(df_places)
+    log.info(f"🔑 {unique_hrefs} unique hrefs → {len(places)} unique places "
+             f"({visits_avoided} Phase 2 visits avoided)")
+    detail_cache = DetailCache.from_config(cache_parameter) if cache_parameter.get("enabled") else None
+    cached, prefilled, to_visit = [], [], []
+    for href, key, address, phone_number, address_confidence, phone_confidence in zip(
+            places["href"], places["place_key"], places["full_address"], places["phone_number"],
+            places["address_confidence"], places["phone_confidence"]):
+        known = known_details(address, phone_number, address_confidence, phone_confidence)
+        hit = None if known or not detail_cache else detail_cache.get(key)
+        if known:
+            prefilled.append((href, *known))
+        elif hit:
+            cached.append((href, *hit))
+        else:
+            to_visit.append(href)
 
-    # # Phase 2 parallel
-    df_places = pd.read_csv("data/phase1_results.csv")
-    print(f"Running Phase 2 on {len(df_places)} URLs using {cpu_count()} CPUs...")
-    hrefs = df_places["href"].dropna().unique().tolist()
-    hrefs = hrefs[:10]
+    log.info(f"Running Phase 2 on {len(to_visit)} URLs ({len(cached)} from cache, {len(prefilled)} from Phase 1 fields) "
+             f"using {cpu_count()} CPUs...")
+    hrefs = to_visit[:10]
 
-    with Pool(processes=min(cpu_count(), 8)) as pool:
-        details = pool.map(extract_location_from_url, hrefs)
+    if phase2_parameter.get("mode", "process") == "async":
+        details = asyncio.run(run_phase2_async(hrefs, **async_engine_kwargs()))
+    else:
+        controller = AimdController.from_config("phase2", adaptive_parameter, min(cpu_count(), 8))
+        pool = AdaptivePool(controller, is_ok=found_details).start()
+        details = [d for d in pool.imap_unordered(extract_location_from_url, hrefs) if d is not None]
+        pool.close()
 
-    df_coords = pd.DataFrame(details, columns=["href", "full_address", "phone_number"])
-    df_final = df_places.merge(df_coords, on="href", how="left")
-    df_final.to_csv("data/scraped_output.csv", index=False)
+    href_to_key = dict(zip(places["href"], places["place_key"]))
+    if detail_cache:
+        for href, address, phone_number in details:
+            detail_cache.put(href_to_key[href], href, address, phone_number)
+        detail_cache.close()
+        log.info(f"🗄️ Detail cache: {detail_cache.summary()}")
 
-    print("✅ All done. Output saved to scraped_output.csv")
+    df_coords = pd.DataFrame(cached + prefilled + list(details), columns=["href", "full_address", "phone_number"])
+    df_coords["place_key"] = df_coords["href"].map(href_to_key)
+    write_final_outputs(df_coords.drop(columns="href"))
 
-    # Phase 3 address preprocessing
-    gm_df = pd.read_csv("data/scraped_output.csv")
 
-    with open("state_district_postcode_location.json", "r") as f:
-        location_data = json.load(f)
+def read_phase1_results(columns=None):
+    """
+    This run's phase1_results. A dataset written before place_key existed gets its keys computed here
+    (and any other requested column it lacks comes back empty).
+    """
+    available = store.columns("phase1_results")
+    if "place_key" in available and (columns is None or set(columns) <= set(available)):
+        return store.read("phase1_results", columns=columns)
+
+    log.warning("⚠️ phase1_results predates some columns — computing place_key on read")
+    wanted = available if columns is None else columns
+    read_columns = [c for c in dict.fromkeys([*wanted, "href", "name", "latitude", "longitude"]) if c in available]
+    df = store.read("phase1_results", columns=read_columns)
+    if "place_key" not in available:
+        df = add_place_key(df)
+    for c in wanted:
+        if c not in df.columns:
+            df[c] = None
+    return df[list(dict.fromkeys([*wanted, "place_key"]))] if columns is None else df[columns]
+
+
+def write_final_outputs(df_coords):
+    """
+    Join Phase 2 details (place_key, full_address, phone_number) onto this run's phase1_results,
+    write scraped_output, then Phase 3 → gm_with_extracted_location (+ optional CSV export).
+    """
+    df_places = read_phase1_results()
+    df_final = df_places.merge(df_coords, on="place_key", how="left", suffixes=("_card", ""))
+    # Fields the visit could not find keep what Phase 1 harvested from the card
+    for col in ["full_address", "phone_number"]:
+        df_final[col] = [merge_details(card, visited) for card, visited in zip(df_final[f"{col}_card"], df_final[col])]
+    df_final = df_final.drop(columns=["full_address_card", "phone_number_card"])
+    store.write("scraped_output", df_final)
+
+    log.info("✅ All done. Output saved to scraped_output")
+
+    # Phase 3 address preprocessing
+    gm_df = store.read("scraped_output")
 
-    extracted = gm_df["full_address"].apply(lambda x: extract_info_from_address(x, location_data))
-    extracted_df = pd.json_normalize(extracted)
+    extracted_df = resolve_locations(gm_df, load_location_index(), load_spatial_index())
     gm_df = gm_df.join(extracted_df)
+    log.info(f"📍 Location source: {gm_df['location_source'].value_counts(dropna=False).to_dict()}")
 
-    gm_df.to_csv("data/gm_with_extracted_location.csv", index=False)
+    store.write("gm_with_extracted_location", gm_df)
+    export_final_csv()
 
 
+# ---------- Work-queue mode (any number of containers share one run) ----------
+def decode_job(payload):
+    """A Phase 1 job back from its JSON form (tiles come back as plain lists)."""
+    kind, job = payload
+    if kind == "tile":
+        channel, district, state, tile = job
+        return ("tile", (channel, district, state, Tile(*tile)))
+    return ("query", tuple(job))
 
 
+def queue_worker(worker_index):
+    """
+    One worker process: claim Phase 1 jobs first, then Phase 2 hrefs, until both queues are drained.
+    Finished Phase 1 jobs enqueue their places for Phase 2 (once per place_key across all workers).
+    """
+    work_queue = WorkQueue.from_config(queue_parameter)
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    detail_cache = DetailCache.from_config(cache_parameter) if cache_parameter.get("enabled") else None
+    done = 0
+
+    while True:
+        claimed = work_queue.claim("phase1", worker_id)
+        if claimed:
+            key, payload = claimed
+            try:
+                with work_queue.keep_alive("phase1", key, worker_id):
+                    records = run_phase1_job(decode_job(payload))
+            except Exception as e:
+                # Release the lease now instead of waiting for it to expire
+                log.error(f"❌ Phase 1 job {key} failed on {worker_id}: {e}")
+                work_queue.fail("phase1", key, worker_id, e)
+                continue
+            work_queue.enqueue("phase2", [
+                (record["place_key"], record["href"]) for record in records
+                if isinstance(record["href"], str) and not known_details(
+                    record["full_address"], record["phone_number"],
+                    record["address_confidence"], record["phone_confidence"])
+            ])
+            work_queue.complete("phase1", key, records)
+            done += 1
+            continue
+
+        claimed = work_queue.claim("phase2", worker_id)
+        if claimed:
+            key, href = claimed
+            hit = detail_cache.get(key) if detail_cache else None
+            if hit:
+                work_queue.complete("phase2", key, [href, *hit])
+                continue
+            with work_queue.keep_alive("phase2", key, worker_id):
+                href, address, phone_number = extract_location_from_url(href)
+            if address is None:
+                work_queue.fail("phase2", key, worker_id, "extraction error")
+                continue
+            if detail_cache:
+                detail_cache.put(key, href, address, phone_number)
+            work_queue.complete("phase2", key, [href, address, phone_number])
+            done += 1
+            continue
+
+        if work_queue.drained("phase1") and work_queue.drained("phase2"):
+            break
+        # Other workers still hold leases that may yield more Phase 2 work (or expire)
+        time.sleep(queue_parameter.get("poll_interval", 5))
+
+    if detail_cache:
+        detail_cache.close()
+    work_queue.close()
+    log.info(f"👷 Worker {worker_id} finished after {done} jobs")
+    return done
+
+
+def run_queue(query_jobs):
+    """
+    Work-queue mode: every container runs the same command against one queue file on a shared volume.
+    Jobs are enqueued once, leases that expire (crashed worker) are re-queued, finished work is never redone,
+    and whichever container claims the single "finalize" job once both queues drain writes the outputs.
+    """
+    work_queue = WorkQueue.from_config(queue_parameter)
+    added = work_queue.enqueue("phase1", [(json.dumps(job), job) for job in query_jobs])
+    work_queue.enqueue("finalize", [("run", None)])
+    log.info(f"📥 {added} new Phase 1 jobs enqueued ({len(query_jobs) - added} already known)")
+
+    with Pool(processes=queue_parameter.get("workers", min(cpu_count(), 2))) as pool:
+        pool.map(queue_worker, range(queue_parameter.get("workers", min(cpu_count(), 2))))
+        pool.close()
+        pool.join()  # let workers shut their browsers down cleanly
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    claimed = work_queue.claim("finalize", worker_id)
+    if not claimed:
+        log.info(f"✅ Queues drained; outputs are (being) written by another run or container ({work_queue.counts('finalize')})")
+        return
+
+    with work_queue.keep_alive("finalize", "run", worker_id):
+        for queue in ("phase1", "phase2"):
+            log.info(f"📊 {queue}: {work_queue.counts(queue)}")
+        records = [record for _, job_records in work_queue.results("phase1") for record in job_records]
+        store.write("phase1_results", dedup_listings(pd.DataFrame(records)))
+        details = [(key, address, phone_number) for key, (_, address, phone_number) in work_queue.results("phase2")]
+        write_final_outputs(pd.DataFrame(details, columns=["place_key", "full_address", "phone_number"]))
+    work_queue.complete("finalize", "run", {"rows": len(records)})
+    work_queue.close()
+
+
+def load_location_index():
+    return LocationIndex.from_json(location_parameter.get("location_data_path", "state_district_postcode_location.json"))
+
+
+def load_spatial_index():
+    """Coordinate resolver for Phase 3, or None to resolve from address text only."""
+    path = location_parameter.get("centroids_path")
+    if not path or not os.path.exists(path):
+        if path:
+            log.warning(f"⚠️ {path} not found — resolving locations from addresses only")
+        return None
+    return SpatialIndex.from_csv(path, location_parameter.get("max_distance_km", 5.0))
 
 
+def export_final_csv():
+    export_path = storage_parameter.get("export_csv")
+    if export_path:
+        store.export_csv("gm_with_extracted_location", export_path)
 
 
+# # ---------- MAIN ENTRY ----------
+if __name__ == "__main__":
+    query_jobs = build_query_jobs()
+    log.info(f"Running Phase 1 with {len(query_jobs)} queries using {cpu_count()} CPUs...")
 
+    if pipeline_parameter.get("mode", "batch") == "streaming":
+        run_streaming(query_jobs)
+    elif pipeline_parameter.get("mode") == "queue":
+        run_queue(query_jobs)
+    else:
+        run_batch(query_jobs)
 
+    tracer.finish(log)
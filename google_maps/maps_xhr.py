@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import re
+import sys
+import uuid
+from urllib.parse import quote
+
+import numpy as np
+
+from place_key import place_key
+
+log = logging.getLogger(__name__)
+
+# Background requests that fill the results feed (first page when typed, every later page on scroll)
+SEARCH_URL_MARKERS = ("/search?tbm=map", "/maps/search?", "/maps/preview/search")
+XSSI_PREFIX = ")]}'"
+
+# Where each field lives inside one place entry of the search payload (list indices).
+# Like feed_selectors.yaml, update these when Google reshuffles the payload.
+PLACE_FIELDS = {
+    "name": (11,),
+    "rating": (4, 7),
+    "categories": (13,),
+    "latitude": (9, 2),
+    "longitude": (9, 3),
+    "feature_id": (10,),
+    "full_address": (39,),
+    "phone_number": (178, 0, 0),
+}
+RESULTS_PATH = (0, 1)   # list of result entries
+PLACE_INDEX = 14        # place entry inside a result
+
+FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)")
+COORD_TOLERANCE = 1e-4  # degrees, about 11 m
+
+
+def is_search_response(url):
+    return any(marker in url for marker in SEARCH_URL_MARKERS)
+
+
+def decode_payload(text):
+    """
+    Raw search response body -> nested JSON list.
+    The body is either ")]}'\\n[...]" or {"d": ")]}'\\n[...]", ...} followed by /*""*/.
+    """
+    text = text.strip()
+    if text.endswith('/*""*/'):
+        text = text[:-len('/*""*/')]
+    if text.startswith("{"):
+        text = json.loads(text)["d"]
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):]
+    return json.loads(text)
+
+
+def dig(obj, path):
+    """obj[path[0]][path[1]]... or None as soon as a level is missing."""
+    for i in path:
+        if not isinstance(obj, list) or i >= len(obj) or obj[i] is None:
+            return None
+        obj = obj[i]
+    return obj
+
+
+def iter_places(payload):
+    for result in dig(payload, RESULTS_PATH) or []:
+        place = dig(result, (PLACE_INDEX,))
+        if isinstance(place, list) and isinstance(dig(place, PLACE_FIELDS["name"]), str):
+            yield place
+
+
+def place_href(name, feature_id, latitude, longitude):
+    """Place URL in the same shape as the feed links, so place_key / extract_coords_from_url work on it."""
+    if not feature_id:
+        return np.nan
+    coords = f"!8m2!3d{latitude}!4d{longitude}" if latitude is not None and longitude is not None else ""
+    return f"https://www.google.com/maps/place/{quote(name)}/data=!4m5!3m4!1s{feature_id}{coords}?hl=en"
+
+
+def place_to_record(place, query_tuple):
+    """One payload place entry -> the Phase 1 record schema (see feed_extract.card_to_record)."""
+    query, channel, district, state = query_tuple
+    field = {key: dig(place, path) for key, path in PLACE_FIELDS.items()}
+    name = field["name"]
+    latitude, longitude = field["latitude"], field["longitude"]
+    href = place_href(name, field["feature_id"], latitude, longitude)
+    categories = field["categories"] or []
+    address = field["full_address"] if isinstance(field["full_address"], str) else None
+    # Same digits-only form as place_details.parse_phone_label
+    phone_number = re.sub(r"[^+\d]", "", field["phone_number"]) if isinstance(field["phone_number"], str) else None
+
+    return {
+        "searched_query": query,
+        "searched_channel": channel,
+        "searched_district": district,
+        "searched_state": state,
+        "name": name,
+        "href": href,
+        "rating": float(field["rating"]) if isinstance(field["rating"], (int, float)) else np.nan,
+        "category": categories[0] if categories else np.nan,
+        "latitude": latitude,
+        "longitude": longitude,
+        "place_key": place_key(href, name, latitude, longitude),
+        "full_address": address,
+        "address_confidence": "high" if address else None,
+        "phone_number": phone_number,
+        "phone_confidence": "high" if phone_number else None,
+        "open_status": None,
+    }
+
+
+def records_from_payloads(payloads, query_tuple):
+    """Phase 1 records from decoded payloads, first occurrence per place_key."""
+    records = {}
+    for payload in payloads:
+        for place in iter_places(payload):
+            record = place_to_record(place, query_tuple)
+            records.setdefault(record["place_key"], record)
+    return list(records.values())
+
+
+def national_digits(phone):
+    """'+60 3-2123 4567' / '03-2123 4567' -> '0321234567', so card and payload phones compare equal."""
+    digits = re.sub(r"\D", "", phone or "")
+    return "0" + digits[2:] if digits.startswith("60") else digits
+
+
+def compare_records(dom_records, xhr_records):
+    """
+    Check payload records against the DOM records of the same feed; returns the mismatches (empty = agree).
+    Name, rating, coordinates and feature id must match for every card; the card's address fragment must be
+    part of the payload address and a card phone in a Malaysian format must have the same digits.
+    """
+    xhr_by_key = {r["place_key"]: r for r in xhr_records}
+    problems = []
+    for dom in dom_records:
+        name = dom["name"]
+        xhr = xhr_by_key.get(dom["place_key"])
+        if xhr is None:
+            problems.append(f"{name}: not in the search responses")
+            continue
+        if xhr["name"] != name:
+            problems.append(f"{name}: name {xhr['name']!r}")
+        if not (np.isnan(xhr["rating"]) and np.isnan(dom["rating"])) and not abs(xhr["rating"] - dom["rating"]) < 0.05:
+            problems.append(f"{name}: rating {xhr['rating']} vs {dom['rating']}")
+        for axis in ("latitude", "longitude"):
+            if xhr[axis] is None or abs(xhr[axis] - dom[axis]) > COORD_TOLERANCE:
+                problems.append(f"{name}: {axis} {xhr[axis]} vs {dom[axis]}")
+        dom_feature, xhr_feature = (FEATURE_ID_RE.search(str(r["href"])) for r in (dom, xhr))
+        if not dom_feature or not xhr_feature or dom_feature.group(1) != xhr_feature.group(1):
+            problems.append(f"{name}: feature id {xhr_feature and xhr_feature.group(1)}")
+        if dom["full_address"]:
+            fragment = " ".join(dom["full_address"].lower().split())
+            if fragment not in " ".join((xhr["full_address"] or "").lower().split()):
+                problems.append(f"{name}: address {xhr['full_address']!r} lacks {dom['full_address']!r}")
+        phone = national_digits(dom["phone_number"])
+        if dom["phone_confidence"] == "high" and national_digits(xhr["phone_number"]) != phone:
+            problems.append(f"{name}: phone {xhr['phone_number']} vs {dom['phone_number']}")
+    return problems
+
+
+class SearchResponseCapture:
+    """
+    Collects the feed's search responses on a live page via Playwright response events.
+    Bodies are read after scrolling (not inside the event handler). With record_dir, every query's
+    responses and its scrolled feed HTML are saved to record_dir/<query slug>-<id>/ (search-<n>.txt,
+    feed.html), the pair bench/check_xhr.py compares.
+    """
+
+    def __init__(self, record_dir=None):
+        self.record_dir = record_dir
+        self.responses = []
+        self.page = None
+
+    def _on_response(self, response):
+        if is_search_response(response.url):
+            self.responses.append(response)
+
+    def attach(self, page):
+        self.page = page
+        self.responses = []
+        page.on("response", self._on_response)
+        return self
+
+    def detach(self):
+        if self.page is not None:
+            self.page.remove_listener("response", self._on_response)
+            self.page = None
+
+    def recording_dir(self, query_tuple):
+        slug = re.sub(r"[^a-z0-9]+", "-", str(query_tuple[0]).lower()).strip("-")
+        path = os.path.join(self.record_dir, f"{slug}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def payloads(self, record_path=None):
+        payloads = []
+        for n, response in enumerate(self.responses):
+            try:
+                text = response.text()
+                if record_path:
+                    with open(os.path.join(record_path, f"search-{n}.txt"), "w", encoding="utf-8") as f:
+                        f.write(text)
+                payloads.append(decode_payload(text))
+            except Exception as e:
+                log.warning(f"⚠️ Could not decode search response {response.url[:80]}: {e}")
+        return payloads
+
+    def records(self, query_tuple, feed_html=None):
+        """Records decoded from the captured responses; feed_html is saved next to them when recording."""
+        record_path = self.recording_dir(query_tuple) if self.record_dir else None
+        if record_path and feed_html is not None:
+            with open(os.path.join(record_path, "feed.html"), "w", encoding="utf-8") as f:
+                f.write(feed_html)
+        return records_from_payloads(self.payloads(record_path), query_tuple)
+
+
+if __name__ == "__main__":
+    # Offline decode of recorded responses: python maps_xhr.py data/xhr/*/search-*.txt
+    payloads = []
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            payloads.append(decode_payload(f.read()))
+    records = records_from_payloads(payloads, ("offline", None, None, None))
+    print(json.dumps(records, ensure_ascii=False, indent=2, default=str))
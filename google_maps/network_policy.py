@@ -0,0 +1,122 @@
+import logging
+import re
+
+from collections import Counter
+
+log = logging.getLogger(__name__)
+
+# Rough average transfer size per blocked resource type, used to estimate bandwidth saved
+# (an aborted request never tells us its real size).
+DEFAULT_ESTIMATED_BYTES = {
+    "image": 25_000,
+    "media": 500_000,
+    "font": 40_000,
+    "stylesheet": 30_000,
+    "script": 60_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "ping": 500,
+    "other": 5_000,
+}
+
+
+class BlockStats:
+    """Requests allowed/blocked for one page (one context) plus the estimated bytes saved."""
+
+    def __init__(self):
+        self.allowed = 0
+        self.blocked = Counter()
+        self.bytes_saved = 0
+
+    @property
+    def blocked_total(self):
+        return sum(self.blocked.values())
+
+    def add(self, other):
+        self.allowed += other.allowed
+        self.blocked.update(other.blocked)
+        self.bytes_saved += other.bytes_saved
+
+    def summary(self):
+        return (f"{self.blocked_total} blocked / {self.allowed} allowed requests, "
+                f"~{self.bytes_saved / 1_000_000:.1f} MB saved")
+
+
+class NetworkPolicy:
+    """
+    Request-interception policy for Playwright contexts:
+    - aborts requests whose resource type is in blocked_resource_types
+    - aborts requests whose URL matches any blocked_url_patterns regex
+    - allowed_url_patterns always win, so data endpoints are never blocked
+    """
+
+    def __init__(self, blocked_resource_types=(), blocked_url_patterns=(), allowed_url_patterns=(),
+                 estimated_bytes=None, enabled=True):
+        self.enabled = enabled
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.blocked_url_re = re.compile("|".join(blocked_url_patterns)) if blocked_url_patterns else None
+        self.allowed_url_re = re.compile("|".join(allowed_url_patterns)) if allowed_url_patterns else None
+        self.estimated_bytes = {**DEFAULT_ESTIMATED_BYTES, **(estimated_bytes or {})}
+        self.totals = BlockStats()
+
+    @classmethod
+    def from_config(cls, params):
+        params = params or {}
+        return cls(
+            blocked_resource_types=params.get("blocked_resource_types", []),
+            blocked_url_patterns=params.get("blocked_url_patterns", []),
+            allowed_url_patterns=params.get("allowed_url_patterns", []),
+            estimated_bytes=params.get("estimated_bytes"),
+            enabled=params.get("enabled", True),
+        )
+
+    def should_block(self, resource_type, url):
+        if self.allowed_url_re and self.allowed_url_re.search(url):
+            return False
+        if resource_type in self.blocked_resource_types:
+            return True
+        return bool(self.blocked_url_re and self.blocked_url_re.search(url))
+
+    def _record(self, stats, request):
+        if self.should_block(request.resource_type, request.url):
+            stats.blocked[request.resource_type] += 1
+            stats.bytes_saved += self.estimated_bytes.get(request.resource_type, self.estimated_bytes["other"])
+            return True
+        stats.allowed += 1
+        return False
+
+    def _on_close(self, stats):
+        self.totals.add(stats)
+        log.info(f"🛡️ Network policy: {stats.summary()}")
+
+    def attach(self, context):
+        """Install the policy on a sync_playwright context. Returns the context's BlockStats."""
+        stats = BlockStats()
+        if not self.enabled:
+            return stats
+
+        def handle(route, request):
+            if self._record(stats, request):
+                route.abort()
+            else:
+                route.continue_()
+
+        context.route("**/*", handle)
+        context.on("close", lambda _: self._on_close(stats))
+        return stats
+
+    async def attach_async(self, context):
+        """async_playwright version of attach."""
+        stats = BlockStats()
+        if not self.enabled:
+            return stats
+
+        async def handle(route, request):
+            if self._record(stats, request):
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await context.route("**/*", handle)
+        context.on("close", lambda _: self._on_close(stats))
+        return stats
@@ -0,0 +1,175 @@
+import asyncio
+import itertools
+import logging
+import time
+
+from playwright.async_api import async_playwright
+
+from adaptive import AimdController
+from instrumentation import tracer
+from place_details import (
+    ADDRESS_BUTTON_SELECTOR, PHONE_BUTTON_SELECTOR, PLACE_DETAILS_SELECTOR, found_details, parse_address_label,
+    parse_phone_label
+)
+from readiness import wait_for_selector_async
+
+log = logging.getLogger(__name__)
+
+
+async def extract_location_async(page, url, max_attempts=3, place_timeout=10):
+    """Async equivalent of extract_location_from_url for an already-open page."""
+    phone_number = "-"
+    address = "-"
+
+    for attempt in range(max_attempts):
+        try:
+            await page.goto(url, timeout=60000)
+            tracer.count("pages_loaded")
+            log.debug(f"🔍 Visiting: {url}")
+            await wait_for_selector_async(page, PLACE_DETAILS_SELECTOR, place_timeout)
+
+            address_button = await page.query_selector(ADDRESS_BUTTON_SELECTOR)
+            if address_button:
+                address = parse_address_label(await address_button.get_attribute("aria-label")) or address
+                log.debug(f"📫 Address found: {address}")
+            else:
+                log.warning(f"⚠️ Address button not found on attempt {attempt + 1}")
+
+            for button in await page.query_selector_all(PHONE_BUTTON_SELECTOR):
+                phone = parse_phone_label(await button.get_attribute("aria-label"))
+                if phone is not None:
+                    phone_number = phone
+                    log.debug(f"📞 Phone number: {phone_number}")
+                    break
+            if phone_number == "-":
+                log.warning(f"⚠️ Phone number not found on attempt {attempt + 1}")
+
+            # If address or phone found, we can break early
+            if address != "-" or phone_number != "-":
+                break
+
+        except Exception as e:
+            log.error(f"[ERROR - Attempt {attempt + 1}] Failed scraping {url}: {e}")
+
+    return (url, address, phone_number)
+
+
+class AsyncBrowserSet:
+    """A small set of browsers shared round-robin by many concurrent pages."""
+
+    def __init__(self, p, setup_fn, size):
+        self.p = p
+        self.setup_fn = setup_fn
+        self.browsers = [None] * size
+        self.lock = asyncio.Lock()
+        self._next = itertools.cycle(range(size))
+
+    async def new_context(self):
+        slot = next(self._next)
+        async with self.lock:
+            browser = self.browsers[slot]
+            if browser is None or not browser.is_connected():
+                if browser is not None:
+                    log.error(f"💥 Browser {slot} disconnected — relaunching")
+                browser, context, page = await self.setup_fn(self.p)
+                await context.close()
+                self.browsers[slot] = browser
+        _, context, page = await self.setup_fn(self.p, browser)
+        return context, page
+
+    async def close(self):
+        for browser in self.browsers:
+            if browser is not None and browser.is_connected():
+                await browser.close()
+
+
+class AsyncPhase2Engine:
+    """
+    Long-lived async Phase 2 scraper: pages in flight across a small browser set follow
+    controller.limit (fixed at `concurrency` without a controller), submissions are paced by
+    the controller, and each href gets its own context plus an overall timeout.
+    """
+
+    def __init__(self, setup_fn, browsers=2, concurrency=32, url_timeout=120, max_attempts=3, place_timeout=10,
+                 controller=None):
+        self.setup_fn = setup_fn
+        self.browsers = max(1, browsers)
+        self.controller = controller or AimdController("phase2", concurrency, concurrency)
+        self.url_timeout = url_timeout
+        self.max_attempts = max_attempts
+        self.place_timeout = place_timeout
+        self.playwright = None
+        self.browser_set = None
+        self.slots = None
+        self.in_flight = 0
+
+    async def start(self):
+        self.playwright = await async_playwright().start()
+        self.browser_set = AsyncBrowserSet(self.playwright, self.setup_fn, self.browsers)
+        self.slots = asyncio.Condition()
+        return self
+
+    async def _acquire(self):
+        async with self.slots:
+            await self.slots.wait_for(lambda: self.in_flight < self.controller.limit)
+            self.in_flight += 1
+        delay = self.controller.next_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _release(self):
+        async with self.slots:
+            self.in_flight -= 1
+            self.slots.notify_all()
+
+    async def fetch(self, url):
+        """(href, full_address, phone_number) for one place URL; (url, None, None) on failure."""
+        await self._acquire()
+        started = time.monotonic()
+        result = (url, None, None)
+        context = None
+        with tracer.span("phase2.visit") as span:
+            try:
+                context, page = await self.browser_set.new_context()
+                result = await asyncio.wait_for(
+                    extract_location_async(page, url, self.max_attempts, self.place_timeout), timeout=self.url_timeout
+                )
+                return result
+            except asyncio.TimeoutError:
+                log.warning(f"⏱️ Timed out after {self.url_timeout}s: {url}")
+                return result
+            except Exception as e:
+                log.error(f"❌ Error extracting from {url}: {e}")
+                return result
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                span["ok"] = found_details(result)
+                self.controller.record(time.monotonic() - started, span["ok"])
+                await self._release()
+
+    async def close(self):
+        log.info(f"🎚️ {self.controller.summary()}")
+        if self.browser_set is not None:
+            await self.browser_set.close()
+        if self.playwright is not None:
+            await self.playwright.stop()
+
+
+async def run_phase2_async(hrefs, setup_fn, browsers=2, concurrency=32, url_timeout=120, max_attempts=3,
+                           place_timeout=10, controller=None):
+    """
+    Scrape place details for every href with up to `concurrency` pages (or controller.limit) in flight
+    across `browsers` browsers. Returns (href, full_address, phone_number) tuples
+    in the same order as hrefs.
+    """
+    engine = await AsyncPhase2Engine(
+        setup_fn, browsers, concurrency, url_timeout, max_attempts, place_timeout, controller
+    ).start()
+    try:
+        return await asyncio.gather(*(engine.fetch(url) for url in hrefs))
+    finally:
+        await engine.close()
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import queue
+import threading
+
+import pandas as pd
+
+from adaptive import AdaptivePool, AimdController
+from location_index import resolve_locations
+from phase2_async import AsyncPhase2Engine
+from place_details import found_details, known_details, merge_details
+
+log = logging.getLogger(__name__)
+
+
+class ProcessDetailExecutor:
+    """
+    Phase 2 on a multiprocessing Pool: one href per task, results delivered via callback.
+    Tasks in flight follow the controller (a plain fixed-size pool when given a process count).
+    """
+
+    def __init__(self, fn, controller):
+        self.fn = fn
+        self.controller = controller if isinstance(controller, AimdController) else AimdController("phase2", controller, controller)
+        self.pool = None
+
+    def start(self):
+        self.pool = AdaptivePool(self.controller, is_ok=found_details).start()
+
+    def submit(self, href, callback):
+        self.pool.submit(self.fn, href, callback, (href, None, None))
+
+    def close(self):
+        self.pool.close()
+
+
+class AsyncDetailExecutor:
+    """Phase 2 on the async engine, running its own event loop in a background thread."""
+
+    def __init__(self, engine_kwargs):
+        self.engine_kwargs = engine_kwargs
+        self.engine = None
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.engine = asyncio.run_coroutine_threadsafe(
+            AsyncPhase2Engine(**self.engine_kwargs).start(), self.loop
+        ).result()
+
+    def submit(self, href, callback):
+        future = asyncio.run_coroutine_threadsafe(self.engine.fetch(href), self.loop)
+        future.add_done_callback(
+            lambda f: callback((href, None, None) if f.exception() else f.result())
+        )
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.engine.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+def run_streaming_pipeline(
+        query_jobs,
+        search_fn,
+        detail_executor,
+        location_index,
+        phase1_out,
+        final_out,
+        phase1_processes=2,
+        phase1_controller=None,
+        max_pending=64,
+        listing_queue_size=4,
+        batch_size=100,
+        detail_cache=None,
+        spatial_index=None
+    ):
+    """
+    Phase 1 → Phase 2 → Phase 3 without barriers:
+    - each finished query's listings are appended to phase1_out and their new hrefs
+      go straight to the detail executor (at most max_pending in flight)
+    - each resolved href releases the listing rows waiting on it
+    - rows are location-enriched in batches of batch_size (coordinates first when a spatial_index
+      is given, see location_index.resolve_locations) and appended to final_out
+    phase1_out / final_out are storage appenders (CsvAppender or ParquetAppender).
+    Phase 1 queries in flight follow phase1_controller (fixed at phase1_processes without one).
+    Memory is bounded by the listing queue, the Phase 1 jobs submitted but not yet consumed (at most the
+    controller's max_limit), the in-flight hrefs and one output batch;
+    only the place_key -> (address, phone) map grows with the number of unique places.
+    Phase 2 is deduplicated on place_key, so an href variant of an already-seen place is never visited,
+    and places with a fresh entry in detail_cache, or whose listing already carries a high-confidence
+    address and phone (card fields, captured search responses), are not visited at all.
+    A place listed twice for the same channel and district (overlapping map tiles) is kept once.
+    """
+    listings = queue.Queue(maxsize=listing_queue_size)
+    results = queue.SimpleQueue()
+
+    details = {}     # place_key -> (full_address, phone_number)
+    waiting = {}     # place_key -> listing rows waiting for its details
+    submitted = {}   # href in flight -> place_key
+    listed = set()   # (place_key, channel, district) already emitted, e.g. from an overlapping tile
+    hrefs_seen = set()
+    buffer = []
+    in_flight = 0
+
+    # Fork every worker process before any helper thread exists
+    phase1_pool = AdaptivePool(phase1_controller or AimdController("phase1", phase1_processes, phase1_processes)).start()
+    detail_executor.start()
+
+    def feed_listings():
+        # listings.put blocks while Phase 2 catches up, which holds back further Phase 1 submissions
+        window = phase1_pool.controller.max_limit
+        for records in phase1_pool.imap_unordered(search_fn, query_jobs, error_result=[], window=window):
+            listings.put(records)
+        phase1_pool.close()
+        listings.put(None)
+
+    def flush():
+        if not buffer:
+            return
+        df = pd.DataFrame(buffer)
+        df = df.join(resolve_locations(df, location_index, spatial_index))
+        final_out.append(df)
+        log.info(f"💾 Appended {len(df)} rows ({final_out.rows} total)")
+        buffer.clear()
+
+    def emit(record, address, phone_number):
+        buffer.append({
+            **record,
+            "full_address": merge_details(record.get("full_address"), address),
+            "phone_number": merge_details(record.get("phone_number"), phone_number),
+        })
+        if len(buffer) >= batch_size:
+            flush()
+
+    def handle_detail(result):
+        nonlocal in_flight
+        href, address, phone_number = result
+        in_flight -= 1
+        key = submitted.pop(href)
+        details[key] = (address, phone_number)
+        if detail_cache:
+            detail_cache.put(key, href, address, phone_number)
+        for record in waiting.pop(key, []):
+            emit(record, address, phone_number)
+
+    def handle_listing(records):
+        nonlocal in_flight
+        fresh = []
+        for record in records:
+            key = record["place_key"]
+            if key is not None:
+                listing = (key, record["searched_channel"], record["searched_district"])
+                if listing in listed:
+                    continue
+                listed.add(listing)
+            fresh.append(record)
+        phase1_out.append(pd.DataFrame(fresh))
+        for record in fresh:
+            href, key = record["href"], record["place_key"]
+            if not isinstance(href, str):
+                emit(record, None, None)
+                continue
+            hrefs_seen.add(href)
+            if key in details:
+                emit(record, *details[key])
+            elif key in waiting:
+                waiting[key].append(record)
+            elif href in submitted:
+                waiting[submitted[href]].append(record)
+            elif known := known_details(record.get("full_address"), record.get("phone_number"),
+                                        record.get("address_confidence"), record.get("phone_confidence")):
+                details[key] = known
+                emit(record, *known)
+            elif detail_cache and (cached := detail_cache.get(key)):
+                details[key] = cached
+                emit(record, *cached)
+            else:
+                while in_flight >= max_pending:
+                    handle_detail(results.get())
+                waiting[key] = [record]
+                submitted[href] = key
+                in_flight += 1
+                detail_executor.submit(href, results.put)
+
+    feeder = threading.Thread(target=feed_listings, daemon=True)
+    feeder.start()
+
+    phase1_done = False
+    while not phase1_done or in_flight:
+        while True:
+            try:
+                handle_detail(results.get_nowait())
+            except queue.Empty:
+                break
+        if phase1_done:
+            if in_flight:
+                handle_detail(results.get())
+            continue
+        try:
+            records = listings.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if records is None:
+            phase1_done = True
+            places = len(details) + in_flight  # includes cache hits
+            log.info(f"✅ Phase 1 finished: {phase1_out.rows} listings, {len(hrefs_seen)} unique hrefs → {places} unique places "
+                     f"({len(hrefs_seen) - places} Phase 2 visits avoided)")
+        else:
+            handle_listing(records)
+
+    flush()
+    feeder.join()
+    detail_executor.close()
+    if detail_cache:
+        detail_cache.close()
+        log.info(f"🗄️ Detail cache: {detail_cache.summary()}")
+    log.info(f"✅ All done. {final_out.rows} rows saved")
@@ -0,0 +1,49 @@
+import re
+
+# Phase 2 place page selectors
+ADDRESS_BUTTON_SELECTOR = '//button[@data-item-id="address"]'
+PHONE_BUTTON_SELECTOR = '//button[@data-tooltip="Copy phone number"]'
+# Either button attached means the place panel has rendered its contact rows
+PLACE_DETAILS_SELECTOR = f"{ADDRESS_BUTTON_SELECTOR} | {PHONE_BUTTON_SELECTOR}"
+
+
+def parse_address_label(aria_label):
+    """'Address: 1, Jalan ...' -> '1, Jalan ...' (None if the label is not an address)."""
+    if aria_label and "Address:" in aria_label:
+        return aria_label.replace("Address:", "").strip()
+    return None
+
+
+def parse_phone_label(aria_label):
+    """'Phone: 07-123 4567' -> '071234567' (None if the label is not a phone number)."""
+    if aria_label and "Phone:" in aria_label:
+        phone_number = aria_label.replace("Phone:", "").strip()
+        return re.sub(r"[^+\d]", "", phone_number)
+    return None
+
+
+def known_details(address, phone_number, address_confidence="high", phone_confidence="high"):
+    """
+    (address, phone_number) when Phase 1 already supplied both with high confidence,
+    else None (the place still needs a Phase 2 visit).
+    """
+    if address_confidence == "high" and phone_confidence == "high" and all(
+        isinstance(v, str) and v not in ("", "-") for v in (address, phone_number)
+    ):
+        return (address, phone_number)
+    return None
+
+
+def merge_details(card_value, visited_value):
+    """Phase 2 value when the visit found one, else whatever Phase 1 harvested."""
+    if isinstance(visited_value, str) and visited_value not in ("", "-"):
+        return visited_value
+    if isinstance(card_value, str) and card_value:
+        return card_value
+    return visited_value
+
+
+def found_details(result):
+    """True if a Phase 2 (href, address, phone_number) result found anything (False also covers block/consent pages)."""
+    _, address, phone_number = result
+    return address is not None and (address != "-" or phone_number != "-")
@@ -0,0 +1,61 @@
+import re
+
+import pandas as pd
+
+# Maps place URLs carry the feature ID as "!1s0x<cell>:0x<feature>" in the data= segment
+FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)")
+
+
+def normalise_name(name):
+    return re.sub(r"\s+", " ", str(name)).strip().lower()
+
+
+def place_key(href, name=None, latitude=None, longitude=None):
+    """
+    Canonical key for a place, independent of query noise (rclk, authuser, hl, ...):
+    - "0x...:0x..." feature ID when the URL has one
+    - otherwise "name@lat,lon" (coordinates rounded to ~1 m)
+    - otherwise the href without its query string
+    """
+    if isinstance(href, str):
+        match = FEATURE_ID_RE.search(href)
+        if match:
+            return match.group(1).lower()
+
+    if isinstance(name, str) and pd.notna(latitude) and pd.notna(longitude):
+        return f"{normalise_name(name)}@{float(latitude):.5f},{float(longitude):.5f}"
+
+    if isinstance(href, str):
+        return href.split("?", 1)[0]
+    return None
+
+
+def add_place_key(df):
+    """Add a place_key column computed from href, name and coordinates."""
+    df["place_key"] = [
+        place_key(href, name, lat, lon)
+        for href, name, lat, lon in zip(df["href"], df["name"], df["latitude"], df["longitude"])
+    ]
+    return df
+
+
+def unique_places(df):
+    """
+    One row (the first seen) per place_key among rows with an href, plus dedup stats:
+    (places_df, unique_hrefs, visits_avoided).
+    """
+    with_href = df.dropna(subset=["href"])
+    places = with_href.drop_duplicates("place_key")
+    unique_hrefs = with_href["href"].nunique()
+    return places, unique_hrefs, unique_hrefs - len(places)
+
+
+LISTING_KEY = ["place_key", "searched_channel", "searched_district"]
+
+
+def dedup_listings(df):
+    """One listing per place per channel/district, e.g. across overlapping map tiles (keyless rows are kept)."""
+    if df.empty:
+        return df
+    keyed = df["place_key"].notna()
+    return df[~keyed | ~df.duplicated(LISTING_KEY)].reset_index(drop=True)
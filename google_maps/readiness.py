@@ -0,0 +1,55 @@
+import time
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+# Event-driven waits used in place of fixed sleeps. All timeouts are in seconds.
+
+
+def poll_until(predicate, timeout, interval=0.2):
+    """Call predicate until it returns something truthy or timeout passes. Returns its last value."""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = predicate()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(interval)
+
+
+def wait_for_selector(page, selector, timeout):
+    """page.wait_for_selector that returns None instead of raising when the deadline passes."""
+    try:
+        return page.wait_for_selector(selector, state="attached", timeout=timeout * 1000)
+    except PlaywrightTimeoutError:
+        return None
+
+
+def wait_for_any(page, selectors, timeout):
+    """
+    Wait until any of selectors is attached; False at the deadline. Each selector may use its own engine
+    (XPath, CSS, role=...), unlike an XPath "a | b" union.
+    """
+    locator = page.locator(selectors[0])
+    for selector in selectors[1:]:
+        locator = locator.or_(page.locator(selector))
+    try:
+        locator.first.wait_for(state="attached", timeout=timeout * 1000)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def wait_for_network_idle(page, timeout):
+    """Wait for Playwright's networkidle state; False if the page is still busy at the deadline."""
+    try:
+        page.wait_for_load_state("networkidle", timeout=timeout * 1000)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+async def wait_for_selector_async(page, selector, timeout):
+    """async_playwright version of wait_for_selector."""
+    try:
+        return await page.wait_for_selector(selector, state="attached", timeout=timeout * 1000)
+    except PlaywrightTimeoutError:
+        return None
@@ -0,0 +1,89 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from location_index import LOCATION_COLUMNS
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def to_unit_xyz(latitudes, longitudes):
+    """Lat/lon in degrees -> points on the unit sphere, so Euclidean KD-tree distance tracks great-circle distance."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def km_to_chord(km):
+    return 2 * np.sin(km / (2 * EARTH_RADIUS_KM))
+
+
+class SpatialIndex:
+    """
+    KD-tree over postcode/area centroids (postcode_centroids.csv: postcode, state, district, area,
+    latitude, longitude). lookup() resolves whole coordinate columns at once: the nearest centroid
+    within max_distance_km, or nothing.
+    """
+
+    def __init__(self, centroids, max_distance_km=5.0):
+        centroids = centroids.dropna(subset=["latitude", "longitude"]).reset_index(drop=True)
+        self.centroids = centroids
+        self.values = {col: centroids[col].astype(object).where(centroids[col].notna(), None).to_numpy()
+                       for col in LOCATION_COLUMNS}
+        self.tree = cKDTree(to_unit_xyz(centroids["latitude"], centroids["longitude"]))
+        self.max_distance_km = max_distance_km
+
+    @classmethod
+    def from_csv(cls, path, max_distance_km=5.0):
+        return cls(pd.read_csv(path, dtype={"postcode": str}), max_distance_km)
+
+    def lookup(self, latitudes, longitudes):
+        """
+        DataFrame of postcode/state/district/area plus distance_km, aligned to the inputs.
+        Rows without coordinates, or further than max_distance_km from any centroid, are all None.
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        n = len(latitudes)
+        out = {col: np.full(n, None, dtype=object) for col in LOCATION_COLUMNS}
+        distance = np.full(n, np.nan)
+
+        has_coords = np.flatnonzero(~np.isnan(latitudes) & ~np.isnan(longitudes))
+        if len(has_coords) and len(self.centroids):
+            chord, nearest = self.tree.query(
+                to_unit_xyz(latitudes[has_coords], longitudes[has_coords]),
+                distance_upper_bound=km_to_chord(self.max_distance_km),
+            )
+            found = np.isfinite(chord)
+            rows, nearest = has_coords[found], nearest[found]
+            for col in LOCATION_COLUMNS:
+                out[col][rows] = self.values[col][nearest]
+            distance[rows] = chord_to_km(chord[found])
+
+        df = pd.DataFrame(out, columns=LOCATION_COLUMNS)
+        df["distance_km"] = distance
+        return df
+
+
+def build_centroids(df):
+    """
+    Centroid table from already-resolved rows (e.g. a previous gm_with_extracted_location):
+    median coordinates per postcode/state/district/area.
+    """
+    df = df.dropna(subset=["latitude", "longitude", "postcode"])
+    df = df.astype({"postcode": str})
+    return df.groupby(LOCATION_COLUMNS, dropna=False)[["latitude", "longitude"]].median().reset_index()
+
+
+if __name__ == "__main__":
+    # Bootstrap the centroid file from a resolved dataset:
+    # python spatial_index.py data/gm_with_extracted_location.csv postcode_centroids.csv
+    centroids = build_centroids(pd.read_csv(sys.argv[1], dtype={"postcode": str}))
+    centroids.to_csv(sys.argv[2], index=False)
+    print(f"✅ Wrote {len(centroids)} centroids to {sys.argv[2]}")
@@ -0,0 +1,159 @@
+import logging
+import os
+import shutil
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+log = logging.getLogger(__name__)
+
+# Column types shared by every Maps dataset; anything not listed is stored as string
+COLUMN_TYPES = {
+    "rating": pa.float64(),
+    "latitude": pa.float64(),
+    "longitude": pa.float64(),
+}
+PARTITION_COLUMNS = ["run_date", "searched_state", "searched_channel"]
+
+
+def arrow_schema(columns):
+    return pa.schema([(c, COLUMN_TYPES.get(c, pa.string())) for c in columns])
+
+
+def _partitioning(columns):
+    return ds.partitioning(pa.schema([(c, pa.string()) for c in columns]), flavor="hive")
+
+
+class CsvAppender:
+    """Appends DataFrames to one CSV, truncating it and writing the header on the first call."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def append(self, df):
+        if df.empty:
+            return
+        df.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        self.rows += len(df)
+
+
+class CsvStore:
+    """Intermediate datasets as data/<name>.csv (the original layout)."""
+
+    def __init__(self, root="data"):
+        self.root = root
+
+    def path(self, name):
+        return os.path.join(self.root, f"{name}.csv")
+
+    def write(self, name, df):
+        os.makedirs(self.root, exist_ok=True)
+        df.to_csv(self.path(name), index=False)
+
+    def read(self, name, columns=None):
+        return pd.read_csv(self.path(name), usecols=columns)
+
+    def columns(self, name):
+        return list(pd.read_csv(self.path(name), nrows=0).columns)
+
+    def appender(self, name):
+        return CsvAppender(self.path(name))
+
+    def export_csv(self, name, path):
+        if os.path.abspath(path) != os.path.abspath(self.path(name)):
+            shutil.copyfile(self.path(name), path)
+
+
+class ParquetStore:
+    """
+    Intermediate datasets as Parquet under data/<name>/, hive-partitioned by run date,
+    state and channel (where the dataset has them):
+    - every append adds new files, existing ones are never rewritten
+      (write/appender replace this run's partition on first use, like the CSV layout does)
+    - reads pick only the requested columns and this run's partition
+    """
+
+    def __init__(self, root="data", run_date=None):
+        self.root = root
+        self.run_date = run_date or time.strftime("%Y-%m-%d")
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def append(self, name, df):
+        if df.empty:
+            return
+        df = df.assign(run_date=self.run_date)
+        partition_cols = [c for c in PARTITION_COLUMNS if c in df.columns]
+        for c in df.columns:
+            if c in partition_cols:
+                df[c] = df[c].fillna("unknown").astype(str)
+            elif c not in COLUMN_TYPES:
+                df[c] = df[c].where(df[c].isna(), df[c].astype(str))
+        table = pa.Table.from_pandas(df, schema=arrow_schema(df.columns), preserve_index=False)
+        ds.write_dataset(
+            table,
+            self.path(name),
+            format="parquet",
+            partitioning=_partitioning(partition_cols),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    def clear(self, name):
+        """Drop this run's partition so a re-run replaces rather than duplicates it."""
+        shutil.rmtree(os.path.join(self.path(name), f"run_date={self.run_date}"), ignore_errors=True)
+
+    def write(self, name, df):
+        self.clear(name)
+        self.append(name, df)
+
+    def read(self, name, columns=None):
+        dataset = ds.dataset(self.path(name), format="parquet", partitioning="hive")
+        partition_cols = [c for c in PARTITION_COLUMNS if c in dataset.schema.names]
+        dataset = ds.dataset(self.path(name), format="parquet", partitioning=_partitioning(partition_cols))
+        table = dataset.to_table(columns=columns, filter=ds.field("run_date") == self.run_date)
+        df = table.to_pandas()
+        return df.drop(columns="run_date", errors="ignore") if columns is None or "run_date" not in columns else df
+
+    def columns(self, name):
+        schema = ds.dataset(self.path(name), format="parquet", partitioning="hive").schema
+        return [c for c in schema.names if c != "run_date"]
+
+    def appender(self, name):
+        return ParquetAppender(self, name)
+
+    def export_csv(self, name, path):
+        """Optional final step: this run's dataset as a single CSV."""
+        df = self.read(name)
+        df.to_csv(path, index=False)
+        log.info(f"📤 Exported {len(df)} rows to {path}")
+
+
+class ParquetAppender:
+    """Same interface as CsvAppender above, appending row groups to a ParquetStore dataset."""
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+        self.rows = 0
+
+    def append(self, df):
+        if df.empty:
+            return
+        if not self.rows:
+            self.store.clear(self.name)
+        self.store.append(self.name, df)
+        self.rows += len(df)
+
+
+def store_from_config(params):
+    params = params or {}
+    if params.get("format", "csv") == "parquet":
+        return ParquetStore(params.get("root", "data"), params.get("run_date"))
+    return CsvStore(params.get("root", "data"))
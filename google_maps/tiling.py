@@ -0,0 +1,49 @@
+import math
+
+from collections import namedtuple
+from urllib.parse import quote
+
+Tile = namedtuple("Tile", ["south", "west", "north", "east", "depth"])
+
+
+def grid(bbox, rows, cols):
+    """Split a [south, west, north, east] bounding box into rows x cols depth-0 tiles."""
+    south, west, north, east = bbox
+    dlat = (north - south) / rows
+    dlon = (east - west) / cols
+    return [
+        Tile(south + r * dlat, west + c * dlon, south + (r + 1) * dlat, west + (c + 1) * dlon, 0)
+        for r in range(rows) for c in range(cols)
+    ]
+
+
+def subdivide(tile):
+    """Four quadrant tiles one level deeper."""
+    mid_lat = (tile.south + tile.north) / 2
+    mid_lon = (tile.west + tile.east) / 2
+    depth = tile.depth + 1
+    return [
+        Tile(tile.south, tile.west, mid_lat, mid_lon, depth),
+        Tile(tile.south, mid_lon, mid_lat, tile.east, depth),
+        Tile(mid_lat, tile.west, tile.north, mid_lon, depth),
+        Tile(mid_lat, mid_lon, tile.north, tile.east, depth),
+    ]
+
+
+def zoom_for(tile, viewport=(1920, 1080)):
+    """Largest integer web-mercator zoom whose viewport still covers the whole tile."""
+    width, height = viewport
+    lat_rad = math.radians((tile.south + tile.north) / 2)
+    dlon = max(tile.east - tile.west, 1e-6)
+    dlat = max((tile.north - tile.south) / math.cos(lat_rad), 1e-6)  # mercator stretch away from the equator
+    zoom_x = math.log2(360 * width / (256 * dlon))
+    zoom_y = math.log2(360 * height / (256 * dlat))
+    return max(1, min(21, math.floor(min(zoom_x, zoom_y))))
+
+
+def tile_url(channel, tile, viewport=(1920, 1080)):
+    """Maps search URL for `channel` scoped to the tile's viewport (the @lat,lon,zoom form)."""
+    lat = (tile.south + tile.north) / 2
+    lon = (tile.west + tile.east) / 2
+    return (f"https://www.google.com/maps/search/{quote(channel)}/"
+            f"@{lat:.6f},{lon:.6f},{zoom_for(tile, viewport)}z?hl=en")
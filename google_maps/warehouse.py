@@ -0,0 +1,200 @@
+import gzip
+import io
+import logging
+import time
+import uuid
+
+import pandas as pd
+
+from instrumentation import tracer
+
+log = logging.getLogger(__name__)
+
+# VARCHAR widths are rounded up to one of these so small growth doesn't force an ALTER
+VARCHAR_BUCKETS = [16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65535]
+
+
+def varchar_width(series):
+    """Smallest bucket that fits the longest UTF-8 encoded value in series."""
+    values = series.dropna().astype(str)
+    longest = int(values.map(lambda v: len(v.encode("utf-8"))).max()) if len(values) else 0
+    return next((b for b in VARCHAR_BUCKETS if b >= longest), VARCHAR_BUCKETS[-1])
+
+
+def infer_column_types(df):
+    """Right-sized Redshift/PostgreSQL column types for df (column -> SQL type)."""
+    column_types = {}
+    for col_name in df.columns:
+        dtype = df[col_name].dtype
+        if col_name == "extract_date":
+            column_types[col_name] = "DATE"
+        elif isinstance(dtype, pd.DatetimeTZDtype):
+            column_types[col_name] = "TIMESTAMPTZ"
+        elif pd.api.types.is_datetime64_dtype(dtype):
+            column_types[col_name] = "TIMESTAMP"
+        elif pd.api.types.is_bool_dtype(dtype):
+            column_types[col_name] = "BOOLEAN"
+        elif pd.api.types.is_integer_dtype(dtype):
+            column_types[col_name] = "BIGINT"
+        elif pd.api.types.is_float_dtype(dtype):
+            column_types[col_name] = "FLOAT8"
+        else:
+            column_types[col_name] = f"VARCHAR({varchar_width(df[col_name])})"
+    return column_types
+
+
+def write_chunks(df, chunk_rows=500_000):
+    """Yield gzip-compressed, header-less CSV chunks of df (so they can be concatenated into one COPY)."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode="wb") as gz:
+            text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+            df.iloc[start:start + chunk_rows].to_csv(text, header=False, index=False, na_rep="")
+            text.flush()
+            text.detach()
+        yield buf.getvalue()
+
+
+def _raw_connection(conn):
+    """DBAPI connection behind a SQLAlchemy engine/connection, or conn itself."""
+    if hasattr(conn, "raw_connection"):
+        return conn.raw_connection()
+    if hasattr(conn, "connection"):
+        return conn.connection
+    return conn
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+# One output row per place per searched channel and district
+KEY_COLUMNS = ("place_key", "searched_channel", "searched_district")
+
+
+class BulkLoader:
+    """
+    COPY-based warehouse loader:
+    - df is written as gzip CSV chunks
+    - transport "s3": chunks are uploaded under one S3 prefix and loaded with a single Redshift COPY
+    - transport "stdin": chunks are streamed through a single COPY FROM STDIN (local PostgreSQL)
+    - rows land in a staging table first, then replace target rows with the same key_columns in one transaction
+    key_columns is the table grain: one row per place x searched_channel x searched_district by default.
+    Rows repeating a key within one load are collapsed to the last one before COPY.
+    """
+
+    def __init__(self, transport="s3", s3_bucket=None, s3_prefix="google_maps/load", iam_role=None,
+                 region=None, endpoint_url=None, chunk_rows=500_000, key_columns=KEY_COLUMNS):
+        self.transport = transport
+        self.s3_bucket = s3_bucket
+        self.s3_prefix = s3_prefix.strip("/")
+        self.iam_role = iam_role
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.chunk_rows = chunk_rows
+        self.key_columns = list(key_columns or [])
+
+    @classmethod
+    def from_config(cls, params):
+        params = params or {}
+        return cls(
+            transport=params.get("transport", "s3"),
+            s3_bucket=params.get("s3_bucket"),
+            s3_prefix=params.get("s3_prefix", "google_maps/load"),
+            iam_role=params.get("iam_role"),
+            region=params.get("region"),
+            endpoint_url=params.get("endpoint_url"),
+            chunk_rows=params.get("chunk_rows", 500_000),
+            key_columns=params.get("key_columns", list(KEY_COLUMNS)),
+        )
+
+    # ---------- DDL ----------
+    def _ensure_table(self, cur, target, table_schema, table_name, column_types):
+        cur.execute(
+            "SELECT column_name, character_maximum_length FROM information_schema.columns "
+            "WHERE table_schema = %s AND table_name = %s",
+            (table_schema, table_name),
+        )
+        existing = dict(cur.fetchall())
+        if not existing:
+            columns = ", ".join(f"{_quote(c)} {t}" for c, t in column_types.items())
+            cur.execute(f"CREATE TABLE {target} ({columns})")
+            log.info(f"🆕 Created {target}")
+            return
+
+        for col, sql_type in column_types.items():
+            if col not in existing:
+                cur.execute(f"ALTER TABLE {target} ADD COLUMN {_quote(col)} {sql_type}")
+            elif sql_type.startswith("VARCHAR") and existing[col] is not None:
+                width = int(sql_type[len("VARCHAR("):-1])
+                if width > existing[col]:
+                    cur.execute(f"ALTER TABLE {target} ALTER COLUMN {_quote(col)} TYPE VARCHAR({width})")
+
+    # ---------- COPY ----------
+    def _copy_s3(self, cur, staging, column_list, chunks):
+        import boto3
+
+        s3 = boto3.client("s3", region_name=self.region, endpoint_url=self.endpoint_url)
+        prefix = f"{self.s3_prefix}/{time.strftime('%Y%m%d')}/{uuid.uuid4().hex}/"
+        for i, chunk in enumerate(chunks):
+            s3.put_object(Bucket=self.s3_bucket, Key=f"{prefix}part-{i:05d}.csv.gz", Body=chunk)
+
+        cur.execute(
+            f"COPY {staging} ({column_list}) FROM 's3://{self.s3_bucket}/{prefix}' "
+            f"IAM_ROLE '{self.iam_role}' FORMAT AS CSV GZIP EMPTYASNULL "
+            f"TIMEFORMAT 'auto' DATEFORMAT 'auto'"
+            + (f" REGION '{self.region}'" if self.region else "")
+        )
+
+    def _copy_stdin(self, cur, staging, column_list, chunks):
+        stream = io.BytesIO(b"".join(gzip.decompress(chunk) for chunk in chunks))
+        cur.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)", stream)
+
+    def load(self, df, table_schema, table_name, conn):
+        """Bulk-load df into table_schema.table_name, replacing rows that share key_columns."""
+        if df.empty:
+            return 0
+        key_columns = [c for c in self.key_columns if c in df.columns]
+        if key_columns:
+            rows = len(df)
+            df = df.drop_duplicates(subset=key_columns, keep="last")
+            if len(df) < rows:
+                log.info(f"🧹 Dropped {rows - len(df)} rows repeating a {'/'.join(key_columns)} key")
+
+        column_types = infer_column_types(df)
+        target = f"{_quote(table_schema)}.{_quote(table_name)}"
+        staging = _quote(f"stage_{table_name}_{uuid.uuid4().hex[:8]}")
+        column_list = ", ".join(_quote(c) for c in df.columns)
+        with tracer.span("warehouse.write_chunks", rows=len(df)) as span:
+            chunks = list(write_chunks(df, self.chunk_rows))
+            span.update(chunks=len(chunks), bytes=sum(len(c) for c in chunks))
+        tracer.count("warehouse_bytes", sum(len(c) for c in chunks))
+
+        raw = _raw_connection(conn)
+        cur = raw.cursor()
+        try:
+            self._ensure_table(cur, target, table_schema, table_name, column_types)
+            cur.execute(f"CREATE TEMP TABLE {staging} (LIKE {target})")
+
+            started = time.time()
+            with tracer.span("warehouse.copy", transport=self.transport):
+                if self.transport == "stdin":
+                    self._copy_stdin(cur, staging, column_list, chunks)
+                else:
+                    self._copy_s3(cur, staging, column_list, chunks)
+
+            with tracer.span("warehouse.merge"):
+                if key_columns:
+                    match = " AND ".join(f"{target}.{_quote(c)} = {staging}.{_quote(c)}" for c in key_columns)
+                    cur.execute(f"DELETE FROM {target} USING {staging} WHERE {match}")
+                cur.execute(f"INSERT INTO {target} ({column_list}) SELECT {column_list} FROM {staging}")
+                cur.execute(f"DROP TABLE {staging}")
+                raw.commit()
+            log.info(f"✅ Loaded {len(df)} rows into {target} via {len(chunks)} chunk(s) in "
+                     f"{time.time() - started:.1f}s")
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            cur.close()
+        return len(df)
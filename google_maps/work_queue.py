@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+
+class WorkQueue:
+    """
+    Lease-based job queue in one SQLite file, shared by any number of worker processes/containers:
+    - jobs are enqueued once per (queue, job_key); re-enqueueing the same key is a no-op
+    - claim() hands a pending job to one worker with a lease of lease_seconds
+    - workers extend the lease with heartbeat() while they work (see keep_alive)
+    - expired leases go back to pending on the next claim, or to failed after max_attempts
+    - complete() stores the result once; a late duplicate completion is ignored
+    The default rollback journal is used (not WAL) so the file can live on a volume shared between hosts.
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = self._connect()
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                queue TEXT,
+                job_key TEXT,
+                payload TEXT,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated_at REAL,
+                PRIMARY KEY (queue, job_key)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (queue, status)")
+        self.conn.commit()
+
+    @classmethod
+    def from_config(cls, params):
+        return cls(
+            params.get("path", "data/work_queue.sqlite"),
+            lease_seconds=params.get("lease_seconds", 300),
+            max_attempts=params.get("max_attempts", 3),
+        )
+
+    def _connect(self):
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    @contextmanager
+    def _transaction(self, conn=None):
+        conn = conn or self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, queue, jobs):
+        """jobs: iterable of (job_key, payload). Returns how many were new."""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (queue, job_key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                [(queue, key, json.dumps(payload), now) for key, payload in jobs],
+            )
+            return conn.total_changes - before
+
+    def _requeue_expired(self, conn, queue, now):
+        conn.execute("""
+            UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                lease_owner = NULL, lease_expires = NULL, error = 'lease expired', updated_at = ?
+            WHERE queue = ? AND status = 'leased' AND lease_expires < ?
+        """, (self.max_attempts, now, queue, now))
+
+    def claim(self, queue, worker_id):
+        """(job_key, payload) leased to worker_id, or None if nothing is pending."""
+        now = time.time()
+        with self._transaction() as conn:
+            self._requeue_expired(conn, queue, now)
+            row = conn.execute(
+                "SELECT job_key, payload FROM jobs WHERE queue = ? AND status = 'pending' LIMIT 1", (queue,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("""
+                UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE queue = ? AND job_key = ?
+            """, (worker_id, now + self.lease_seconds, now, queue, row[0]))
+        return row[0], json.loads(row[1])
+
+    def heartbeat(self, queue, job_key, worker_id, conn=None):
+        """Extend the lease; False if worker_id no longer holds it."""
+        now = time.time()
+        with self._transaction(conn) as conn:
+            cur = conn.execute("""
+                UPDATE jobs SET lease_expires = ?, updated_at = ?
+                WHERE queue = ? AND job_key = ? AND status = 'leased' AND lease_owner = ?
+            """, (now + self.lease_seconds, now, queue, job_key, worker_id))
+            return cur.rowcount == 1
+
+    @contextmanager
+    def keep_alive(self, queue, job_key, worker_id):
+        """Heartbeat the lease from a background thread (own connection) for the duration of the block."""
+        stop = threading.Event()
+
+        def beat():
+            conn = self._connect()
+            try:
+                while not stop.wait(self.lease_seconds / 3):
+                    if not self.heartbeat(queue, job_key, worker_id, conn):
+                        log.warning(f"⚠️ Lost lease on {queue}/{job_key}")
+                        break
+            finally:
+                conn.close()
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, queue, job_key, result):
+        """Store the result; False if the job was already done (e.g. finished by a worker whose lease we took over)."""
+        now = time.time()
+        with self._transaction() as conn:
+            cur = conn.execute("""
+                UPDATE jobs SET status = 'done', result = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE queue = ? AND job_key = ? AND status != 'done'
+            """, (json.dumps(result), now, queue, job_key))
+            return cur.rowcount == 1
+
+    def fail(self, queue, job_key, worker_id, error):
+        """Release the lease after an error: back to pending, or failed after max_attempts."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("""
+                UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    lease_owner = NULL, lease_expires = NULL, error = ?, updated_at = ?
+                WHERE queue = ? AND job_key = ? AND status = 'leased' AND lease_owner = ?
+            """, (self.max_attempts, str(error)[:1000], now, queue, job_key, worker_id))
+
+    def counts(self, queue):
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs WHERE queue = ? GROUP BY status", (queue,))
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows.fetchall()))
+        return counts
+
+    def drained(self, queue):
+        """True once nothing in queue is pending or leased (expired leases count as pending)."""
+        with self._transaction() as conn:
+            self._requeue_expired(conn, queue, time.time())
+        counts = self.counts(queue)
+        return counts["pending"] == 0 and counts["leased"] == 0
+
+    def results(self, queue):
+        """(job_key, result) for every finished job in queue."""
+        rows = self.conn.execute("SELECT job_key, result FROM jobs WHERE queue = ? AND status = 'done'", (queue,))
+        for job_key, result in rows:
+            yield job_key, json.loads(result)
+
+    def close(self):
+        self.conn.close()
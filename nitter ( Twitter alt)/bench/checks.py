@@ -0,0 +1,197 @@
+import glob
+import hashlib
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+from urllib.parse import parse_qs, urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from instrumentation import setup_logging
+from media import MediaDownloader, media_key
+from nitter_http import iter_timeline, make_session
+from replay_server import ReplayServer
+from tweet_extract import extract_timeline_from_html
+from watermarks import StopRule, tweet_id
+
+log = logging.getLogger("checks")
+
+# Assertion checks against the replay fixtures; the timing benchmarks in run_bench.py would still "pass"
+# with a broken cursor, a parse that finds nothing or a download that never dedups or resumes.
+# Run from nitter ( Twitter alt)/: python bench/checks.py
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+SEARCH_DIR = os.path.join(FIXTURES_DIR, "nitter", "search")
+PIC_DIR = os.path.join(FIXTURES_DIR, "nitter", "pic")
+# Read straight from the fixture markup, independently of the lxml selectors under test
+TWEET_LINK_RE = re.compile(r'class="tweet-link" href="/[^/"]+/status/(\d+)')
+LOAD_MORE_RE = re.compile(r'cursor=([A-Za-z0-9_-]+)">Load more')
+
+
+def fixture_pages():
+    """[(cursor, tweet ids, next cursor)] following the fixture chain from the first page."""
+    pages, cursor = [], None
+    while True:
+        with open(os.path.join(SEARCH_DIR, f"{cursor or 'first'}.html"), "r", encoding="utf-8") as f:
+            text = f.read()
+        more = LOAD_MORE_RE.search(text)
+        pages.append((cursor, [int(i) for i in TWEET_LINK_RE.findall(text)], more and more.group(1)))
+        if not more:
+            return pages
+        cursor = more.group(1)
+
+
+class RecordingSession:
+    """make_session() wrapper remembering the cursor and Range header of every GET."""
+
+    def __init__(self):
+        self.session = make_session({"user-agent": "nitter-checks"}, {"hlsPlayback": "on"}, retries=0)
+        self.cursors = []
+        self.ranges = []
+
+    def get(self, url, **kwargs):
+        self.cursors.append(parse_qs(urlsplit(url).query).get("cursor", [None])[0])
+        self.ranges.append((kwargs.get("headers") or {}).get("Range"))
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def crawl(server, **kwargs):
+    session = RecordingSession()
+    try:
+        items = list(iter_timeline(session, f"{server.base_url}/search?f=tweets&q=example", **kwargs))
+    finally:
+        session.close()
+    return [tweet_id(item["tweet_link"]) for item in items], session.cursors
+
+
+def check_page_parse(server):
+    """Every fixture page parses to its own tweet ids, in order, and links the next cursor (none on the last)."""
+    for cursor, ids, next_cursor in fixture_pages():
+        assert ids, f"fixture page {cursor} has no tweets"
+        with open(os.path.join(SEARCH_DIR, f"{cursor or 'first'}.html"), "r", encoding="utf-8") as f:
+            items, next_url = extract_timeline_from_html(f.read(), f"{server.base_url}/search?f=tweets&q=example")
+        assert [tweet_id(item["tweet_link"]) for item in items] == ids, f"ids on page {cursor}"
+        found = next_url and parse_qs(urlsplit(next_url).query).get("cursor", [None])[0]
+        assert found == next_cursor, f"page {cursor} links cursor {found}, expected {next_cursor}"
+
+
+def check_cursor_pagination(server):
+    """iter_timeline requests each cursor once, in order, stops after the last page and yields every tweet."""
+    pages = fixture_pages()
+    ids, cursors = crawl(server)
+    assert cursors == [cursor for cursor, _, _ in pages], f"requested cursors {cursors}"
+    assert ids == [i for _, page_ids, _ in pages for i in page_ids], f"{len(ids)} tweets"
+
+
+def check_max_pages(server):
+    pages = fixture_pages()
+    ids, cursors = crawl(server, max_pages=2)
+    assert cursors == [cursor for cursor, _, _ in pages[:2]], f"requested cursors {cursors}"
+    assert ids == pages[0][1] + pages[1][1], f"{len(ids)} tweets"
+
+
+def check_watermark_stop(server):
+    """With the watermark on page 2, paging ends there and only tweets above it are yielded."""
+    pages = fixture_pages()
+    all_ids = [i for _, page_ids, _ in pages for i in page_ids]
+    watermark = pages[1][1][4]
+    ids, cursors = crawl(server, stop_rule=StopRule(watermark))
+    assert cursors == [cursor for cursor, _, _ in pages[:2]], f"requested cursors {cursors}"
+    assert ids == [i for i in all_ids[:len(pages[0][1]) + len(pages[1][1])] if i > watermark], f"{len(ids)} tweets"
+
+
+def fixture_pics():
+    """{sha256: [fixture image names]} for the replayed /pic/ files."""
+    pics = {}
+    for path in sorted(glob.glob(os.path.join(PIC_DIR, "*.jpg"))):
+        with open(path, "rb") as f:
+            pics.setdefault(hashlib.sha256(f.read()).hexdigest(), []).append(os.path.basename(path)[:-len(".jpg")])
+    return pics
+
+
+def pic_url(server, name):
+    return f"{server.base_url}/pic/media%2F{name}.jpg"
+
+
+def with_downloader(check):
+    """Run check(server, media, session) with a fresh media store."""
+    def run(server):
+        root = tempfile.mkdtemp(prefix="nitter-media-")
+        session = RecordingSession()
+        media = MediaDownloader(session, root=root, workers=2)
+        try:
+            check(server, media, session)
+        finally:
+            media.close()
+            session.close()
+            shutil.rmtree(root, ignore_errors=True)
+    run.__name__ = check.__name__
+    return run
+
+
+def stored_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@with_downloader
+def check_media_dedup(server, media, session):
+    """Two URLs with the same bytes are stored once, under their content hash; a known URL is not fetched again."""
+    sha256, names = next((sha, names) for sha, names in fixture_pics().items() if len(names) > 1)
+    first, second = (media.fetch(pic_url(server, name)) for name in names[:2])
+    assert first == second, f"{first} != {second}"
+    assert os.path.basename(first).startswith(sha256), first
+    assert stored_sha256(first) == sha256, "stored bytes differ from the fixture"
+    files = [n for folder, _, files in os.walk(media.root) if ".partial" not in folder
+             for n in files if not n.startswith("index.sqlite")]
+    assert files == [os.path.basename(first)], f"files {files}"
+    assert media.stats["downloaded"] == 1 and media.stats["duplicates"] == 1, media.stats
+
+    requests = len(session.cursors)
+    assert media.fetch(pic_url(server, names[0])) == first
+    assert len(session.cursors) == requests and media.stats["known"] == 1, "known URL fetched again"
+
+
+@with_downloader
+def check_media_resume(server, media, session):
+    """A half-written .part file resumes with a Range request and ends with the fixture's exact bytes."""
+    sha256, names = next(iter(fixture_pics().items()))
+    with open(os.path.join(PIC_DIR, f"{names[0]}.jpg"), "rb") as f:
+        body = f.read()
+    url = pic_url(server, names[0])
+    half = len(body) // 2
+    with open(media.partial_path(media_key(url)), "wb") as f:
+        f.write(body[:half])
+
+    path = media.fetch(url)
+    assert session.ranges == [f"bytes={half}-"], f"Range headers {session.ranges}"
+    assert media.stats["resumed"] == 1 and media.stats["bytes"] == len(body) - half, media.stats
+    assert stored_sha256(path) == sha256, "resumed file hash differs from the fixture"
+    assert os.path.basename(path).startswith(sha256), path
+    assert not os.path.exists(media.partial_path(media_key(url))), ".part file left behind"
+
+
+CHECKS = [
+    check_page_parse, check_cursor_pagination, check_max_pages, check_watermark_stop,
+    check_media_dedup, check_media_resume,
+]
+
+
+if __name__ == "__main__":
+    setup_logging("INFO")
+    failed = 0
+    with ReplayServer(FIXTURES_DIR) as server:
+        for check in CHECKS:
+            try:
+                check(server)
+                log.info(f"✅ {check.__name__}")
+            except AssertionError as e:
+                failed += 1
+                log.error(f"❌ {check.__name__}: {e}")
+    sys.exit(1 if failed else 0)
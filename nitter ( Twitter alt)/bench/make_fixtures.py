@@ -0,0 +1,179 @@
+import argparse
+import html
+import os
+import random
+import re
+import shutil
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+USERS = [
+    ("Kuala Lumpur Eats", "kleats"), ("Johor Traveller", "jbtravel"), ("Data Nerd", "datanerd_my"),
+    ("Malaysia Weather", "mywx"), ("Example Corp", "examplecorp"), ("Nur Aisyah", "aisyah_n"),
+    ("Tech Daily", "techdaily"), ("Random Thoughts", "rthoughts"),
+]
+TEXTS = [
+    "Trying out the new example cafe in Bangsar, the kopi is 🔥",
+    "Thread on why every example project needs a proper benchmark suite 🧵",
+    "Traffic on the Federal Highway again... example of why we need better transit",
+    "New blog post: an example pipeline for scraping public data responsibly",
+    "Heavy rain expected in Johor Bahru this evening, stay safe everyone",
+    "This is just an example tweet with a link https://example.com/post",
+    "Hot take: example code in docs should actually run",
+    "Weekend market at Putrajaya was packed, great example of community events",
+]
+# Image bodies: many attachments share a few distinct files, like media reposted across retweets
+IMAGE_VARIANTS = 6
+IMAGE_BYTES = 4_000
+
+# Nitter's compact counts, e.g. "1.2K" for 1,200
+STAT_VALUES = ["", "1", "7", "12", "48", "230", "1,024", "4.5K", "12K", "1.2M"]
+
+# Mirrors Nitter's infinite scroll (infiniteScroll cookie): near the bottom, fetch the "show-more"
+# cursor page and append its items, skipping the page's own "Load newest" row.
+INFINITE_SCROLL_JS = """
+<script>
+  let loading = false;
+  window.addEventListener("scroll", async () => {
+    const more = document.querySelector(".timeline > .show-more:not(.timeline-item) a");
+    if (loading || !more || window.innerHeight + window.scrollY < document.body.offsetHeight - 500) return;
+    loading = true;
+    const page = new DOMParser().parseFromString(await (await fetch(more.href)).text(), "text/html");
+    const timeline = document.querySelector(".timeline");
+    for (const item of page.querySelectorAll(".timeline > .timeline-item")) {
+      if (!item.classList.contains("show-more")) timeline.insertBefore(item, more.parentNode);
+    }
+    const next = page.querySelector(".timeline > .show-more:not(.timeline-item)");
+    if (next) { more.parentNode.replaceWith(next); } else { more.parentNode.replaceWith(page.querySelector(".timeline-footer")); }
+    loading = false;
+  });
+</script>
+"""
+
+
+def tweet_html(rng, tweet_id, posted):
+    fullname, username = rng.choice(USERS)
+    text = html.escape(rng.choice(TEXTS))
+    title = posted.strftime("%b %-d, %Y · %-I:%M %p UTC")
+    media = ""
+    roll = rng.random()
+    if roll < 0.3:
+        images = "".join(
+            f'<div class="attachment image"><a class="still-image" href="/pic/orig/media%2F{tweet_id}_{n}.jpg" '
+            f'target="_blank"><img src="/pic/media%2F{tweet_id}_{n}.jpg%3Fname%3Dsmall%26format%3Dwebp" alt="" '
+            f'loading="lazy"></a></div>'
+            for n in range(rng.randint(1, 2))
+        )
+        media = f'<div class="attachments"><div class="gallery-row">{images}</div></div>'
+    elif roll < 0.4:
+        media = (
+            '<div class="attachments card"><div class="gallery-video"><div class="attachment video-container">'
+            f'<video poster="/pic/amplify_video_thumb%2F{tweet_id}%2Fimg.jpg" '
+            f'data-url="/video/{tweet_id}/https%3A%2F%2Fvideo.twimg.com%2Fext_tw_video%2F{tweet_id}%2Fpl%2Fvid.m3u8" '
+            'data-autoload="false"></video><div class="video-overlay"><p>Enable hls playback</p></div>'
+            '</div></div></div>'
+        )
+    stats = "".join(
+        f'<span class="tweet-stat"><div class="icon-container"><span class="icon-{icon}" title=""></span> '
+        f'{rng.choice(STAT_VALUES)}</div></span>'
+        for icon in ("comment", "retweet", "quote", "heart")
+    )
+    return f"""<div class="timeline-item " data-username="{username}">
+  <a class="tweet-link" href="/{username}/status/{tweet_id}#m"></a>
+  <div class="tweet-body">
+    <div>
+      <div class="tweet-header">
+        <a class="tweet-avatar" href="/{username}"><img class="avatar round" src="/pic/profile_images%2F{username}_mini.jpg" alt="" loading="lazy"></a>
+        <div class="tweet-name-row">
+          <div class="fullname-and-username">
+            <a class="fullname" href="/{username}" title="{html.escape(fullname)}">{html.escape(fullname)}</a>
+            <a class="username" href="/{username}" title="@{username}">@{username}</a>
+          </div>
+          <span class="tweet-date"><a href="/{username}/status/{tweet_id}#m" title="{title}">{posted.strftime("%b %-d")}</a></span>
+        </div>
+      </div>
+    </div>
+    <div class="tweet-content media-body" dir="auto">{text}</div>
+    {media}
+    <div class="tweet-stats">{stats}</div>
+  </div>
+</div>
+"""
+
+
+def page_html(keyword, items, cursor, next_cursor):
+    newest = (
+        f'<div class="timeline-item show-more"><a href="?f=tweets&amp;q={keyword}">Load newest</a></div>\n'
+        if cursor else ""
+    )
+    tail = (
+        f'<div class="show-more"><a href="?f=tweets&amp;q={keyword}&amp;cursor={next_cursor}">Load more</a></div>\n'
+        if next_cursor else '<div class="timeline-footer"><h2 class="timeline-end">No more items</h2></div>\n'
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>{keyword} | Search | nitter</title>
+<link rel="stylesheet" type="text/css" href="/css/style.css"></head>
+<body>
+<nav><div class="inner-nav"><div class="nav-item"><a class="site-name" href="/">nitter</a></div></div></nav>
+<div class="container">
+<div class="timeline-container">
+<div class="timeline-header"><form action="/search" autocomplete="off" class="search-field">
+<input type="hidden" name="f" value="tweets"><input type="text" name="q" value="{keyword}"></form></div>
+<div class="timeline">
+{newest}{"".join(items)}{tail}</div>
+</div>
+</div>
+{INFINITE_SCROLL_JS}
+</body>
+</html>
+"""
+
+
+def write_images(search_dir, pic_dir, seed):
+    """One file per image the pages link to (/pic/media%2F<name>.jpg...), drawn from IMAGE_VARIANTS bodies."""
+    rng = random.Random(seed)
+    variants = [b"\xff\xd8\xff\xe0" + rng.randbytes(IMAGE_BYTES) + b"\xff\xd9" for _ in range(IMAGE_VARIANTS)]
+    for page in sorted(os.listdir(search_dir)):
+        with open(os.path.join(search_dir, page), "r", encoding="utf-8") as f:
+            names = re.findall(r'<img src="/pic/media%2F([0-9]+_[0-9]+)\.jpg', f.read())
+        for name in names:
+            with open(os.path.join(pic_dir, f"{name}.jpg"), "wb") as f:
+                f.write(rng.choice(variants))
+
+
+def write_fixtures(keyword, pages, per_page, seed=7, fixtures_dir=FIXTURES_DIR):
+    rng = random.Random(seed)
+    search_dir = os.path.join(fixtures_dir, "nitter", "search")
+    pic_dir = os.path.join(fixtures_dir, "nitter", "pic")
+    for path in (search_dir, pic_dir):
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+    tweet_id = 1897000000000000000
+    posted = datetime(2025, 3, 5, 15, 4)
+    cursors = [None] + [f"DAADDAABCgABGR{n:04d}" for n in range(1, pages)]
+    for n, cursor in enumerate(cursors):
+        items = []
+        for _ in range(per_page):
+            items.append(tweet_html(rng, tweet_id, posted))
+            tweet_id -= rng.randint(1_000_000, 50_000_000)
+            posted -= timedelta(minutes=rng.randint(1, 90))
+        next_cursor = cursors[n + 1] if n + 1 < len(cursors) else None
+        with open(os.path.join(search_dir, f"{cursor or 'first'}.html"), "w", encoding="utf-8") as f:
+            f.write(page_html(keyword, items, cursor, next_cursor))
+    write_images(search_dir, pic_dir, seed)
+
+
+if __name__ == "__main__":
+    # python bench/make_fixtures.py [--pages 3 --per-page 20]
+    parser = argparse.ArgumentParser(description="Build Nitter search timeline fixtures")
+    parser.add_argument("--keyword", default="example")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--per-page", type=int, default=20)
+    args = parser.parse_args()
+
+    write_fixtures(args.keyword, args.pages, args.per_page)
+    print(f"✅ {args.pages} pages x {args.per_page} tweets → {FIXTURES_DIR}")
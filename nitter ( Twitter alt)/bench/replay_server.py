@@ -0,0 +1,138 @@
+import argparse
+import json
+import logging
+import mimetypes
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# google_maps/bench/ and nitter ( Twitter alt)/bench/ each ship an identical copy of this module on purpose,
+# so either scraper's benchmarks run standalone; change both together.
+
+log = logging.getLogger(__name__)
+
+BASE_URL_PLACEHOLDER = b"{{BASE_URL}}"
+RANGE_RE = re.compile(r"^bytes=(\d+)-$")
+
+
+class ReplayServer:
+    """
+    Serves recorded fixtures over local HTTP so benchmarks never hit the live site:
+    - routes.json in the fixtures dir maps request regexes (matched against path + query) to fixture
+      files; named groups fill the file template, e.g. "feed/{query}/page-{page}.html"
+    - the first matching route wins; a missing fixture file is a 404
+    - {{BASE_URL}} inside a fixture is replaced by this server's address, so recorded links stay local
+    - every response waits latency + uniform(0, jitter) seconds, like a remote site would
+    - "Range: bytes=N-" gets a 206 with the rest of the file, so resumed downloads can be tested
+    """
+
+    def __init__(self, fixtures_dir, latency=0.0, jitter=0.0, host="127.0.0.1", port=0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        with open(os.path.join(fixtures_dir, "routes.json"), "r", encoding="utf-8") as f:
+            self.routes = [(re.compile(r["match"]), r["file"], r.get("content_type")) for r in json.load(f)]
+        self.stats = {"requests": 0, "not_found": 0, "bytes": 0, "partial": 0}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def resolve(self, path):
+        """(fixture file, content type) for a request path, or (None, None)."""
+        for pattern, template, content_type in self.routes:
+            match = pattern.search(path)
+            if match:
+                file_path = os.path.join(self.fixtures_dir, template.format(**match.groupdict()))
+                if not os.path.isfile(file_path):
+                    return None, None
+                return file_path, content_type or mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        return None, None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.latency + random.uniform(0, server.jitter))
+                file_path, content_type = server.resolve(self.path)
+                if file_path is None:
+                    with server.lock:
+                        server.stats["requests"] += 1
+                        server.stats["not_found"] += 1
+                    self.send_error(404)
+                    return
+
+                with open(file_path, "rb") as f:
+                    body = f.read().replace(BASE_URL_PLACEHOLDER, server.base_url.encode())
+                size = len(body)
+                byte_range = RANGE_RE.match(self.headers.get("Range", ""))
+                start = int(byte_range.group(1)) if byte_range else 0
+                if start >= size > 0:
+                    self.send_error(416)
+                    return
+                body = body[start:]
+                with server.lock:
+                    server.stats["requests"] += 1
+                    server.stats["bytes"] += len(body)
+                    server.stats["partial"] += bool(byte_range)
+                self.send_response(206 if byte_range else 200)
+                if byte_range:
+                    self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                log.debug(f"🔁 {self.address_string()} {format % args}")
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        log.info(f"🔁 Replaying {self.fixtures_dir} at {self.base_url} "
+                 f"({self.latency:.2f}s + up to {self.jitter:.2f}s per response)")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    # Serve the fixtures by hand, e.g. to point a headed browser at them:
+    # python bench/replay_server.py --port 8765 --latency 0.3 --jitter 0.2
+    parser = argparse.ArgumentParser(description="Serve recorded fixtures over local HTTP")
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    server = ReplayServer(args.fixtures, args.latency, args.jitter, args.host, args.port).start()
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,333 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import cpu_count
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+NITTER_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, NITTER_DIR)
+
+from instrumentation import setup_logging, tracer
+from media import MediaDownloader, media_key
+from nitter_http import iter_tweets, make_session
+from replay_server import ReplayServer
+from scheduler import InstancePool, build_jobs, run_jobs
+from tweet_extract import extract_timeline_from_html
+from watermarks import WatermarkStore
+
+log = logging.getLogger("bench")
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BENCHMARKS = ["parse", "http", "incremental", "scheduler", "media", "scrape"]
+
+# Metric suffixes that --compare checks; anything else is informational
+HIGHER_IS_BETTER = ("_per_s", "_per_minute")
+LOWER_IS_BETTER = ("_s",)
+
+
+def stage_total(summary, stage):
+    return summary["stages"].get(stage, {}).get("total_s", 0.0)
+
+
+def bench_parse(passes):
+    """extract_timeline_from_html over every fixture page, `passes` times (no network)."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "nitter", "search", "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+
+    tweets = 0
+    started = time.perf_counter()
+    for _ in range(passes):
+        for page in pages:
+            items, _ = extract_timeline_from_html(page, "http://127.0.0.1/search")
+            tweets += len(items)
+    elapsed = time.perf_counter() - started
+    log.info(f"⏱️ parse: {tweets} tweets from {len(pages) * passes} pages in {elapsed:.2f}s")
+    return {
+        "parse": {
+            "pages": len(pages) * passes, "tweets": tweets, "elapsed_s": elapsed,
+            "pages_per_s": len(pages) * passes / elapsed, "tweets_per_s": tweets / elapsed,
+        }
+    }
+
+
+def bench_http(base_url, keyword):
+    """Browserless fetch mode against the replayed search timeline: GET per cursor page + lxml parse."""
+    before = tracer.summary()
+    started = time.perf_counter()
+    session = make_session({"user-agent": "nitter-bench"}, {"hlsPlayback": "on"})
+    try:
+        tweets = list(iter_tweets(session, f"{base_url}/search?f=tweets&q={keyword}", keyword))
+    finally:
+        session.close()
+    elapsed = time.perf_counter() - started
+    after = tracer.summary()
+
+    pages = after["counters"].get("pages_loaded", 0) - before["counters"].get("pages_loaded", 0)
+    log.info(f"⏱️ http: {len(tweets)} tweets from {pages:g} pages in {elapsed:.2f}s")
+    return {
+        "http": {
+            "tweets": len(tweets), "pages": pages, "elapsed_s": elapsed,
+            "pages_per_minute": pages / elapsed * 60, "tweets_per_minute": len(tweets) / elapsed * 60,
+        }
+    }
+
+
+def bench_incremental(base_url, keyword, work_dir, new_tweets):
+    """
+    A follow-up run in http mode: the watermark sits below the newest `new_tweets` tweets,
+    so paging should stop at the page that reaches it.
+    """
+    url = f"{base_url}/search?f=tweets&q={keyword}"
+    session = make_session({"user-agent": "nitter-bench"}, {"hlsPlayback": "on"})
+    store = WatermarkStore(os.path.join(work_dir, "watermarks.sqlite"))
+    try:
+        full = pd.DataFrame(list(iter_tweets(session, url, keyword)))
+        store.advance(keyword, full.iloc[new_tweets:])
+
+        before = tracer.summary()
+        started = time.perf_counter()
+        delta = list(iter_tweets(session, url, keyword, stop_rule=store.stop_rule(keyword)))
+        elapsed = time.perf_counter() - started
+        after = tracer.summary()
+    finally:
+        session.close()
+        store.close()
+
+    pages = after["counters"].get("pages_loaded", 0) - before["counters"].get("pages_loaded", 0)
+    log.info(f"⏱️ incremental: {len(delta)}/{len(full)} tweets from {pages:g} pages in {elapsed:.2f}s")
+    return {
+        "incremental": {
+            "tweets": len(delta), "expected_tweets": new_tweets, "full_tweets": len(full), "pages": pages,
+            "elapsed_s": elapsed, "tweets_per_minute": len(delta) / elapsed * 60,
+        }
+    }
+
+
+def bench_media(base_url, keyword, work_dir, workers):
+    """
+    MediaDownloader over the replayed images: a cold pass (content-hash dedup across URLs), a warm pass
+    (every URL already indexed) and one resumed download from a half-written .part file.
+    """
+    session = make_session({"user-agent": "nitter-bench"}, {"hlsPlayback": "on"}, pool_size=workers)
+    root = os.path.join(work_dir, "media")
+    try:
+        tweets = pd.DataFrame(list(iter_tweets(session, f"{base_url}/search?f=tweets&q={keyword}", keyword)))
+        media = MediaDownloader(session, root=root, workers=workers)
+        started = time.perf_counter()
+        tweets = media.attach(tweets)
+        cold_s = time.perf_counter() - started
+        cold = dict(media.stats)
+
+        started = time.perf_counter()
+        media.attach(tweets)
+        warm_s = time.perf_counter() - started
+
+        # Interrupted download: drop one image from the index and leave half of it in .partial
+        url = next(u for row in tweets["img_src"] for u in json.loads(row))
+        path = media.lookup(media_key(url))
+        with media.lock:
+            media.conn.execute("DELETE FROM media WHERE media_key = ?", (media_key(url),))
+        with open(path, "rb") as f:
+            body = f.read()
+        with open(media.partial_path(media_key(url)), "wb") as f:
+            f.write(body[:len(body) // 2])
+        resumed_ok = media.fetch(url) == path
+        stats = dict(media.stats)
+        media.close()
+    finally:
+        session.close()
+
+    files = sum(len(names) for folder, _, names in os.walk(root) if ".partial" not in folder) - 1  # index.sqlite
+    log.info(f"⏱️ media: {cold['downloaded']} files for {cold['downloaded'] + cold['duplicates']} URLs "
+             f"({cold['bytes'] / 1e6:.2f} MB) in {cold_s:.2f}s, warm pass {warm_s:.3f}s")
+    return {
+        "media": {
+            "urls": cold["downloaded"] + cold["duplicates"], "files": files, "duplicates": cold["duplicates"],
+            "failed": cold["failed"], "elapsed_s": cold_s, "warm_elapsed_s": warm_s,
+            "urls_per_s": (cold["downloaded"] + cold["duplicates"]) / cold_s,
+            "mb_per_s": cold["bytes"] / 1e6 / cold_s, "resumed": stats["resumed"], "resumed_ok": resumed_ok,
+        }
+    }
+
+
+def bench_scheduler(base_url, jobs, workers, rate_per_minute):
+    """
+    run_jobs over `jobs` keywords (every search replays the same fixtures) in http mode.
+    The pool also holds an instance nobody listens on, so failover and cooldown are part of the measurement.
+    """
+    dead_url = "http://127.0.0.1:9"  # discard port: connection refused
+    pool = InstancePool([base_url, base_url.replace("127.0.0.1", "localhost"), dead_url],
+                        rate_per_minute=rate_per_minute, burst=5, failure_threshold=1, cooldown_s=60)
+
+    def scrape_fn(url, keyword, throttle):
+        session = make_session({"user-agent": "nitter-bench"}, {"hlsPlayback": "on"}, retries=0)
+        try:
+            return pd.DataFrame(list(iter_tweets(session, url, keyword, throttle=throttle)))
+        finally:
+            session.close()
+
+    started = time.perf_counter()
+    tweets, progress = run_jobs(build_jobs([f"example {n}" for n in range(jobs)]), pool, scrape_fn, workers=workers)
+    elapsed = time.perf_counter() - started
+    done = sum(row["status"] == "done" for row in progress)
+    attempts = sum(row["attempts"] for row in progress)
+    log.info(f"⏱️ scheduler: {done}/{jobs} jobs, {len(tweets)} tweets in {elapsed:.2f}s ({attempts} attempts)")
+    return {
+        "scheduler": {
+            "jobs": jobs, "jobs_done": done, "attempts": attempts, "tweets": len(tweets), "elapsed_s": elapsed,
+            "jobs_per_minute": done / elapsed * 60, "tweets_per_minute": len(tweets) / elapsed * 60,
+            "instances": pool.summary(),
+        }
+    }
+
+
+def bench_scrape(base_url, keyword):
+    """scrape_nitter (Selenium) against the replayed search timeline: load, infinite scroll and extraction."""
+    import nitter  # needs selenium
+
+    before = tracer.summary()
+    started = time.perf_counter()
+    tweets = nitter.scrape_nitter(f"{base_url}/search?f=tweets&q={keyword}", keyword, pd.DataFrame())
+    elapsed = time.perf_counter() - started
+    after = tracer.summary()
+
+    counters = {name: value - before["counters"].get(name, 0) for name, value in after["counters"].items()}
+    pages = counters.get("pages_loaded", 0) + counters.get("scroll_iterations", 0)
+    extract_s = stage_total(after, "nitter.extract") - stage_total(before, "nitter.extract")
+    log.info(f"⏱️ scrape: {len(tweets)} tweets from {pages:g} pages in {elapsed:.1f}s")
+    return {
+        "scrape": {
+            "tweets": len(tweets), "pages": pages, "elapsed_s": elapsed,
+            "pages_per_minute": pages / elapsed * 60, "tweets_per_s": len(tweets) / elapsed,
+            "extract_s": extract_s, "extract_tweets_per_s": len(tweets) / extract_s if extract_s else None,
+        }
+    }
+
+
+# ---------- Results ----------
+def run_metadata(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=NITTER_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": cpu_count(),
+        "latency_s": args.latency,
+        "jitter_s": args.jitter,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Log every metric against the baseline; returns the regressions beyond tolerance."""
+    regressions = []
+    for name, metrics in results["benchmarks"].items():
+        old_metrics = baseline.get("benchmarks", {}).get(name, {})
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            if metric.endswith(HIGHER_IS_BETTER):
+                regressed = change < -tolerance
+            elif metric.endswith(LOWER_IS_BETTER):
+                regressed = change > tolerance
+            else:
+                continue
+            marker = "❌" if regressed else "✅"
+            log.info(f"{marker} {name}.{metric}: {old:.4g} → {value:.4g} ({change:+.1%})")
+            if regressed:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+
+def run(args):
+    selected = args.only.split(",") if args.only else BENCHMARKS
+    work_dir = tempfile.mkdtemp(prefix="nitter-bench-")
+    tracer.configure("nitter_bench", trace_path=os.path.join(work_dir, "trace.jsonl"))
+    benchmarks = {}
+
+    def attempt(name, fn):
+        if name not in selected:
+            return
+        log.info(f"🏁 {name}")
+        try:
+            benchmarks.update(fn())
+        except Exception as e:
+            log.error(f"❌ {name} failed: {e}")
+            benchmarks[name] = {"error": repr(e)[:500]}
+
+    attempt("parse", lambda: bench_parse(args.parse_passes))
+    with ReplayServer(FIXTURES_DIR, args.latency, args.jitter) as server:
+        attempt("http", lambda: bench_http(server.base_url, args.keyword))
+        attempt("incremental", lambda: bench_incremental(
+            server.base_url, args.keyword, work_dir, args.new_tweets
+        ))
+        attempt("media", lambda: bench_media(server.base_url, args.keyword, work_dir, args.media_workers))
+        attempt("scheduler", lambda: bench_scheduler(
+            server.base_url, args.scheduler_jobs, args.scheduler_workers, args.rate_per_minute
+        ))
+        attempt("scrape", lambda: bench_scrape(server.base_url, args.keyword))
+        log.info(f"🔁 Replay server: {server.stats}")
+
+    results = {"meta": run_metadata(args), "benchmarks": benchmarks, "stages": tracer.summary()["stages"]}
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    # Run from the nitter directory:
+    #   python bench/run_bench.py --only parse,http                 # no browser needed
+    #   python bench/run_bench.py                                   # scrape needs Chrome + chromedriver
+    #   python bench/run_bench.py --compare bench/results/baseline.json
+    parser = argparse.ArgumentParser(description="Offline Nitter scraper benchmarks against recorded fixtures")
+    parser.add_argument("--only", help=f"comma-separated subset of {','.join(BENCHMARKS)}")
+    parser.add_argument("--keyword", default="example", help="keyword the fixtures were recorded for")
+    parser.add_argument("--latency", type=float, default=0.1, help="replay server delay per response (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="extra random replay delay, up to this (s)")
+    parser.add_argument("--parse-passes", type=int, default=50, help="times the parse benchmark reads every page")
+    parser.add_argument("--new-tweets", type=int, default=24, help="tweets above the watermark (incremental)")
+    parser.add_argument("--media-workers", type=int, default=8, help="downloads in flight (media)")
+    parser.add_argument("--scheduler-jobs", type=int, default=24, help="keywords the scheduler benchmark runs")
+    parser.add_argument("--scheduler-workers", type=int, default=8)
+    parser.add_argument("--rate-per-minute", type=float, default=600, help="token bucket refill per instance")
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--output", help="results JSON (default bench/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="relative change treated as a regression")
+    args = parser.parse_args()
+
+    setup_logging(args.log_level)
+    os.chdir(NITTER_DIR)
+    results = run(args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+    log.info(f"✅ Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            log.error(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+# google_maps/ and nitter ( Twitter alt)/ each ship an identical copy of this module on purpose,
+# so either scraper runs standalone; change both together.
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(processName)s %(name)s: %(message)s"
+RUN_ID_ENV = "SCRAPER_RUN_ID"
+
+
+def setup_logging(level="INFO"):
+    logging.basicConfig(level=getattr(logging, str(level).upper(), logging.INFO), format=LOG_FORMAT)
+
+
+class Tracer:
+    """
+    Per-process stage timing and counters, shared by every worker of one run:
+    - span(stage, **attrs) times a block and appends one JSON line to trace_path
+      (attrs can be filled in inside the block: `with tracer.span("x") as s: s["items"] = n`)
+    - count(name, n) accumulates in memory; deltas are appended as one line when the outermost span ends
+    - summary() / write_prometheus() aggregate this run's lines from all processes (p50/p95 per stage)
+    The run id travels to worker processes through the environment, so forked and spawned workers agree.
+    Safe to use from several threads (pool dispatchers, the async Phase 2 engine thread).
+    """
+
+    def __init__(self):
+        self.app = "scraper"
+        self.trace_path = None
+        self.metrics_path = None
+        self.run_id = None
+        self.counters = defaultdict(float)
+        self.depth = 0
+        # Guards depth, counters and trace appends; re-entrant because ending a span flushes counters
+        self.lock = threading.RLock()
+
+    def configure(self, app, trace_path=None, metrics_path=None):
+        self.app = app
+        self.trace_path = trace_path
+        self.metrics_path = metrics_path
+        self.run_id = os.environ.setdefault(RUN_ID_ENV, f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}")
+        if trace_path:
+            os.makedirs(os.path.dirname(trace_path) or ".", exist_ok=True)
+        return self
+
+    def _write(self, event):
+        if not self.trace_path:
+            return
+        event = {"run_id": self.run_id, "pid": os.getpid(), **event}
+        with self.lock, open(self.trace_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, default=str) + "\n")
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        started = time.time()
+        t0 = time.perf_counter()
+        with self.lock:
+            self.depth += 1
+        ok = True
+        try:
+            yield attrs
+        except Exception as e:
+            ok = False
+            attrs["error"] = repr(e)[:200]
+            raise
+        finally:
+            with self.lock:
+                self.depth -= 1
+                outermost = self.depth == 0
+            self._write({
+                "type": "span", "stage": stage, "start": started,
+                "duration_s": round(time.perf_counter() - t0, 4), "ok": attrs.pop("ok", True) and ok, **attrs,
+            })
+            if outermost:
+                self.flush_counters()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def flush_counters(self):
+        with self.lock:
+            if self.counters:
+                self._write({"type": "counters", "values": dict(self.counters)})
+                self.counters.clear()
+
+    def _events(self):
+        if not self.trace_path or not os.path.exists(self.trace_path):
+            return
+        with open(self.trace_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a killed worker
+                if event.get("run_id") == self.run_id:
+                    yield event
+
+    def summary(self):
+        """{"stages": {stage: {count, errors, p50_s, p95_s, total_s}}, "counters": {name: total}} for this run."""
+        self.flush_counters()
+        durations, errors, counters = defaultdict(list), defaultdict(int), defaultdict(float)
+        for event in self._events():
+            if event["type"] == "span":
+                durations[event["stage"]].append(event["duration_s"])
+                errors[event["stage"]] += not event.get("ok", True)
+            elif event["type"] == "counters":
+                for name, value in event["values"].items():
+                    counters[name] += value
+        stages = {
+            stage: {
+                "count": len(values),
+                "errors": errors[stage],
+                "p50_s": float(np.percentile(values, 50)),
+                "p95_s": float(np.percentile(values, 95)),
+                "total_s": float(np.sum(values)),
+            }
+            for stage, values in sorted(durations.items())
+        }
+        return {"stages": stages, "counters": dict(sorted(counters.items()))}
+
+    def write_prometheus(self, summary=None):
+        """Prometheus text-format file (node_exporter textfile collector) with this run's summary."""
+        if not self.metrics_path:
+            return
+        summary = summary or self.summary()
+        name = f"{self.app}_stage_duration_seconds"
+        lines = [f"# HELP {name} Stage latency for run {self.run_id}.", f"# TYPE {name} summary"]
+        for stage, s in summary["stages"].items():
+            lines += [
+                f'{name}{{stage="{stage}",quantile="0.5"}} {s["p50_s"]:.4f}',
+                f'{name}{{stage="{stage}",quantile="0.95"}} {s["p95_s"]:.4f}',
+                f'{name}_sum{{stage="{stage}"}} {s["total_s"]:.4f}',
+                f'{name}_count{{stage="{stage}"}} {s["count"]}',
+            ]
+        lines += [f"# TYPE {self.app}_stage_errors_total counter"]
+        lines += [f'{self.app}_stage_errors_total{{stage="{stage}"}} {s["errors"]}' for stage, s in summary["stages"].items()]
+        for counter, value in summary["counters"].items():
+            metric = f"{self.app}_{counter}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+
+        os.makedirs(os.path.dirname(self.metrics_path) or ".", exist_ok=True)
+        tmp = f"{self.metrics_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.metrics_path)  # the collector never sees a half-written file
+
+    def finish(self, log=None):
+        """Log the per-stage summary and write the Prometheus file; returns the summary."""
+        summary = self.summary()
+        log = log or logging.getLogger(self.app)
+        for stage, s in summary["stages"].items():
+            log.info(f"⏱️ {stage}: {s['count']}× p50 {s['p50_s']:.2f}s p95 {s['p95_s']:.2f}s "
+                     f"total {s['total_s']:.1f}s ({s['errors']} errors)")
+        for counter, value in summary["counters"].items():
+            log.info(f"🔢 {counter}: {value:g}")
+        self.write_prometheus(summary)
+        return summary
+
+
+# One tracer per process; configure() it once at start-up
+tracer = Tracer()
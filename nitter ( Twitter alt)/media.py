@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urljoin, urlsplit
+
+import requests
+
+from instrumentation import tracer
+from scheduler import TokenBucket
+
+log = logging.getLogger(__name__)
+
+# HLS playlists point at many segments; there is no single file to store
+STREAM_SUFFIXES = (".m3u8",)
+
+
+def media_key(url):
+    """Path + query of a media URL: the same attachment proxied by different Nitter instances shares one key."""
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+class MediaDownloader:
+    """
+    Downloads tweet attachments into a content-addressed store:
+    - files live at root/<sha256[:2]>/<sha256><ext>, so identical bytes behind different URLs are stored once
+    - an SQLite index maps each media_key to its file; a key seen before (retweets, reruns) is not fetched again
+    - downloads land in root/.partial/ first and resume with a Range request after an interruption
+    - `workers` downloads in flight over one pooled session, optionally capped at rate_per_minute
+    Thread-safe.
+    """
+
+    def __init__(self, session, root="Result/media", workers=8, rate_per_minute=None, include_video=False,
+                 retries=3, timeout=60, chunk_size=65536):
+        self.session = session
+        self.root = root
+        self.partial_dir = os.path.join(root, ".partial")
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self.workers = max(1, workers)
+        self.bucket = TokenBucket(rate_per_minute, burst=self.workers) if rate_per_minute else None
+        self.include_video = include_video
+        self.retries = retries
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="media")
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS media (
+                media_key TEXT PRIMARY KEY,
+                url TEXT,
+                sha256 TEXT,
+                path TEXT,
+                bytes INTEGER,
+                content_type TEXT,
+                fetched_at REAL
+            )
+        """)
+        self.conn.commit()
+        self.lock = threading.Lock()
+        self.stats = {"known": 0, "downloaded": 0, "duplicates": 0, "resumed": 0, "failed": 0, "skipped": 0,
+                      "bytes": 0}
+
+    @classmethod
+    def from_config(cls, params, session):
+        return cls(
+            session,
+            root=params.get("root", "Result/media"),
+            workers=params.get("workers", 8),
+            rate_per_minute=params.get("rate_per_minute"),
+            include_video=params.get("include_video", False),
+            retries=params.get("retries", 3),
+            timeout=params.get("timeout", 60),
+        )
+
+    def _count(self, name, n=1):
+        with self.lock:
+            self.stats[name] += n
+
+    def lookup(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT path FROM media WHERE media_key = ?", (key,)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def partial_path(self, key):
+        return os.path.join(self.partial_dir, hashlib.sha1(key.encode()).hexdigest() + ".part")
+
+    def fetch(self, url):
+        """Local path of url's content, downloading it if needed; None if it could not be fetched."""
+        key = media_key(url)
+        if unquote(key).split("?")[0].endswith(STREAM_SUFFIXES):
+            self._count("skipped")
+            return None
+        path = self.lookup(key)
+        if path:
+            self._count("known")
+            return path
+
+        partial = self.partial_path(key)
+        for attempt in range(1, self.retries + 1):
+            try:
+                content_type = self._download(url, partial)
+                break
+            except requests.RequestException as e:
+                # Whatever arrived stays in the .part file for the next attempt
+                log.debug(f"Media download attempt {attempt}/{self.retries} failed for {url}: {e}")
+        else:
+            self._count("failed")
+            log.warning(f"⚠️ Could not download {url}")
+            return None
+        return self._store(key, url, partial, content_type)
+
+    def _download(self, url, partial):
+        """Stream url into partial, resuming from its current size. Returns the content type."""
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        if self.bucket:
+            self.bucket.acquire()
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # Already complete on disk
+                return mimetypes.guess_type(url)[0]
+            response.raise_for_status()
+            resumed = offset and response.status_code == 206
+            if resumed:
+                self._count("resumed")
+            with open(partial, "ab" if resumed else "wb") as f:
+                for chunk in response.iter_content(self.chunk_size):
+                    f.write(chunk)
+                    self._count("bytes", len(chunk))
+            return response.headers.get("Content-Type", "").split(";")[0].strip() or None
+
+    def _store(self, key, url, partial, content_type):
+        digest = hashlib.sha256()
+        with open(partial, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+        extension = mimetypes.guess_extension(content_type or "") or os.path.splitext(unquote(key).split("?")[0])[1]
+        path = os.path.join(self.root, sha256[:2], sha256 + (extension or ""))
+        size = os.path.getsize(partial)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.lock:
+            if os.path.exists(path):
+                os.remove(partial)
+                self.stats["duplicates"] += 1
+            else:
+                os.replace(partial, path)
+                self.stats["downloaded"] += 1
+            self.conn.execute("""
+                INSERT INTO media (media_key, url, sha256, path, bytes, content_type, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(media_key) DO UPDATE SET url = excluded.url, sha256 = excluded.sha256,
+                    path = excluded.path, bytes = excluded.bytes, content_type = excluded.content_type,
+                    fetched_at = excluded.fetched_at
+            """, (key, url, sha256, path, size, content_type, time.time()))
+            self.conn.commit()
+        return path
+
+    def attach(self, tweets):
+        """
+        Download every attachment of tweets (a DataFrame in TWEET_COLUMNS) and fill img_local/vid_local
+        with the local paths, position for position with img_src/vid_src (null where a download failed).
+        """
+        if tweets.empty:
+            return tweets
+        columns = [("img_src", "img_local")] + ([("vid_src", "vid_local")] if self.include_video else [])
+        # Relative links (video data-url) resolve against the tweet's own instance
+        urls = {
+            source: [[urljoin(link, src) for src in json.loads(value or "[]")]
+                     for link, value in zip(tweets["tweet_link"], tweets[source])]
+            for source, _ in columns
+        }
+        unique = list(dict.fromkeys(url for lists in urls.values() for row in lists for url in row))
+        with tracer.span("nitter.media", urls=len(unique)) as span:
+            paths = dict(zip(unique, self.executor.map(self.fetch, unique)))
+            span["items"] = sum(path is not None for path in paths.values())
+
+        tweets = tweets.copy()
+        for source, target in columns:
+            tweets[target] = [json.dumps([paths[url] for url in row]) for row in urls[source]]
+        return tweets
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,104 @@
+import json
+import logging
+
+from collections import Counter
+
+log = logging.getLogger(__name__)
+
+# Defaults for network_parameter in nitter_config.yaml.
+# The scraper only reads attributes like img src / video data-url, never the media itself.
+BLOCKED_RESOURCE_TYPES = ["image"]
+# Chrome DevTools wildcard syntax, blocked on every Nitter page load
+BLOCKED_URL_PATTERNS = [
+    "*/pic/*",
+    "*/video/*",
+    "*.mp4*",
+    "*.m3u8*",
+    "*.jpg*",
+    "*.jpeg*",
+    "*.png*",
+    "*.gif*",
+    "*.webp*",
+    "*.woff*",
+    "*.ttf*",
+]
+
+# Resource types Chrome can switch off as a whole (content settings); everything else goes through URL patterns
+CONTENT_SETTINGS = {
+    "image": "images",
+    "popup": "popups",
+    "notification": "notifications",
+}
+
+# Rough average transfer size per blocked resource type, used to estimate bandwidth saved
+ESTIMATED_BYTES = {
+    "Image": 40_000,
+    "Media": 500_000,
+    "Font": 40_000,
+    "Other": 5_000,
+}
+
+
+class NetworkPolicy:
+    """
+    What Chrome does not download on Nitter pages (Selenium, so no per-request interception):
+    - blocked_resource_types are switched off in Chrome's content settings (image, popup, notification)
+    - requests matching blocked_url_patterns (DevTools wildcards) fail through Network.setBlockedURLs
+    enabled=False loads everything (requests are still counted).
+    """
+
+    def __init__(self, blocked_resource_types=BLOCKED_RESOURCE_TYPES, blocked_url_patterns=BLOCKED_URL_PATTERNS,
+                 estimated_bytes=None, enabled=True):
+        self.enabled = enabled
+        self.blocked_resource_types = set(blocked_resource_types)
+        unknown = self.blocked_resource_types - set(CONTENT_SETTINGS)
+        if unknown:
+            log.warning(f"⚠️ Chrome cannot block resource types {sorted(unknown)}, use blocked_url_patterns")
+        self.blocked_url_patterns = list(blocked_url_patterns)
+        self.estimated_bytes = {**ESTIMATED_BYTES, **(estimated_bytes or {})}
+
+    @classmethod
+    def from_config(cls, params):
+        params = params or {}
+        return cls(
+            blocked_resource_types=params.get("blocked_resource_types", BLOCKED_RESOURCE_TYPES),
+            blocked_url_patterns=params.get("blocked_url_patterns", BLOCKED_URL_PATTERNS),
+            estimated_bytes=params.get("estimated_bytes"),
+            enabled=params.get("enabled", True),
+        )
+
+    def apply_chrome_options(self, options):
+        """Switch off the blocked content types and enable the performance log used to count requests."""
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        settings = {f"profile.managed_default_content_settings.{CONTENT_SETTINGS[t]}": 2
+                    for t in self.blocked_resource_types if t in CONTENT_SETTINGS}
+        if self.enabled and settings:
+            options.add_experimental_option("prefs", settings)
+        return options
+
+    def apply(self, driver):
+        """Block the URL patterns at the network layer through the Chrome DevTools protocol."""
+        if not self.enabled or not self.blocked_url_patterns:
+            return
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.blocked_url_patterns})
+
+
+def blocked_request_stats(driver, estimated_bytes=ESTIMATED_BYTES):
+    """
+    Drain the performance log and count requests the policy blocked since the last call.
+    Returns (blocked_count, estimated_bytes_saved, Counter of resource types, bytes_received),
+    bytes_received being the encoded size of every request that did load.
+    """
+    by_type = Counter()
+    bytes_received = 0
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        params = message.get("params", {})
+        if message.get("method") == "Network.loadingFinished":
+            bytes_received += params.get("encodedDataLength", 0)
+        elif message.get("method") == "Network.loadingFailed" and params.get("blockedReason") == "inspector":
+            by_type[params.get("type", "Other")] += 1
+
+    bytes_saved = sum(estimated_bytes.get(t, estimated_bytes["Other"]) * n for t, n in by_type.items())
+    return sum(by_type.values()), bytes_saved, by_type, int(bytes_received)
@@ -1,15 +1,29 @@
-from selenium import webdriver 
-from selenium.webdriver.firefox.options import Options
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait as wdw
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from datetime import datetime
 import pandas as pd
 import time 
-import json
+import logging
 import os
-import random
+import yaml
+
+from instrumentation import setup_logging, tracer
+from media import MediaDownloader
+from scheduler import InstancePool, build_jobs, run_jobs
+from nitter_http import BrowserRequired, InstanceError, iter_tweets, make_session
+from network_policy import NetworkPolicy, blocked_request_stats
+from readiness import poll_until, wait_for_stable_count
+from tweet_sinks import export_excel, sink_from_config
+from tweet_extract import LAST_TWEET_JS, TIMELINE_EXTRACT_JS, TWEET_COLUMNS, items_to_records
+from watermarks import WatermarkStore
+
+log = logging.getLogger(__name__)
+
+# "http": plain GETs following the ?cursor= pages (falls back to the browser if the instance needs one)
+# "browser": always Selenium + infinite scroll
+FETCH_MODE = "http"
 
 # Example cookies for session behavior
 cookies = {
@@ -17,186 +31,254 @@ cookies = {
     'hlsPlayback': 'on',
 }
 
-# Minimal headers (user agent only)
+# Minimal headers (user agent only, sent by the HTTP fetch mode)
 headers = {
     'user-agent': 'Mozilla/5.0 (compatible; WebScraper/1.0)',
 }
 
-def driver_init():
-    """Initialize Selenium WebDriver with basic options."""
-    firefox_options = Options()
-    firefox_options.add_argument("--incognito")
-    firefox_options.add_argument("--ignore-certificate-errors")
-    firefox_options.add_argument("--disable-dev-shm-usage")
-    firefox_options.add_argument("--no-sandbox")
-    firefox_options.add_argument("--start-maximized")
-	
-    return webdriver.Chrome(options=firefox_options)
+def driver_init(network_policy):
+    """Initialize Selenium WebDriver with basic options and the network policy (network_parameter)."""
+    chrome_options = Options()
+    chrome_options.add_argument("--incognito")
+    chrome_options.add_argument("--ignore-certificate-errors")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--start-maximized")
+    network_policy.apply_chrome_options(chrome_options)
+
+    driver = webdriver.Chrome(options=chrome_options)
+    network_policy.apply(driver)
+    return driver
 
 
-def scrape_nitter(url, keyword, tweets):
+class InstanceStalled(InstanceError):
+    """The timeline stopped growing although the instance still offers more."""
+
+
+def scrape_nitter(url, keyword, tweets, throttle=None, stop_rule=None, network_policy=None):
     """
     Scrape tweets from a given Nitter instance URL for a specific keyword.
+    network_policy (network_policy.NetworkPolicy) defaults to the built-in blocking rules.
+    throttle() is called before every page the instance serves (initial load and each infinite-scroll page).
+    With a stop_rule (watermarks.StopRule), scrolling stops once already stored tweets are loaded and they are skipped.
     """
 
-    print(f"Scraping keyword '{keyword}' from {url}")
+    log.info(f"Scraping keyword '{keyword}' from {url}")
     
-    driver = driver_init()
-    driver.get(url)
-
-    for name, value in cookies.items():
-        driver.add_cookie({'name': name, 'value': value})
-
-    driver.refresh()
-
-    timeline_container = wdw(driver, 20).until(
-        EC.presence_of_element_located((By.CLASS_NAME, 'timeline'))
-    )
-
-    prev_count = 0
-    max_wait_time = 300  
-    max_no_new_content_time = 60  
-    start_time = time.time()
-
-    while True:
-        driver.execute_script("arguments[0].scrollIntoView({block: 'end'});", timeline_container)
-        time.sleep(2)
-
-        tweets_list = timeline_container.find_elements(By.CLASS_NAME, 'timeline-item')
-        current_count = len(tweets_list)
-        print(f"Tweets found: {current_count}")
-
-        show_more_button = driver.find_elements(By.CLASS_NAME, "show-more")
-
-        if show_more_button:
-            print("Loading more content...")
-            wait_start_time = time.time()
+    with tracer.span("nitter.driver"):
+        network_policy = network_policy or NetworkPolicy()
+        driver = driver_init(network_policy)
+    try:
+        with tracer.span("nitter.load"):
+            if throttle:
+                throttle()
+            driver.get(url)
+
+            for name, value in cookies.items():
+                driver.add_cookie({'name': name, 'value': value})
+
+            if throttle:
+                throttle()
+            driver.refresh()
+
+            timeline_container = wdw(driver, 20).until(
+                EC.presence_of_element_located((By.CLASS_NAME, 'timeline'))
+            )
+            tracer.count("pages_loaded", 2)  # get + refresh after setting cookies
+
+        max_wait_time = 300  
+        max_no_new_content_time = 60  
+        start_time = time.time()
+
+        def scroll_to_end():
+            driver.execute_script("arguments[0].scrollIntoView({block: 'end'});", timeline_container)
+
+        def tweet_count():
+            return len(timeline_container.find_elements(By.CLASS_NAME, 'timeline-item'))
+
+        def reached_watermark():
+            if stop_rule is None:
+                return False
+            last = driver.execute_script(LAST_TWEET_JS, timeline_container)
+            return last is not None and stop_rule.reached(last)
+
+        with tracer.span("nitter.scroll", scrolls=0) as scroll:
+            scroll_to_end()
+            current_count = wait_for_stable_count(tweet_count, timeout=10)
 
             while True:
-                time.sleep(10)
-                driver.execute_script("arguments[0].scrollIntoView({block: 'end'});", timeline_container)
-                tweets_list = timeline_container.find_elements(By.CLASS_NAME, 'timeline-item')
-                new_count = len(tweets_list)
-
-                if new_count > current_count:
-                    print("New content loaded!")
-                    prev_count = new_count
-                    break  
-
-                if time.time() - wait_start_time > max_no_new_content_time:
-                    print("No new content after waiting. Stopping...")
-                    exit()
-
-        else:
-            print("No more content to load. Stopping...")
-            break
-
-        if time.time() - start_time > max_wait_time:
-            print("Total time exceeded. Stopping...")
-            break
-
-        time.sleep(3)
-
-    # Extract tweets
-    tweets_list = timeline_container.find_elements(By.CLASS_NAME, 'timeline-item')
-    print(f'Total tweets extracted: {len(tweets_list)}')
-
-    for tweet in tweets_list:
+                log.debug(f"Tweets found: {current_count}")
+
+                if reached_watermark():
+                    log.info("Reached already stored tweets. Stopping...")
+                    tracer.count("watermark_stops")
+                    break
+
+                show_more_button = driver.find_elements(By.CLASS_NAME, "show-more")
+
+                if show_more_button:
+                    log.debug("Loading more content...")
+
+                    scroll["scrolls"] += 1
+                    tracer.count("scroll_iterations")
+                    if throttle:
+                        throttle()
+                    # Keep nudging the infinite scroll until the item count grows, up to the stall limit
+                    previous_count = current_count
+                    grew = poll_until(
+                        lambda: scroll_to_end() or tweet_count() > previous_count,
+                        timeout=max_no_new_content_time,
+                    )
+                    if not grew:
+                        raise InstanceStalled(f"No new content after {max_no_new_content_time}s at {url}")
+
+                    log.debug("New content loaded!")
+                    current_count = wait_for_stable_count(tweet_count, timeout=10)
+
+                else:
+                    log.info("No more content to load. Stopping...")
+                    break
+
+                if time.time() - start_time > max_wait_time:
+                    log.warning("Total time exceeded. Stopping...")
+                    break
+
+        with tracer.span("nitter.extract") as extract:
+            # Extract tweets: one execute_script for the whole timeline, one DataFrame at the end
+            items = driver.execute_script(TIMELINE_EXTRACT_JS, timeline_container)
+            if stop_rule is not None:
+                fresh_items = [item for item in items if not stop_rule.stored(item)]
+                tracer.count("tweets_already_stored", len(items) - len(fresh_items))
+                items = fresh_items
+            records = items_to_records(items, keyword, time.strftime('%Y-%m-%d %H:%M:%S'), time.strftime('%Y-%m-%d'))
+            log.info(f'Total tweets extracted: {len(records)}')
+            extracted = pd.DataFrame(records, columns=TWEET_COLUMNS)
+            tweets = extracted if tweets.empty else pd.concat([tweets, extracted], ignore_index=True)
+            extract["items"] = len(records)
+            tracer.count("items_extracted", len(records))
+
+        blocked, bytes_saved, _, bytes_received = blocked_request_stats(driver, network_policy.estimated_bytes)
+        tracer.count("bytes_received", bytes_received)
+        tracer.count("requests_blocked", blocked)
+        log.info(f"Network policy: {blocked} requests blocked, ~{bytes_saved / 1_000_000:.1f} MB saved, "
+                 f"{bytes_received / 1_000_000:.1f} MB received")
+
+        return tweets
+    finally:
+        driver.quit()
+
+
+def scrape_nitter_http(url, keyword, tweets, max_pages=None, throttle=None, stop_rule=None):
+    """
+    Scrape the same timeline without a browser: one keep-alive session, one GET per cursor page.
+    Raises BrowserRequired when the instance does not serve plain HTML.
+    """
+    log.info(f"Scraping keyword '{keyword}' from {url} (http)")
+
+    session = make_session(headers, cookies)
+    try:
+        records = list(iter_tweets(
+            session, url, keyword, max_pages=max_pages, throttle=throttle, stop_rule=stop_rule
+        ))
+    finally:
+        session.close()
+
+    log.info(f'Total tweets extracted: {len(records)}')
+    tracer.count("items_extracted", len(records))
+    extracted = pd.DataFrame(records, columns=TWEET_COLUMNS)
+    return extracted if tweets.empty else pd.concat([tweets, extracted], ignore_index=True)
+
+
+def scrape(url, keyword, tweets, fetch_mode=FETCH_MODE, max_pages=None, throttle=None, stop_rule=None,
+           network_policy=None):
+    """Scrape with fetch_mode, falling back to Selenium when the HTTP mode cannot read the instance."""
+    if fetch_mode == "http":
         try:
-            tweet_link = tweet.find_element(By.CLASS_NAME,'tweet-link').get_attribute("href")
-            tweet_username_fullname = tweet.find_element(By.CLASS_NAME, 'fullname-and-username')
-            tweet_fullname = tweet_username_fullname.find_element(By.CLASS_NAME, 'fullname').text.strip()
-            tweet_username = tweet_username_fullname.find_element(By.CLASS_NAME, 'username').text.strip()
-
-            tweet_date_element = tweet.find_element(By.CLASS_NAME, 'tweet-date')
-            date_anchor = tweet_date_element.find_element(By.TAG_NAME, 'a')
-            timestamp_title = date_anchor.get_attribute('title')
-
-            if timestamp_title:
-                clean_timestamp = timestamp_title.replace(' ·', '').replace(' UTC', '')
-                dt = datetime.strptime(clean_timestamp, '%b %d, %Y %I:%M %p')
-                tweet_timestamp = dt.strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                tweet_timestamp = None
-
-            tweet_content = tweet.find_element(By.CLASS_NAME, 'tweet-content.media-body')
-            text = tweet_content.text.strip() if tweet_content else None
-
-            # Extract images
-            img_src_list = [
-                img.get_attribute('src')
-                for img in tweet.find_elements(By.CSS_SELECTOR, 'div.attachments .attachment.image a.still-image img')
-            ]
-
-            # Extract videos
-            vid_src_list = [
-                vid.get_attribute('data-url')
-                for vid in tweet.find_elements(By.CSS_SELECTOR, 'div.attachments.card .gallery-video .attachment.video-container video')
-            ]
-
-            # Extract stats
-            comment_count = retweet_count = quote_count = heart_count = 0
-            try:
-                tweet_stats = tweet.find_element(By.CLASS_NAME, 'tweet-stats')
-                stats = tweet_stats.find_elements(By.CLASS_NAME, 'tweet-stat')
-                if len(stats) >= 4:
-                    comment_count = stats[0].text.strip() or '0'
-                    retweet_count = stats[1].text.strip() or '0'
-                    quote_count = stats[2].text.strip() or '0'
-                    heart_count = stats[3].text.strip() or '0'
-            except NoSuchElementException:
-                pass
-
-            extract_datetime = time.strftime('%Y-%m-%d %H:%M:%S')  
-            extract_date = time.strftime('%Y-%m-%d')
-            
-            tweets_temp = pd.DataFrame({
-                'keyword': [keyword],
-                'tweet_link': [tweet_link],
-                'tweet_username': [tweet_username],
-                'tweet_fullname': [tweet_fullname],
-                'tweet_timestamp': [tweet_timestamp],
-                'tweet': [text],
-                'img_src': [json.dumps(img_src_list)], 
-                'vid_src': [json.dumps(vid_src_list)], 
-                'comment_count': [comment_count],
-                'retweet_count': [retweet_count],
-                'quote_count': [quote_count],
-                'heart_count': [heart_count],
-                'extract_datetime': [extract_datetime],
-                'extract_date': [extract_date]
-            })
-
-            tweets = pd.concat([tweets, tweets_temp], ignore_index=True)
-            time.sleep(random.uniform(3, 7))
-
-        except Exception as e:
-            print(f"Error extracting tweet: {e}")
-            continue
-
-    driver.quit()
-    return tweets
-        
-
-def save_to_csv(all_tweets):
-    """Save tweets to Excel file."""
-    extract_date = time.strftime('%Y-%m-%d')
-    file_path = f"Result/tweet_data_{extract_date}.xlsx"
-    sheet_name = "tweet_data"
+            return scrape_nitter_http(
+                url, keyword, tweets, max_pages=max_pages, throttle=throttle, stop_rule=stop_rule
+            )
+        except BrowserRequired as e:
+            log.warning(f"⚠️ {e}; falling back to the browser")
+    return scrape_nitter(url, keyword, tweets, throttle=throttle, stop_rule=stop_rule, network_policy=network_policy)
+
 
+def write_progress(progress, pool):
+    """Per-keyword outcome of the run, next to the tweets."""
+    file_path = f"Result/keyword_progress_{time.strftime('%Y-%m-%d')}.csv"
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    all_tweets.to_excel(file_path, sheet_name=sheet_name, index=False)
+    pd.DataFrame(progress).to_csv(file_path, index=False)
 
-    print(f"Created new file: {file_path} with sheet '{sheet_name}'")
+    failed = [row["keyword"] for row in progress if row["status"] != "done"]
+    log.info(f"Keywords done: {len(progress) - len(failed)}/{len(progress)} (progress: {file_path})")
+    if failed:
+        log.warning(f"⚠️ Failed keywords: {', '.join(failed)}")
+    for url, stats in pool.summary().items():
+        log.info(f"Instance {url}: {stats}")
 
 
 def main():
-    """Example main function (modify with your own Nitter instance and keyword)."""
-    all_tweets = pd.DataFrame()
-    url = "https://nitter.net/search?q=example"
-    keyword = "example"
-    all_tweets = scrape_nitter(url, keyword, all_tweets)
-    save_to_csv(all_tweets)
+    """Scrape every keyword/profile in nitter_config.yaml (NITTER_CONFIG) across the configured instances."""
+    with open(os.environ.get("NITTER_CONFIG", "nitter_config.yaml"), "r") as file:
+        config = yaml.safe_load(file)
+    scrape_parameter = config.get("scrape_parameter", {})
+    job_parameter = config.get("job_parameter", {})
+    incremental_parameter = config.get("incremental_parameter", {})
+    output_parameter = config.get("output_parameter", {})
+    media_parameter = config.get("media_parameter", {})
+    network_parameter = config.get("network_parameter", {})
+
+    setup_logging(os.environ.get("LOG_LEVEL", "INFO"))
+    tracer.configure("nitter", trace_path="Result/trace.jsonl", metrics_path="Result/metrics.prom")
+
+    jobs = build_jobs(job_parameter.get("keywords"), job_parameter.get("profiles"))
+    pool = InstancePool.from_config(config["instance_parameter"])
+    fetch_mode = scrape_parameter.get("fetch_mode", FETCH_MODE)
+    max_pages = scrape_parameter.get("max_pages")
+    watermarks = WatermarkStore.from_config(incremental_parameter) if incremental_parameter.get("enabled") else None
+    sink = sink_from_config(output_parameter)
+    network_policy = NetworkPolicy.from_config(network_parameter)
+    media = None
+    if media_parameter.get("enabled"):
+        media_session = make_session(headers, cookies, pool_size=media_parameter.get("workers", 8))
+        media = MediaDownloader.from_config(media_parameter, media_session)
+    log.info(f"🚀 {len(jobs)} jobs over {len(pool.instances)} instances ({fetch_mode} mode)")
+
+    def scrape_job(url, keyword, throttle):
+        stop_rule = watermarks.stop_rule(keyword) if watermarks else None
+        return scrape(
+            url, keyword, pd.DataFrame(),
+            fetch_mode=fetch_mode, max_pages=max_pages, throttle=throttle, stop_rule=stop_rule,
+            network_policy=network_policy,
+        )
+
+    def save_job(job, tweets):
+        # Written as each job finishes; the watermark only moves once its tweets are stored,
+        # so a crashed run fetches the same delta again
+        if media:
+            tweets = media.attach(tweets)
+        with tracer.span("nitter.write", keyword=job["keyword"]) as write:
+            write["items"] = sink.append(tweets)
+        if watermarks:
+            watermarks.advance(job["keyword"], tweets)
+
+    _, progress = run_jobs(
+        jobs, pool, scrape_job,
+        workers=scrape_parameter.get("workers", 4),
+        max_attempts=scrape_parameter.get("max_attempts", 3),
+        on_result=save_job,
+    )
+    log.info(f"🗄️ Tweet sink: {sink.stats}")
+    if output_parameter.get("export_excel"):
+        export_excel(sink, output_parameter["export_excel"].format(date=time.strftime('%Y-%m-%d')))
+    sink.close()
+    if media:
+        log.info(f"🖼️ Media: {media.stats}")
+        media.close()
+        media_session.close()
+    if watermarks:
+        watermarks.close()
+    write_progress(progress, pool)
+    tracer.finish(log)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,112 @@
+import logging
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from instrumentation import tracer
+from tweet_extract import extract_timeline_from_html, item_to_record
+
+log = logging.getLogger(__name__)
+
+# Nitter renders search timelines server-side and links the next page as "Load more" (?cursor=...),
+# so plain GETs over one keep-alive session replace the browser + infinite scroll.
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+# Still rate limited / forbidden after retries: the instance is refusing us, not just slow
+BLOCKED_STATUSES = [403, 429]
+
+
+class InstanceError(Exception):
+    """The Nitter instance cannot serve this job right now; another instance may."""
+
+
+class InstanceBlocked(InstanceError):
+    """The instance answered 403/429 even after retrying."""
+
+
+class BrowserRequired(Exception):
+    """The instance did not serve a plain HTML timeline (JS challenge, error page, ...): use the Selenium path."""
+
+
+def make_session(headers, cookies, pool_size=8, retries=3, backoff=1.0):
+    """requests.Session with pooled keep-alive connections and retries on 429/5xx (honours Retry-After)."""
+    session = requests.Session()
+    session.headers.update(headers)
+    session.cookies.update(cookies)
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def iter_timeline(session, url, max_pages=None, timeout=30, throttle=None, stop_rule=None):
+    """
+    Follow the ?cursor= chain from url and yield raw timeline items (the TIMELINE_EXTRACT_JS dicts),
+    page by page. Tweets repeated across pages are yielded once. throttle() is called before every GET.
+    With a stop_rule (watermarks.StopRule), already stored tweets are skipped and paging ends at the first page
+    that reaches them.
+    Raises InstanceBlocked on 403/429 and BrowserRequired if the first page is not a usable timeline.
+    """
+    seen = set()
+    page = 0
+    while url and (max_pages is None or page < max_pages):
+        if throttle:
+            throttle()
+        with tracer.span("nitter.fetch", page=page) as fetch:
+            response = session.get(url, timeout=timeout)
+            tracer.count("pages_loaded")
+            tracer.count("bytes_received", len(response.content))
+            if response.status_code in BLOCKED_STATUSES:
+                raise InstanceBlocked(f"HTTP {response.status_code} on page {page} from {url}")
+            if response.status_code != 200:
+                if page == 0:
+                    raise BrowserRequired(f"HTTP {response.status_code} from {url}")
+                log.warning(f"⚠️ HTTP {response.status_code} on page {page}, stopping at {url}")
+                fetch["ok"] = False
+                break
+            items, next_url = extract_timeline_from_html(response.text, response.url)
+            if items is None:
+                if page == 0:
+                    raise BrowserRequired(f"No timeline in the response from {url}")
+                log.warning(f"⚠️ No timeline on page {page}, stopping at {url}")
+                fetch["ok"] = False
+                break
+            new_items = [item for item in items if item["tweet_link"] not in seen]
+            seen.update(item["tweet_link"] for item in new_items)
+            reached = False
+            if stop_rule is not None:
+                reached = any(stop_rule.reached(item) for item in new_items)
+                fresh_items = [item for item in new_items if not stop_rule.stored(item)]
+                tracer.count("tweets_already_stored", len(new_items) - len(fresh_items))
+                new_items = fresh_items
+            fetch["items"] = len(new_items)
+
+        log.debug(f"Page {page}: {len(new_items)} new tweets")
+        yield from new_items
+        if reached:
+            log.debug(f"Reached the watermark on page {page}")
+            tracer.count("watermark_stops")
+            break
+        if next_url == url:
+            break
+        url = next_url
+        page += 1
+
+
+def iter_tweets(session, url, keyword, max_pages=None, timeout=30, throttle=None, stop_rule=None):
+    """iter_timeline as output rows (TWEET_COLUMNS), one dict per tweet."""
+    items = iter_timeline(session, url, max_pages=max_pages, timeout=timeout, throttle=throttle, stop_rule=stop_rule)
+    for item in items:
+        try:
+            yield item_to_record(item, keyword, time.strftime('%Y-%m-%d %H:%M:%S'), time.strftime('%Y-%m-%d'))
+        except Exception as e:
+            log.warning(f"Error extracting tweet {item.get('tweet_link')}: {e}")
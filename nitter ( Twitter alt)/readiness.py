@@ -0,0 +1,28 @@
+import time
+
+# Event-driven waits used in place of fixed sleeps (same helpers as google_maps/readiness.py).
+# All timeouts are in seconds.
+
+
+def poll_until(predicate, timeout, interval=0.5):
+    """Call predicate until it returns something truthy or timeout passes. Returns its last value."""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = predicate()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(interval)
+
+
+def wait_for_stable_count(count_fn, timeout, settle=1.0, interval=0.5):
+    """Wait until count_fn() has not changed for `settle` seconds (or timeout). Returns the last count."""
+    deadline = time.monotonic() + timeout
+    count = count_fn()
+    changed_at = time.monotonic()
+    while time.monotonic() < deadline and time.monotonic() - changed_at < settle:
+        time.sleep(interval)
+        new_count = count_fn()
+        if new_count != count:
+            count = new_count
+            changed_at = time.monotonic()
+    return count
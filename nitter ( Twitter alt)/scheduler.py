@@ -0,0 +1,200 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote_plus
+
+import pandas as pd
+
+from instrumentation import tracer
+
+log = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Request budget for one instance: refills rate_per_minute tokens per minute, holds at most burst. Thread-safe."""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class Instance:
+    """One Nitter instance: its token bucket, health and counters."""
+
+    def __init__(self, url, rate_per_minute, burst):
+        self.url = url.rstrip("/")
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.cooldowns = 0
+        self.cooldown_until = 0.0
+        self.stats = {"jobs": 0, "ok": 0, "failed": 0, "tweets": 0, "throttled_s": 0.0}
+
+    def throttle(self):
+        self.stats["throttled_s"] += self.bucket.acquire()
+
+    def healthy(self, now):
+        return now >= self.cooldown_until
+
+
+class InstancePool:
+    """
+    Hands out Nitter instances to jobs:
+    - the healthy instance with the fewest jobs in flight (ties: fewest failures), skipping ones the job already tried
+    - failure_threshold failures in a row puts an instance in cooldown (cooldown_s, doubling up to max_cooldown_s)
+    - a success clears the failure streak and the cooldown backoff
+    When every candidate is cooling down, choose() waits for the first one to come back. Thread-safe.
+    """
+
+    def __init__(self, urls, rate_per_minute=20, burst=5, failure_threshold=2, cooldown_s=120, max_cooldown_s=1800):
+        if not urls:
+            raise ValueError("At least one Nitter instance is required")
+        self.instances = [Instance(url, rate_per_minute, burst) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, params):
+        return cls(
+            params["instances"],
+            rate_per_minute=params.get("rate_per_minute", 20),
+            burst=params.get("burst", 5),
+            failure_threshold=params.get("failure_threshold", 2),
+            cooldown_s=params.get("cooldown_s", 120),
+            max_cooldown_s=params.get("max_cooldown_s", 1800),
+        )
+
+    def choose(self, tried=()):
+        """Reserve an instance for one attempt (release it with record())."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                # Once every instance has been tried, any of them may be retried
+                candidates = [i for i in self.instances if i.url not in tried] or self.instances
+                healthy = [i for i in candidates if i.healthy(now)]
+                if healthy:
+                    instance = min(healthy, key=lambda i: (i.in_flight, i.consecutive_failures))
+                    instance.in_flight += 1
+                    instance.stats["jobs"] += 1
+                    return instance
+                wait = min(i.cooldown_until for i in candidates) - now
+            log.info(f"⏸️ All candidate instances cooling down, waiting {wait:.0f}s")
+            time.sleep(max(wait, 0.1))
+
+    def record(self, instance, ok, tweets=0, error=None):
+        with self.lock:
+            instance.in_flight -= 1
+            if ok:
+                instance.stats["ok"] += 1
+                instance.stats["tweets"] += tweets
+                instance.consecutive_failures = 0
+                instance.cooldowns = 0
+                return
+            instance.stats["failed"] += 1
+            instance.consecutive_failures += 1
+            tracer.count("instance_failures")
+            if instance.consecutive_failures >= self.failure_threshold:
+                cooldown = min(self.max_cooldown_s, self.cooldown_s * 2 ** instance.cooldowns)
+                instance.cooldowns += 1
+                instance.consecutive_failures = 0
+                instance.cooldown_until = time.monotonic() + cooldown
+                tracer.count("instance_cooldowns")
+                log.warning(f"🧊 {instance.url} cooling down for {cooldown:.0f}s after repeated failures ({error})")
+
+    def summary(self):
+        return {i.url: dict(i.stats, cooling_down=not i.healthy(time.monotonic())) for i in self.instances}
+
+
+def build_jobs(keywords=(), profiles=()):
+    """Search jobs for keywords and timeline jobs for profiles (usernames, with or without @)."""
+    jobs = [{"kind": "search", "term": keyword, "keyword": keyword} for keyword in dict.fromkeys(keywords or [])]
+    for profile in dict.fromkeys(profiles or []):
+        username = profile.lstrip("@")
+        jobs.append({"kind": "profile", "term": username, "keyword": f"@{username}"})
+    return jobs
+
+
+def job_url(instance_url, job):
+    if job["kind"] == "profile":
+        return f"{instance_url}/{job['term']}"
+    return f"{instance_url}/search?f=tweets&q={quote_plus(job['term'])}"
+
+
+def run_jobs(jobs, pool, scrape_fn, workers=4, max_attempts=3, on_result=None):
+    """
+    Run every job on `workers` threads. scrape_fn(url, keyword, throttle) returns the job's tweets as a DataFrame;
+    an exception fails the attempt and the job moves to another instance (up to max_attempts).
+    on_result(job, tweets) is called on this thread as each job finishes (e.g. to write them out);
+    without it the tweets are collected.
+    Returns (collected tweets, one progress row per job).
+    """
+    progress = {job["keyword"]: {"keyword": job["keyword"], "kind": job["kind"], "status": "pending",
+                                 "tweets": 0, "attempts": 0, "instance": None, "elapsed_s": 0.0, "error": None}
+                for job in jobs}
+
+    def run_job(job):
+        row = progress[job["keyword"]]
+        row["status"] = "running"
+        started = time.perf_counter()
+        tried = []
+        while row["attempts"] < max_attempts:
+            instance = pool.choose(tried)
+            tried.append(instance.url)
+            row["attempts"] += 1
+            row["instance"] = instance.url
+            try:
+                with tracer.span("nitter.scrape", keyword=job["keyword"], instance=instance.url) as span:
+                    tweets = scrape_fn(job_url(instance.url, job), job["keyword"], instance.throttle)
+                    span["items"] = len(tweets)
+            except Exception as e:
+                pool.record(instance, ok=False, error=e)
+                row["error"] = repr(e)[:200]
+                log.warning(f"⚠️ '{job['keyword']}' failed on {instance.url} "
+                            f"(attempt {row['attempts']}/{max_attempts}): {e}")
+                continue
+            pool.record(instance, ok=True, tweets=len(tweets))
+            row.update(status="done", tweets=len(tweets), error=None, elapsed_s=time.perf_counter() - started)
+            return tweets
+        row.update(status="failed", elapsed_s=time.perf_counter() - started)
+        tracer.count("jobs_failed")
+        return None
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="nitter") as executor:
+        futures = {executor.submit(run_job, job): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            job = futures[future]
+            tweets = future.result()
+            row = progress[job["keyword"]]
+            if tweets is not None and not tweets.empty:
+                if on_result:
+                    on_result(job, tweets)
+                else:
+                    results.append(tweets)
+            marker = "✅" if row["status"] == "done" else "❌"
+            log.info(f"{marker} [{done}/{len(jobs)}] '{job['keyword']}': {row['tweets']} tweets via "
+                     f"{row['instance']} in {row['elapsed_s']:.1f}s ({row['attempts']} attempt(s))")
+
+    all_tweets = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    return all_tweets, list(progress.values())
@@ -0,0 +1,194 @@
+import json
+import logging
+import re
+from datetime import datetime
+from urllib.parse import urljoin
+
+from cssselect import GenericTranslator
+from lxml import etree
+from lxml import html as lxml_html
+
+log = logging.getLogger(__name__)
+
+TWEET_COLUMNS = [
+    "keyword", "tweet_link", "tweet_username", "tweet_fullname", "tweet_timestamp", "tweet",
+    "img_src", "vid_src", "img_local", "vid_local", "comment_count", "retweet_count", "quote_count", "heart_count",
+    "extract_datetime", "extract_date",
+]
+
+# One round-trip: every tweet in the timeline comes back as a compact dict.
+# Rows without a tweet link ("Load newest", "show-more") are skipped.
+# Properties (a.href, img.src) are read rather than attributes, so links come back absolute like get_attribute did.
+# pinned/retweet flag items that break the timeline's newest-first order (see watermarks.py).
+TIMELINE_EXTRACT_JS = """
+const timeline = arguments[0];
+const text = el => el ? el.innerText.trim() : null;
+const STAT_ORDER = ['comment', 'retweet', 'quote', 'heart'];
+return Array.from(timeline.querySelectorAll('.timeline-item')).map(item => {
+    const link = item.querySelector('.tweet-link');
+    if (!link) return null;
+    // Keyed by icon (comment/retweet/quote/heart), by position when a stat has no icon
+    const stats = {};
+    item.querySelectorAll('.tweet-stats .tweet-stat').forEach((stat, i) => {
+        const icon = stat.querySelector('[class^="icon-"]:not(.icon-container)');
+        stats[icon ? icon.className.split(' ')[0].replace('icon-', '') : STAT_ORDER[i]] = text(stat);
+    });
+    const date = item.querySelector('.tweet-date a');
+    return {
+        tweet_link: link.href,
+        fullname: text(item.querySelector('.fullname-and-username .fullname')),
+        username: text(item.querySelector('.fullname-and-username .username')),
+        timestamp_title: date ? date.getAttribute('title') : null,
+        text: text(item.querySelector('.tweet-content.media-body')),
+        img_src: Array.from(item.querySelectorAll('div.attachments .attachment.image a.still-image img')).map(img => img.src),
+        vid_src: Array.from(item.querySelectorAll(
+            'div.attachments.card .gallery-video .attachment.video-container video'
+        )).map(video => video.getAttribute('data-url')),
+        stats: stats,
+        pinned: item.querySelector('.pinned') !== null,
+        retweet: item.querySelector('.retweet-header') !== null,
+    };
+}).filter(item => item !== null);
+"""
+
+# Oldest tweet loaded so far in timeline order (pinned tweets and retweets skipped), to stop scrolling early
+LAST_TWEET_JS = """
+const items = Array.from(arguments[0].querySelectorAll('.timeline-item')).reverse();
+for (const item of items) {
+    const link = item.querySelector('.tweet-link');
+    if (!link || item.querySelector('.pinned') || item.querySelector('.retweet-header')) continue;
+    const date = item.querySelector('.tweet-date a');
+    return {tweet_link: link.href, timestamp_title: date ? date.getAttribute('title') : null};
+}
+return null;
+"""
+STAT_ORDER = ["comment", "retweet", "quote", "heart"]
+
+
+def _compile_css(css):
+    # descendant:: so an element never matches itself, same as querySelectorAll in the browser
+    return etree.XPath(GenericTranslator().css_to_xpath(css, prefix="descendant::"))
+
+
+# Compiled once; the same selectors TIMELINE_EXTRACT_JS uses
+SELECT = {
+    "timeline": _compile_css(".timeline"),
+    "item": _compile_css(".timeline-item"),
+    "link": _compile_css(".tweet-link"),
+    "fullname": _compile_css(".fullname-and-username .fullname"),
+    "username": _compile_css(".fullname-and-username .username"),
+    "date": _compile_css(".tweet-date a"),
+    "text": _compile_css(".tweet-content.media-body"),
+    "img": _compile_css("div.attachments .attachment.image a.still-image img"),
+    "video": _compile_css("div.attachments.card .gallery-video .attachment.video-container video"),
+    "stat": _compile_css(".tweet-stats .tweet-stat"),
+    "pinned": _compile_css(".pinned"),
+    "retweet": _compile_css(".retweet-header"),
+    "stat_icon": etree.XPath("descendant::*[starts-with(@class, 'icon-') and not(starts-with(@class, 'icon-container'))]"),
+    # "Load more" at the end of the timeline; the "Load newest" row on cursor pages is a .timeline-item
+    "more": etree.XPath(
+        "descendant::*[contains(concat(' ', normalize-space(@class), ' '), ' timeline ')]"
+        "/*[contains(concat(' ', normalize-space(@class), ' '), ' show-more ')"
+        " and not(contains(concat(' ', normalize-space(@class), ' '), ' timeline-item '))]//a/@href"
+    ),
+}
+
+
+def extract_timeline_from_html(html_text, page_url):
+    """
+    Offline equivalent of TIMELINE_EXTRACT_JS for a server-rendered Nitter page:
+    (items, next_page_url). items is None when the page has no timeline at all (e.g. a JS challenge page);
+    next_page_url is None on the last page.
+    """
+    tree = lxml_html.fromstring(html_text)
+    timelines = SELECT["timeline"](tree)
+    if not timelines:
+        return None, None
+
+    def text(elements):
+        return elements[0].text_content().strip() if elements else None
+
+    items = []
+    for item in SELECT["item"](timelines[0]):
+        link = SELECT["link"](item)
+        if not link:
+            continue
+        stats = {}
+        for i, stat in enumerate(SELECT["stat"](item)):
+            icon = SELECT["stat_icon"](stat)
+            key = icon[0].get("class").split()[0].replace("icon-", "") if icon else STAT_ORDER[i] if i < 4 else str(i)
+            stats[key] = stat.text_content().strip()
+        date = SELECT["date"](item)
+        items.append({
+            "tweet_link": urljoin(page_url, link[0].get("href")),
+            "fullname": text(SELECT["fullname"](item)),
+            "username": text(SELECT["username"](item)),
+            "timestamp_title": date[0].get("title") if date else None,
+            "text": text(SELECT["text"](item)),
+            "img_src": [urljoin(page_url, img.get("src")) for img in SELECT["img"](item)],
+            "vid_src": [video.get("data-url") for video in SELECT["video"](item)],
+            "stats": stats,
+            "pinned": bool(SELECT["pinned"](item)),
+            "retweet": bool(SELECT["retweet"](item)),
+        })
+
+    more = SELECT["more"](tree)
+    return items, urljoin(page_url, more[0]) if more else None
+
+
+STAT_RE = re.compile(r"([\d.,]+)\s*([KMB]?)", re.IGNORECASE)
+STAT_MULTIPLIERS = {"": 1, "K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+
+
+def parse_stat(text):
+    """Nitter's compact counts -> int: "" -> 0, "1,024" -> 1024, "1.2K" -> 1200, "3M" -> 3000000."""
+    match = STAT_RE.search(text or "")
+    if not match:
+        return 0
+    number, suffix = match.group(1).replace(",", ""), match.group(2).upper()
+    try:
+        return int(round(float(number) * STAT_MULTIPLIERS[suffix]))
+    except ValueError:
+        return 0
+
+
+def parse_timestamp(title):
+    """'Mar 5, 2025 · 3:04 PM UTC' -> '2025-03-05 15:04:00' (None without a title)."""
+    if not title:
+        return None
+    clean_timestamp = title.replace(" ·", "").replace(" UTC", "")
+    return datetime.strptime(clean_timestamp, "%b %d, %Y %I:%M %p").strftime("%Y-%m-%d %H:%M:%S")
+
+
+def item_to_record(item, keyword, extract_datetime, extract_date):
+    """Turn a raw timeline item dict into the output row schema (TWEET_COLUMNS)."""
+    stats = item.get("stats") or {}
+    return {
+        "keyword": keyword,
+        "tweet_link": item.get("tweet_link"),
+        "tweet_username": item.get("username"),
+        "tweet_fullname": item.get("fullname"),
+        "tweet_timestamp": parse_timestamp(item.get("timestamp_title")),
+        "tweet": item.get("text"),
+        "img_src": json.dumps(item.get("img_src") or []),
+        "vid_src": json.dumps(item.get("vid_src") or []),
+        # Local copies, filled in by the optional media stage (media.py)
+        "img_local": "[]",
+        "vid_local": "[]",
+        "comment_count": parse_stat(stats.get("comment")),
+        "retweet_count": parse_stat(stats.get("retweet")),
+        "quote_count": parse_stat(stats.get("quote")),
+        "heart_count": parse_stat(stats.get("heart")),
+        "extract_datetime": extract_datetime,
+        "extract_date": extract_date,
+    }
+
+
+def items_to_records(items, keyword, extract_datetime, extract_date):
+    records = []
+    for item in items:
+        try:
+            records.append(item_to_record(item, keyword, extract_datetime, extract_date))
+        except Exception as e:
+            log.warning(f"Error extracting tweet {item.get('tweet_link')}: {e}")
+    return records
@@ -0,0 +1,257 @@
+import abc
+import glob
+import json
+import logging
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from tweet_extract import TWEET_COLUMNS
+
+log = logging.getLogger(__name__)
+
+# One row per tweet per keyword (a tweet can match several keywords)
+KEY_COLUMNS = ["keyword", "tweet_link"]
+COUNT_COLUMNS = ["comment_count", "retweet_count", "quote_count", "heart_count"]
+EXCEL_MAX_ROWS = 1_048_575  # sheet limit minus the header
+
+
+class RollingFileSink(abc.ABC):
+    """
+    Append-only tweet files under root/<prefix>-<date>-<n>.<extension>:
+    - append(df) writes each batch straight away; a row already written with the same counts is dropped,
+      a refreshed tweet with new counts is appended again (read() keeps the last row per tweet)
+    - a new file starts when the day changes or the current file passes max_bytes
+    - today's earlier files are read once at start, so a rerun appends only what changed
+    """
+
+    extension = None
+
+    def __init__(self, root="Result/tweets", prefix="tweets", max_bytes=100_000_000):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.date = None
+        self.path = None
+        self.seen = {}
+        self.stats = {"rows": 0, "duplicates": 0, "files": 0}
+
+    def _paths(self, date):
+        return sorted(glob.glob(os.path.join(self.root, f"{self.prefix}-{date}-*.{self.extension}")))
+
+    def _next_path(self):
+        self._close_file()
+        # Count in-progress (.tmp) and quarantined parts too, so a new part never reuses their number
+        n = len(glob.glob(os.path.join(self.root, f"{self.prefix}-{self.date}-*.{self.extension}*")))
+        self.path = os.path.join(self.root, f"{self.prefix}-{self.date}-{n:03d}.{self.extension}")
+        self.stats["files"] += 1
+
+    def _remember(self, df):
+        """Marks rows as written; returns the mask of rows that were not (or had other counts)."""
+        mask = []
+        for row in df[KEY_COLUMNS + COUNT_COLUMNS].itertuples(index=False):
+            key, counts = tuple(row[:2]), tuple(row[2:])
+            mask.append(self.seen.get(key) != counts)
+            self.seen[key] = counts
+        return mask
+
+    def _roll(self):
+        today = time.strftime("%Y-%m-%d")
+        if today != self.date:
+            self._close_file()
+            self.date = today
+            self.seen = {}
+            for path in self._paths(today):
+                self._remember(self._read_file(path))
+            self._next_path()
+        elif self._size() >= self.max_bytes:
+            self._next_path()
+
+    def _size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def append(self, df):
+        """Write df (TWEET_COLUMNS rows) now. Returns the rows actually written."""
+        if df.empty:
+            return 0
+        self._roll()
+        df = df.reindex(columns=TWEET_COLUMNS).drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        fresh = df[self._remember(df)]
+        self.stats["duplicates"] += len(df) - len(fresh)
+        if not fresh.empty:
+            self._write(fresh)
+            self.stats["rows"] += len(fresh)
+        return len(fresh)
+
+    def read(self, date=None):
+        """Every tweet written on date (default today), latest row per tweet."""
+        self._close_file()
+        frames = [self._read_file(path) for path in self._paths(date or time.strftime("%Y-%m-%d"))]
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=TWEET_COLUMNS)
+        df = pd.concat(frames, ignore_index=True)
+        return df.drop_duplicates(subset=KEY_COLUMNS, keep="last", ignore_index=True)
+
+    def close(self):
+        self._close_file()
+
+    def _close_file(self):
+        pass
+
+    @abc.abstractmethod
+    def _write(self, df):
+        """Append df to self.path."""
+
+    @abc.abstractmethod
+    def _read_file(self, path):
+        """One part file as a DataFrame in TWEET_COLUMNS."""
+
+
+class JsonlSink(RollingFileSink):
+    """One JSON object per line; every batch is flushed before append() returns."""
+
+    extension = "jsonl"
+
+    def _write(self, df):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in df.to_dict("records"):
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def _read_file(self, path):
+        try:
+            return pd.read_json(path, lines=True, dtype=False)
+        except ValueError:
+            # A crash can leave a half-written last line; keep every complete one
+            with open(path, "r", encoding="utf-8") as f:
+                records = []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        log.warning(f"⚠️ Skipping a truncated line in {path}")
+            return pd.DataFrame(records, columns=TWEET_COLUMNS)
+
+
+class ParquetSink(RollingFileSink):
+    """
+    Parquet with one row group per batch. The open part is written as <name>.parquet.tmp and renamed when it
+    is closed (rollover or close()), so a crash costs only that part, never a later run; keep max_bytes modest
+    if that matters. A part that still cannot be read is renamed to .corrupt and skipped.
+    """
+
+    extension = "parquet"
+
+    def __init__(self, root="Result/tweets", prefix="tweets", max_bytes=100_000_000):
+        import pyarrow as pa  # only needed for this sink
+
+        super().__init__(root, prefix, max_bytes)
+        self.schema = pa.schema([(c, pa.int64() if c in COUNT_COLUMNS else pa.string()) for c in TWEET_COLUMNS])
+        self.writer = None
+
+    def _write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self._tmp_path(), self.schema)
+        df = df.astype({c: "int64" for c in COUNT_COLUMNS})
+        self.writer.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def _tmp_path(self):
+        return f"{self.path}.tmp"
+
+    def _size(self):
+        return os.path.getsize(self._tmp_path()) if self.writer is not None else super()._size()
+
+    def _close_file(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            os.replace(self._tmp_path(), self.path)
+
+    def _read_file(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        try:
+            return pq.read_table(path).to_pandas()
+        except (pa.ArrowInvalid, OSError) as e:
+            os.replace(path, f"{path}.corrupt")
+            log.warning(f"⚠️ Unreadable {path} moved to {path}.corrupt: {e}")
+            return pd.DataFrame(columns=TWEET_COLUMNS)
+
+
+class SqliteSink:
+    """
+    One SQLite table keyed by keyword + tweet_link: a refreshed tweet updates its row in place.
+    Every batch is committed before append() returns. No rollover; one database file.
+    """
+
+    def __init__(self, path="Result/tweets.sqlite"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        columns = ", ".join(f"{c} INTEGER" if c in COUNT_COLUMNS else f"{c} TEXT" for c in TWEET_COLUMNS)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS tweets ({columns}, PRIMARY KEY (keyword, tweet_link))")
+        # Columns added to TWEET_COLUMNS since the table was created
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(tweets)")}
+        for c in TWEET_COLUMNS:
+            if c not in existing:
+                self.conn.execute(f"ALTER TABLE tweets ADD COLUMN {c} {'INTEGER' if c in COUNT_COLUMNS else 'TEXT'}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tweets_extract_date ON tweets (extract_date)")
+        self.conn.commit()
+        self.stats = {"rows": 0}
+
+    def append(self, df):
+        if df.empty:
+            return 0
+        df = df.reindex(columns=TWEET_COLUMNS).drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        df = df.astype(object).where(df.notna(), None)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in TWEET_COLUMNS if c not in KEY_COLUMNS)
+        self.conn.executemany(
+            f"INSERT INTO tweets ({', '.join(TWEET_COLUMNS)}) VALUES ({', '.join('?' * len(TWEET_COLUMNS))}) "
+            f"ON CONFLICT(keyword, tweet_link) DO UPDATE SET {updates}",
+            df.itertuples(index=False, name=None),
+        )
+        self.conn.commit()
+        self.stats["rows"] += len(df)
+        return len(df)
+
+    def read(self, date=None):
+        """Every tweet last extracted on date (default today)."""
+        return pd.read_sql_query(
+            f"SELECT {', '.join(TWEET_COLUMNS)} FROM tweets WHERE extract_date = ?",
+            self.conn, params=(date or time.strftime("%Y-%m-%d"),),
+        )
+
+    def close(self):
+        self.conn.close()
+
+
+def sink_from_config(params):
+    params = params or {}
+    sink_format = params.get("format", "jsonl")
+    if sink_format == "sqlite":
+        return SqliteSink(params.get("path", "Result/tweets.sqlite"))
+    sink_class = {"jsonl": JsonlSink, "parquet": ParquetSink}[sink_format]
+    return sink_class(
+        params.get("root", "Result/tweets"),
+        prefix=params.get("prefix", "tweets"),
+        max_bytes=int(params.get("max_mb", 100) * 1_000_000),
+    )
+
+
+def export_excel(sink, file_path, date=None):
+    """Optional export of one day's tweets to .xlsx (the original output)."""
+    df = sink.read(date)
+    if len(df) > EXCEL_MAX_ROWS:
+        log.warning(f"⚠️ {len(df)} tweets exceed the Excel sheet limit, exporting the first {EXCEL_MAX_ROWS}")
+        df = df.head(EXCEL_MAX_ROWS)
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    df.to_excel(file_path, sheet_name="tweet_data", index=False)
+    log.info(f"Created new file: {file_path} with sheet 'tweet_data' ({len(df)} tweets)")
@@ -0,0 +1,120 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from tweet_extract import parse_timestamp
+
+TWEET_ID_RE = re.compile(r"/status/(\d+)")
+
+
+def tweet_id(link):
+    """Numeric status id from a tweet link (ids grow with time), None if there is none."""
+    match = TWEET_ID_RE.search(link or "")
+    return int(match.group(1)) if match else None
+
+
+class StopRule:
+    """
+    What one job already has, given its keyword's watermark (highest tweet id stored so far):
+    - stored(item): at or below the watermark and older than the refresh window, so it can be skipped
+    - reached(item): a stored tweet in newest-first order; everything after it is older, so pagination can stop
+    Pinned tweets and retweets are out of order: they never stop pagination, and retweets are always kept.
+    """
+
+    def __init__(self, watermark_id, refresh_since=None):
+        self.watermark_id = watermark_id
+        self.refresh_since = refresh_since
+
+    def stored(self, item):
+        if item.get("retweet"):
+            return False
+        item_id = tweet_id(item.get("tweet_link"))
+        if item_id is None or item_id > self.watermark_id:
+            return False
+        if self.refresh_since is None:
+            return True
+        try:
+            timestamp = parse_timestamp(item.get("timestamp_title"))
+        except ValueError:
+            return True
+        # Recent tweets are fetched again so their counts (hearts, retweets, ...) stay current
+        return timestamp is None or timestamp < self.refresh_since
+
+    def reached(self, item):
+        return not item.get("pinned") and self.stored(item)
+
+
+class WatermarkStore:
+    """
+    Per keyword/profile high-water mark (latest tweet id and its timestamp), persisted in SQLite:
+    - stop_rule(keyword) tells a scrape where the already stored part of the timeline starts
+    - advance(keyword, tweets) moves the mark forward after the tweets were saved (never backwards)
+    refresh_hours > 0 re-fetches tweets that recent to update their engagement counts. Thread-safe.
+    """
+
+    def __init__(self, path, refresh_hours=0):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                keyword TEXT PRIMARY KEY,
+                tweet_id INTEGER,
+                tweet_link TEXT,
+                tweet_timestamp TEXT,
+                updated_at REAL
+            )
+        """)
+        self.conn.commit()
+        self.refresh_hours = refresh_hours
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, params):
+        return cls(params.get("path", "Result/watermarks.sqlite"), refresh_hours=params.get("refresh_hours", 0))
+
+    def get(self, keyword):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT tweet_id, tweet_link, tweet_timestamp FROM watermarks WHERE keyword = ?", (keyword,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"tweet_id": row[0], "tweet_link": row[1], "tweet_timestamp": row[2]}
+
+    def stop_rule(self, keyword):
+        """StopRule for keyword, None on its first run (scrape the whole timeline)."""
+        watermark = self.get(keyword)
+        if watermark is None:
+            return None
+        refresh_since = None
+        if self.refresh_hours:
+            # Nitter timestamps are UTC, formatted like tweet_timestamp
+            refresh_since = datetime.now(timezone.utc) - timedelta(hours=self.refresh_hours)
+            refresh_since = refresh_since.strftime("%Y-%m-%d %H:%M:%S")
+        return StopRule(watermark["tweet_id"], refresh_since)
+
+    def advance(self, keyword, tweets):
+        """Raise keyword's mark to the newest of tweets (a DataFrame in TWEET_COLUMNS). Returns the new mark."""
+        ids = tweets["tweet_link"].map(tweet_id).dropna()
+        if ids.empty:
+            return self.get(keyword)
+        newest = tweets.loc[ids.astype("int64").idxmax()]
+        newest_id = tweet_id(newest["tweet_link"])
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO watermarks (keyword, tweet_id, tweet_link, tweet_timestamp, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(keyword) DO UPDATE SET tweet_id = excluded.tweet_id, tweet_link = excluded.tweet_link,
+                    tweet_timestamp = excluded.tweet_timestamp, updated_at = excluded.updated_at
+                WHERE excluded.tweet_id > watermarks.tweet_id
+            """, (keyword, newest_id, newest["tweet_link"], newest["tweet_timestamp"], time.time()))
+            self.conn.commit()
+        return self.get(keyword)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()